@@ -0,0 +1,24 @@
+from .aggregates import (
+    ErrorAccumulator,
+    LogAggregates,
+    ModelAggregates,
+    QuantileSketch,
+    RunningStatistics,
+    log_entry_matches,
+)
+from .checkpoint import aggregate_incrementally, load_checkpoint, save_checkpoint
+from .parallel import aggregate_in_parallel, get_byte_ranges
+
+__all__ = [
+    "ErrorAccumulator",
+    "LogAggregates",
+    "ModelAggregates",
+    "QuantileSketch",
+    "RunningStatistics",
+    "aggregate_in_parallel",
+    "aggregate_incrementally",
+    "get_byte_ranges",
+    "load_checkpoint",
+    "log_entry_matches",
+    "save_checkpoint",
+]
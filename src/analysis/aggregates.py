@@ -0,0 +1,365 @@
+import json
+import math
+from typing import Any, Self
+
+from constants import LOG_SKETCH_RELATIVE_ACCURACY, REVIEW_SCORES_RATING_COLUMN
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed quantile sketch (DDSketch).
+
+    Quantiles interpolate linearly between the order statistics around rank
+    ``q * (n - 1)``, like ``np.percentile``. Each order statistic is within
+    ``relative_accuracy`` relative error, so the quantile is too whenever both
+    order statistics have the same sign.
+    """
+
+    def __init__(self, relative_accuracy: float = LOG_SKETCH_RELATIVE_ACCURACY) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value > 0:
+            index = self._get_index(value)
+            self.positive[index] = self.positive.get(index, 0) + 1
+        elif value < 0:
+            index = self._get_index(-value)
+            self.negative[index] = self.negative.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy.")
+
+        for index, count in other.positive.items():
+            self.positive[index] = self.positive.get(index, 0) + count
+        for index, count in other.negative.items():
+            self.negative[index] = self.negative.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+
+        position = q * (self.count - 1)
+        rank = math.floor(position)
+        value = self._get_order_statistic(rank)
+        fraction = position - rank
+        if fraction == 0:
+            return value
+        return value + fraction * (self._get_order_statistic(rank + 1) - value)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": self.positive,
+            "negative": self.negative,
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> Self:
+        sketch = cls(state["relative_accuracy"])
+        sketch.positive = {
+            int(index): count for index, count in state["positive"].items()
+        }
+        sketch.negative = {
+            int(index): count for index, count in state["negative"].items()
+        }
+        sketch.zero_count = state["zero_count"]
+        sketch.count = state["count"]
+        return sketch
+
+    def _get_order_statistic(self, rank: int) -> float:
+        seen = 0
+
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._get_value(index)
+
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._get_value(index)
+
+        return self._get_value(max(self.positive))
+
+    def _get_index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _get_value(self, index: int) -> float:
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+
+class RunningStatistics:
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch()
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other: "RunningStatistics") -> None:
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    def get_statistics(self) -> dict[str, float]:
+        if self.count == 0:
+            return {}
+
+        return {
+            "mean": self.mean,
+            "median": self._get_quantile(0.5),
+            "std": math.sqrt(self.m2 / self.count),
+            "min": self.min,
+            "max": self.max,
+            "q25": self._get_quantile(0.25),
+            "q75": self._get_quantile(0.75),
+        }
+
+    def _get_quantile(self, q: float) -> float:
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "sketch": self.sketch.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> Self:
+        statistics = cls()
+        statistics.count = state["count"]
+        statistics.mean = state["mean"]
+        statistics.m2 = state["m2"]
+        statistics.min = state["min"]
+        statistics.max = state["max"]
+        statistics.sketch = QuantileSketch.from_dict(state["sketch"])
+        return statistics
+
+
+class ErrorAccumulator:
+    def __init__(self) -> None:
+        self.count = 0
+        self.absolute_error_sum = 0.0
+        self.squared_error_sum = 0.0
+        self.actual_mean = 0.0
+        self.prediction_mean = 0.0
+        self.actual_m2 = 0.0
+        self.prediction_m2 = 0.0
+        self.co_moment = 0.0
+
+    def add(self, prediction: float, actual: float) -> None:
+        self.count += 1
+        error = actual - prediction
+        self.absolute_error_sum += abs(error)
+        self.squared_error_sum += error * error
+
+        actual_delta = actual - self.actual_mean
+        prediction_delta = prediction - self.prediction_mean
+        self.actual_mean += actual_delta / self.count
+        self.prediction_mean += prediction_delta / self.count
+        self.actual_m2 += actual_delta * (actual - self.actual_mean)
+        self.prediction_m2 += prediction_delta * (prediction - self.prediction_mean)
+        self.co_moment += actual_delta * (prediction - self.prediction_mean)
+
+    def merge(self, other: "ErrorAccumulator") -> None:
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        weight = self.count * other.count / count
+        actual_delta = other.actual_mean - self.actual_mean
+        prediction_delta = other.prediction_mean - self.prediction_mean
+
+        self.absolute_error_sum += other.absolute_error_sum
+        self.squared_error_sum += other.squared_error_sum
+        self.actual_m2 += other.actual_m2 + actual_delta**2 * weight
+        self.prediction_m2 += other.prediction_m2 + prediction_delta**2 * weight
+        self.co_moment += other.co_moment + actual_delta * prediction_delta * weight
+        self.actual_mean += actual_delta * other.count / count
+        self.prediction_mean += prediction_delta * other.count / count
+        self.count = count
+
+    def get_metrics(self) -> dict[str, float]:
+        if self.count == 0:
+            return {}
+
+        denominator = math.sqrt(self.actual_m2 * self.prediction_m2)
+        return {
+            "mae": self.absolute_error_sum / self.count,
+            "rmse": math.sqrt(self.squared_error_sum / self.count),
+            "correlation": self.co_moment / denominator if denominator else math.nan,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> Self:
+        errors = cls()
+        vars(errors).update(state)
+        return errors
+
+
+class ModelAggregates:
+    def __init__(self) -> None:
+        self.predictions = RunningStatistics()
+        self.errors = ErrorAccumulator()
+
+    def merge(self, other: "ModelAggregates") -> None:
+        self.predictions.merge(other.predictions)
+        self.errors.merge(other.errors)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "predictions": self.predictions.to_dict(),
+            "errors": self.errors.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> Self:
+        model_aggregates = cls()
+        model_aggregates.predictions = RunningStatistics.from_dict(state["predictions"])
+        model_aggregates.errors = ErrorAccumulator.from_dict(state["errors"])
+        return model_aggregates
+
+
+def log_entry_matches(
+    log_entry: dict[str, Any],
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> bool:
+    return (
+        (model_names is None or log_entry.get("model_name") in model_names)
+        and (since is None or log_entry.get("timestamp", "") >= since)
+        and (until is None or log_entry.get("timestamp", "") <= until)
+    )
+
+
+class LogAggregates:
+    """Single-pass, mergeable per-model aggregates of prediction logs.
+
+    Mean, standard deviation, min, max, MAE, RMSE and Pearson correlation match
+    ``calculate_statistics`` and ``print_error_metrics`` up to floating point
+    summation order (relative error below 1e-9). Median and quartiles come from
+    ``QuantileSketch`` and are within ``LOG_SKETCH_RELATIVE_ACCURACY`` relative
+    error of ``np.median`` and ``np.percentile`` for positive ratings.
+    """
+
+    def __init__(self) -> None:
+        self.models: dict[str, ModelAggregates] = {}
+        self.entries = 0
+        self.invalid_lines = 0
+
+    def add_line(
+        self,
+        line: str | bytes,
+        model_names: list[str] | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> None:
+        line = line.strip()
+        if not line:
+            return
+
+        try:
+            log_entry = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.invalid_lines += 1
+            return
+
+        if log_entry_matches(log_entry, model_names, since, until):
+            self.add(log_entry)
+
+    def add(self, log_entry: dict[str, Any]) -> None:
+        self.entries += 1
+
+        model_name = log_entry.get("model_name")
+        prediction = log_entry.get("prediction")
+        if not model_name or prediction is None:
+            return
+
+        try:
+            prediction = float(prediction)
+        except (ValueError, TypeError):
+            return
+
+        model_aggregates = self.models.setdefault(model_name, ModelAggregates())
+        model_aggregates.predictions.add(prediction)
+
+        actual_rating = log_entry.get("input_data", {}).get(REVIEW_SCORES_RATING_COLUMN)
+        if actual_rating is None:
+            return
+
+        try:
+            model_aggregates.errors.add(prediction, float(actual_rating))
+        except (ValueError, TypeError):
+            return
+
+    def merge(self, other: "LogAggregates") -> None:
+        self.entries += other.entries
+        self.invalid_lines += other.invalid_lines
+        for model_name, model_aggregates in other.models.items():
+            self.models.setdefault(model_name, ModelAggregates()).merge(
+                model_aggregates
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "entries": self.entries,
+            "invalid_lines": self.invalid_lines,
+            "models": {
+                model_name: model_aggregates.to_dict()
+                for model_name, model_aggregates in self.models.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> Self:
+        aggregates = cls()
+        aggregates.entries = state["entries"]
+        aggregates.invalid_lines = state["invalid_lines"]
+        aggregates.models = {
+            model_name: ModelAggregates.from_dict(model_state)
+            for model_name, model_state in state["models"].items()
+        }
+        return aggregates
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import IO, Any
+
+from constants import ANALYSIS_CHECKPOINT_VERSION, CHECKPOINT_FINGERPRINT_BYTES
+from data.prediction_logs import COMPRESSION_CODECS
+
+from .aggregates import LogAggregates
+
+
+def load_checkpoint(checkpoint_path: Path) -> dict[str, Any]:
+    if not checkpoint_path.exists():
+        return {}
+
+    with checkpoint_path.open(encoding="utf-8") as f:
+        checkpoint: dict[str, Any] = json.load(f)
+
+    if checkpoint.get("version") != ANALYSIS_CHECKPOINT_VERSION:
+        return {}
+
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path: Path, checkpoint: dict[str, Any]) -> None:
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = checkpoint_path.with_name(f".{checkpoint_path.name}.tmp")
+
+    with temporary_path.open("w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+
+    temporary_path.replace(checkpoint_path)
+
+
+def get_logical_path(path: Path) -> Path:
+    for _, extension in COMPRESSION_CODECS.values():
+        if path.name.endswith(extension):
+            return path.with_name(path.name.removesuffix(extension))
+    return path
+
+
+def open_binary(path: Path) -> tuple[IO[bytes], bool]:
+    for codec, extension in COMPRESSION_CODECS.values():
+        if path.name.endswith(extension):
+            stream: IO[bytes] = codec.open(path, "rb")
+            return stream, True
+    return path.open("rb"), False
+
+
+def get_fingerprint(stream: IO[bytes], length: int) -> str:
+    stream.seek(0)
+    return hashlib.sha256(stream.read(length)).hexdigest()
+
+
+def update_file_state(
+    path: Path,
+    state: dict[str, Any] | None,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> tuple[dict[str, Any], int]:
+    """Parses the complete lines appended to ``path`` since ``state`` was saved.
+
+    Returns the new file state and the number of uncompressed bytes parsed.
+    The state is discarded and the file reparsed when its first bytes no
+    longer match the stored fingerprint or it is shorter than the stored offset.
+    """
+    file_stat = path.stat()
+
+    if (
+        state is not None
+        and state["sealed"]
+        and state["size"] == file_stat.st_size
+        and state["mtime_ns"] == file_stat.st_mtime_ns
+    ):
+        return state, 0
+
+    stream, sealed = open_binary(path)
+
+    with stream:
+        if state is not None and (
+            (not sealed and file_stat.st_size < state["offset"])
+            or get_fingerprint(stream, state["fingerprint_length"])
+            != state["fingerprint"]
+            or stream.seek(state["offset"]) != state["offset"]
+            or stream.tell() != state["offset"]
+        ):
+            state = None
+
+        if state is None:
+            start_offset = 0
+            aggregates = LogAggregates()
+        else:
+            start_offset = state["offset"]
+            aggregates = LogAggregates.from_dict(state["aggregates"])
+
+        offset = start_offset
+        stream.seek(offset)
+        for line in stream:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            aggregates.add_line(line, model_names, since, until)
+
+        fingerprint_length = min(offset, CHECKPOINT_FINGERPRINT_BYTES)
+        fingerprint = get_fingerprint(stream, fingerprint_length)
+
+    new_state = {
+        "offset": offset,
+        "fingerprint": fingerprint,
+        "fingerprint_length": fingerprint_length,
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "sealed": sealed,
+        "aggregates": aggregates.to_dict(),
+    }
+    return new_state, offset - start_offset
+
+
+def aggregate_incrementally(
+    paths: list[Path],
+    checkpoint_path: Path,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> tuple[LogAggregates, int]:
+    """Aggregates ``paths`` resuming from the offsets stored in the checkpoint.
+
+    Files are keyed by their path without the compression extension, so a
+    segment sealed after the previous run is continued from the same offset.
+    Files missing from ``paths`` are dropped from the checkpoint and a change
+    of filters discards it entirely.
+    """
+    filters = {"model_names": model_names, "since": since, "until": until}
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    previous_states: dict[str, Any] = (
+        checkpoint["files"] if checkpoint.get("filters") == filters else {}
+    )
+    states: dict[str, Any] = {}
+    parsed_bytes = 0
+
+    for path in paths:
+        logical_path = str(get_logical_path(path.resolve()))
+        state, file_parsed_bytes = update_file_state(
+            path, previous_states.get(logical_path), model_names, since, until
+        )
+        states[logical_path] = state
+        parsed_bytes += file_parsed_bytes
+
+    save_checkpoint(
+        checkpoint_path,
+        {"version": ANALYSIS_CHECKPOINT_VERSION, "filters": filters, "files": states},
+    )
+
+    aggregates = LogAggregates()
+    for state in states.values():
+        aggregates.merge(LogAggregates.from_dict(state["aggregates"]))
+
+    return aggregates, parsed_bytes
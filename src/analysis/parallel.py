@@ -0,0 +1,107 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from constants import LOG_PARSE_CHUNK_BYTES
+
+from .aggregates import LogAggregates
+from .checkpoint import open_binary
+
+
+def get_byte_ranges(path: Path, count: int) -> list[tuple[int, int | None]]:
+    """Splits ``path`` into up to ``count`` ranges that start at line boundaries.
+
+    Compressed files cannot be split and are returned as a single range.
+    """
+    size = path.stat().st_size
+    stream, compressed = open_binary(path)
+
+    with stream:
+        if compressed or size == 0:
+            return [(0, None)]
+
+        boundaries = [0]
+        for index in range(1, count):
+            stream.seek(max(size * index // count, boundaries[-1]))
+            stream.readline()
+            boundary = stream.tell()
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+
+    return [
+        (start, end)
+        for start, end in zip(boundaries, [*boundaries[1:], None], strict=True)
+    ]
+
+
+def aggregate_byte_range(
+    path: Path,
+    start: int,
+    end: int | None,
+    *,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> LogAggregates:
+    aggregates = LogAggregates()
+    stream, _ = open_binary(path)
+
+    with stream:
+        stream.seek(start)
+        offset = start
+        for line in stream:
+            aggregates.add_line(line, model_names, since, until)
+            offset += len(line)
+            if end is not None and offset >= end:
+                break
+
+    return aggregates
+
+
+def aggregate_in_parallel(
+    paths: list[Path],
+    workers: int,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    *,
+    chunk_bytes: int = LOG_PARSE_CHUNK_BYTES,
+) -> LogAggregates:
+    """Aggregates ``paths`` in a pool of ``workers`` processes.
+
+    Plain log files are split into newline-aligned byte ranges of roughly
+    ``chunk_bytes`` (at least ``workers`` ranges per file), compressed segments
+    are parsed whole. Workers return ``LogAggregates`` partials, which are
+    merged in file order.
+    """
+    tasks = [
+        (path, start, end)
+        for path in paths
+        for start, end in get_byte_ranges(
+            path, max(workers, math.ceil(path.stat().st_size / chunk_bytes))
+        )
+    ]
+
+    aggregates = LogAggregates()
+    if not tasks:
+        return aggregates
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                aggregate_byte_range,
+                path,
+                start,
+                end,
+                model_names=model_names,
+                since=since,
+                until=until,
+            )
+            for path, start, end in tasks
+        ]
+        for future in futures:
+            aggregates.merge(future.result())
+
+    return aggregates
@@ -1,6 +1,7 @@
 import argparse
 import json
 from collections import defaultdict
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 
@@ -9,27 +10,80 @@ import numpy as np
 from scipy import stats
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
-from constants import PREDICTION_LOG_DIR
+from analysis import (
+    LogAggregates,
+    aggregate_in_parallel,
+    aggregate_incrementally,
+    log_entry_matches,
+)
+from constants import (
+    PREDICTION_LOG_DIR,
+    PREDICTION_LOG_NAME,
+    PREDICTION_LOG_SEGMENT_DIR,
+)
+from data import iter_log_lines, select_segments
+
+
+def parse_log_lines(lines: Iterable[str]) -> list[dict[str, Any]]:
+    logs = []
+    for raw_line in lines:
+        line = raw_line.strip()
+        if line:
+            try:
+                log_entry = json.loads(line)
+                logs.append(log_entry)
+            except json.JSONDecodeError as e:
+                print(f"Błąd parsowania linii: {e}")
+                continue
+
+    return logs
 
 
 def load_logs(log_file: Path) -> list[dict[str, Any]]:
-    logs = []
     if not log_file.exists():
         print(f"Plik logów nie istnieje: {log_file}")
-        return logs
+        return []
 
     with log_file.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    log_entry = json.loads(line)
-                    logs.append(log_entry)
-                except json.JSONDecodeError as e:
-                    print(f"Błąd parsowania linii: {e}")
-                    continue
+        return parse_log_lines(f)
 
-    return logs
+
+def load_segmented_logs(
+    log_dir: Path,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> list[dict[str, Any]]:
+    segments = select_segments(log_dir, model_names, since, until)
+    print(f"Wybrano {len(segments)} segmentów logów z: {log_dir}")
+    return parse_log_lines(iter_log_lines(segments))
+
+
+def filter_logs(
+    logs: list[dict[str, Any]],
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> list[dict[str, Any]]:
+    return [
+        log_entry
+        for log_entry in logs
+        if log_entry_matches(log_entry, model_names, since, until)
+    ]
+
+
+def aggregate_logs(
+    lines: Iterable[str],
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> LogAggregates:
+    aggregates = LogAggregates()
+
+    for line in lines:
+        aggregates.add_line(line, model_names, since, until)
+
+    return aggregates
 
 
 def extract_predictions_by_model(logs: list[dict[str, Any]]) -> dict[str, list[float]]:
@@ -228,15 +282,31 @@ def print_statistics_table(predictions_by_model: dict[str, list[float]]) -> None
     print("=" * 80)
 
     for model_name, predictions in predictions_by_model.items():
-        stats_dict = calculate_statistics(predictions)
-        print(f"\nModel: {model_name} (n={len(predictions)})")
-        print(f"  Średnia:      {stats_dict['mean']:8.4f}")
-        print(f"  Mediana:      {stats_dict['median']:8.4f}")
-        print(f"  Odch. std.:   {stats_dict['std']:8.4f}")
-        print(f"  Min:          {stats_dict['min']:8.4f}")
-        print(f"  Max:          {stats_dict['max']:8.4f}")
-        print(f"  Q25:          {stats_dict['q25']:8.4f}")
-        print(f"  Q75:          {stats_dict['q75']:8.4f}")
+        print_model_statistics(
+            model_name, len(predictions), calculate_statistics(predictions)
+        )
+
+
+def print_model_statistics(
+    model_name: str, count: int, stats_dict: dict[str, float]
+) -> None:
+    print(f"\nModel: {model_name} (n={count})")
+    print(f"  Średnia:      {stats_dict['mean']:8.4f}")
+    print(f"  Mediana:      {stats_dict['median']:8.4f}")
+    print(f"  Odch. std.:   {stats_dict['std']:8.4f}")
+    print(f"  Min:          {stats_dict['min']:8.4f}")
+    print(f"  Max:          {stats_dict['max']:8.4f}")
+    print(f"  Q25:          {stats_dict['q25']:8.4f}")
+    print(f"  Q75:          {stats_dict['q75']:8.4f}")
+
+
+def print_model_error_metrics(
+    model_name: str, count: int, mae: float, rmse: float, correlation: float
+) -> None:
+    print(f"\nModel: {model_name} (n={count})")
+    print(f"  MAE (Mean Absolute Error):      {mae:.4f}")
+    print(f"  RMSE (Root Mean Squared Error): {rmse:.4f}")
+    print(f"  Korelacja Pearsona:             {correlation:.4f}")
 
 
 def print_error_metrics(
@@ -268,10 +338,9 @@ def print_error_metrics(
             rmse = np.sqrt(mean_squared_error(actuals, predictions))
             correlation = np.corrcoef(actuals, predictions)[0, 1]
 
-            print(f"\nModel: {model_name} (n={len(predictions)})")
-            print(f"  MAE (Mean Absolute Error):      {mae:.4f}")
-            print(f"  RMSE (Root Mean Squared Error): {rmse:.4f}")
-            print(f"  Korelacja Pearsona:             {correlation:.4f}")
+            print_model_error_metrics(
+                model_name, len(predictions), mae, rmse, correlation
+            )
         except Exception as e:
             print(f"\nModel: {model_name} - Błąd obliczania metryk: {e}")
             continue
@@ -317,7 +386,137 @@ def perform_statistical_test(
             print(f"  Różnica średnich: {mean_a:.4f} vs {mean_b:.4f} (różnica: {abs(mean_a - mean_b):.4f})")
 
 
-def main() -> None:
+def get_streaming_log_paths(
+    log_file: str | None,
+    log_dir: str | None,
+    model_names: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+) -> list[Path]:
+    if log_file:
+        if not Path(log_file).exists():
+            print(f"Plik logów nie istnieje: {log_file}")
+            return []
+        print(f"Wczytywanie logów z: {log_file}")
+        return [Path(log_file)]
+
+    segment_dir = Path(log_dir) if log_dir else PREDICTION_LOG_SEGMENT_DIR
+    paths = select_segments(segment_dir, model_names, since, until)
+    print(f"Wybrano {len(paths)} segmentów logów z: {segment_dir}")
+
+    legacy_log_file = PREDICTION_LOG_DIR / PREDICTION_LOG_NAME
+    if not log_dir and legacy_log_file.exists():
+        print(f"Wczytywanie logów z: {legacy_log_file}")
+        paths.append(legacy_log_file)
+
+    return paths
+
+
+def print_streaming_report(aggregates: LogAggregates) -> None:
+    """Wypisuje raport z agregatów obliczonych w jednym przebiegu."""
+    print(f"Przetworzono {aggregates.entries} wpisów z loga")
+    if aggregates.invalid_lines:
+        print(f"Pominięto {aggregates.invalid_lines} niepoprawnych linii")
+
+    print(f"\nZnaleziono {len(aggregates.models)} modeli:")
+    for model_name, model_aggregates in aggregates.models.items():
+        print(f"  - {model_name}: {model_aggregates.predictions.count} predykcji")
+
+    print("\n" + "=" * 80)
+    print("STATYSTYKI PREDYKCJI PO MODELACH")
+    print("=" * 80)
+
+    for model_name, model_aggregates in aggregates.models.items():
+        print_model_statistics(
+            model_name,
+            model_aggregates.predictions.count,
+            model_aggregates.predictions.get_statistics(),
+        )
+
+    models_with_actual = {
+        model_name: model_aggregates.errors
+        for model_name, model_aggregates in aggregates.models.items()
+        if model_aggregates.errors.count > 0
+    }
+
+    if not models_with_actual:
+        print("\nBrak danych z rzeczywistymi ocenami do porównania.")
+    else:
+        print("\n" + "=" * 80)
+        print("METRYKI BŁĘDÓW (przy dostępnych rzeczywistych ocenach)")
+        print("=" * 80)
+
+        for model_name, errors in models_with_actual.items():
+            metrics = errors.get_metrics()
+            print_model_error_metrics(
+                model_name,
+                errors.count,
+                metrics["mae"],
+                metrics["rmse"],
+                metrics["correlation"],
+            )
+
+    if len(aggregates.models) < 2:
+        return
+
+    models = list(aggregates.models.keys())
+    print("\n" + "=" * 80)
+    print("TESTY STATYSTYCZNE (A/B Testing)")
+    print("=" * 80)
+
+    for i in range(len(models)):
+        for j in range(i + 1, len(models)):
+            pred_a = aggregates.models[models[i]].predictions
+            pred_b = aggregates.models[models[j]].predictions
+
+            t_stat, p_value = stats.ttest_ind_from_stats(
+                pred_a.mean,
+                np.sqrt(pred_a.m2 / max(pred_a.count - 1, 1)),
+                pred_a.count,
+                pred_b.mean,
+                np.sqrt(pred_b.m2 / max(pred_b.count - 1, 1)),
+                pred_b.count,
+            )
+
+            print(f"\nPorównanie: {models[i]} vs {models[j]}")
+            print("  T-test:")
+            print(f"    Statystyka t: {t_stat:.4f}")
+            print(f"    P-value:      {p_value:.4f}")
+            print(f"    Istotność:    {'TAK' if p_value < 0.05 else 'NIE'} (p < 0.05)")
+            print("  Mann-Whitney U test: niedostępny w trybie strumieniowym")
+            print(
+                f"  Różnica średnich: {pred_a.mean:.4f} vs {pred_b.mean:.4f} "
+                f"(różnica: {abs(pred_a.mean - pred_b.mean):.4f})"
+            )
+
+
+def run_streaming_analysis(args: argparse.Namespace) -> None:
+    paths = get_streaming_log_paths(
+        args.log_file, args.log_dir, args.models, args.since, args.until
+    )
+
+    if args.checkpoint:
+        aggregates, parsed_bytes = aggregate_incrementally(
+            paths, Path(args.checkpoint), args.models, args.since, args.until
+        )
+        print(f"Przetworzono {parsed_bytes} nowych bajtów logów")
+    elif args.workers > 1:
+        aggregates = aggregate_in_parallel(
+            paths, args.workers, args.models, args.since, args.until
+        )
+    else:
+        aggregates = aggregate_logs(
+            iter_log_lines(paths), args.models, args.since, args.until
+        )
+
+    if not aggregates.models:
+        print("Brak predykcji w logach!")
+        return
+
+    print_streaming_report(aggregates)
+
+
+def get_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Analiza logów predykcji do testów A/B"
     )
@@ -325,7 +524,55 @@ def main() -> None:
         "--log-file",
         type=str,
         default=None,
-        help="Ścieżka do pliku logów (domyślnie: src/service/logs/predictions.log)",
+        help="Ścieżka do pojedynczego pliku logów (domyślnie: segmenty z "
+        "src/service/logs/segments oraz src/service/logs/predictions.log)",
+    )
+    parser.add_argument(
+        "--log-dir",
+        type=str,
+        default=None,
+        help="Katalog z segmentami logów (domyślnie: src/service/logs/segments)",
+    )
+    parser.add_argument(
+        "--models",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Analizuj tylko wybrane modele",
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        default=None,
+        help="Początek zakresu czasu w formacie ISO (np. 2026-01-01T00:00:00)",
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        default=None,
+        help="Koniec zakresu czasu w formacie ISO (np. 2026-01-31T23:59:59)",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Oblicz statystyki w jednym przebiegu ze stałym zużyciem pamięci "
+        "(bez wykresów i testu Manna-Whitneya; mediana i kwartyle z dokładnością "
+        "względną LOG_SKETCH_RELATIVE_ACCURACY, pozostałe metryki do ~1e-9)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Plik stanu analizy przyrostowej; kolejne uruchomienia przetwarzają "
+        "tylko nowe linie logów (włącza tryb --streaming)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Liczba procesów parsujących logi; wartość > 1 dzieli pliki na "
+        "fragmenty wyrównane do linii (włącza tryb --streaming, nie łączy się "
+        "z --checkpoint, domyślnie: 1)",
     )
     parser.add_argument(
         "--output-dir",
@@ -336,16 +583,39 @@ def main() -> None:
 
     args = parser.parse_args()
 
+    if args.checkpoint and args.workers > 1:
+        parser.error(
+            "--checkpoint nie obsługuje --workers > 1; analiza przyrostowa "
+            "przetwarza nowe linie logów w jednym procesie"
+        )
+
+    return args
+
+
+def main() -> None:
+    args = get_arguments()
+
+    if args.streaming or args.checkpoint or args.workers > 1:
+        run_streaming_analysis(args)
+        return
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
     if args.log_file:
         log_file = Path(args.log_file)
+        print(f"Wczytywanie logów z: {log_file}")
+        logs = load_logs(log_file)
     else:
-        log_file = PREDICTION_LOG_DIR / "predictions.log"
+        log_dir = Path(args.log_dir) if args.log_dir else PREDICTION_LOG_SEGMENT_DIR
+        logs = load_segmented_logs(log_dir, args.models, args.since, args.until)
 
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+        legacy_log_file = PREDICTION_LOG_DIR / PREDICTION_LOG_NAME
+        if not args.log_dir and legacy_log_file.exists():
+            print(f"Wczytywanie logów z: {legacy_log_file}")
+            logs.extend(load_logs(legacy_log_file))
 
-    print(f"Wczytywanie logów z: {log_file}")
-    logs = load_logs(log_file)
+    logs = filter_logs(logs, args.models, args.since, args.until)
 
     if not logs:
         print("Brak danych w logu!")
@@ -0,0 +1,80 @@
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from constants import DEFAULT_MODEL_NAME
+from data import get_listings
+from model import load_model
+from model.compiled import compile_model
+from model.preprocessing import prepare_data
+
+
+def get_arguments() -> tuple[str, list[int], int]:
+    parser = argparse.ArgumentParser(
+        description="Compare compiled tree inference with model.predict"
+    )
+    parser.add_argument(
+        "--model-name",
+        type=str,
+        default=DEFAULT_MODEL_NAME,
+        help=f"Model name (default: {DEFAULT_MODEL_NAME})",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50, 100, 1000],
+        help="Batch sizes to benchmark (default: 1 10 50 100 1000)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=50,
+        help="Number of timed calls per batch size (default: 50)",
+    )
+
+    arguments = parser.parse_args()
+
+    return arguments.model_name, arguments.batch_sizes, arguments.repeats
+
+
+def time_calls(function: Callable[[Any], Any], features: Any, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(features)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def benchmark(model_name: str, batch_sizes: list[int], repeats: int) -> None:
+    print(f"Loading model '{model_name}'...")
+    model, transformer, _, _ = load_model(model_name)
+    compiled_model = compile_model(model, max_batch_size=max(batch_sizes))
+
+    print("Loading data...")
+    features, _ = prepare_data(get_listings(), fit=False, transformer=transformer)
+
+    print(f"{'batch':>8} {'sklearn [ms]':>14} {'compiled [ms]':>14} {'speedup':>9}")
+
+    for batch_size in batch_sizes:
+        batch = features.sample(
+            n=batch_size, replace=batch_size > len(features), random_state=batch_size
+        )
+
+        if not np.array_equal(model.predict(batch), compiled_model.predict(batch)):
+            raise AssertionError(f"Predictions differ for batch size {batch_size}.")
+
+        sklearn_time = time_calls(model.predict, batch, repeats)
+        compiled_time = time_calls(compiled_model.predict, batch, repeats)
+
+        print(
+            f"{batch_size:>8} {sklearn_time:>14.3f} {compiled_time:>14.3f} "
+            f"{sklearn_time / compiled_time:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    model_name, batch_sizes, repeats = get_arguments()
+    benchmark(model_name, batch_sizes, repeats)
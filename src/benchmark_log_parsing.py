@@ -0,0 +1,94 @@
+import argparse
+import os
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from analysis import aggregate_in_parallel
+from analyze_logs import aggregate_logs, load_logs
+from data import iter_log_lines
+
+
+def get_arguments() -> tuple[Path, list[int], int]:
+    parser = argparse.ArgumentParser(
+        description="Compare parallel log aggregation with the sequential loader"
+    )
+    parser.add_argument(
+        "log_file",
+        type=Path,
+        help="Prediction log file to parse",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[2, 4, os.cpu_count() or 1],
+        help="Worker counts to benchmark (default: 2 4 <cpu count>)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Timed runs per variant, the best one is reported (default: 3)",
+    )
+
+    arguments = parser.parse_args()
+
+    return arguments.log_file, sorted(set(arguments.workers)), arguments.repeats
+
+
+def time_best(function: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(log_file: Path, workers: list[int], repeats: int) -> None:
+    size_mb = log_file.stat().st_size / 1024 / 1024
+    print(f"Log file: {log_file} ({size_mb:.1f} MB, {os.cpu_count()} CPUs)")
+
+    baseline, logs = time_best(lambda: load_logs(log_file), repeats)
+    print(f"{'variant':>22} {'time [s]':>10} {'MB/s':>8} {'speedup':>9}")
+    print(f"{'load_logs':>22} {baseline:>10.3f} {size_mb / baseline:>8.1f} {1:>8.2f}x")
+
+    sequential, aggregates = time_best(
+        lambda: aggregate_logs(iter_log_lines([log_file])), repeats
+    )
+    print(
+        f"{'aggregate_logs':>22} {sequential:>10.3f} {size_mb / sequential:>8.1f} "
+        f"{baseline / sequential:>8.2f}x"
+    )
+
+    if aggregates.entries != len(logs):
+        raise AssertionError(
+            f"Sequential aggregation saw {aggregates.entries} entries, "
+            f"load_logs returned {len(logs)}."
+        )
+
+    for worker_count in workers:
+        elapsed, parallel_aggregates = time_best(
+            partial(aggregate_in_parallel, [log_file], worker_count), repeats
+        )
+
+        if parallel_aggregates.entries != aggregates.entries:
+            raise AssertionError(
+                f"{worker_count} workers saw {parallel_aggregates.entries} entries, "
+                f"expected {aggregates.entries}."
+            )
+
+        label = f"parallel ({worker_count} workers)"
+        print(
+            f"{label:>22} {elapsed:>10.3f} {size_mb / elapsed:>8.1f} "
+            f"{baseline / elapsed:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    log_file, workers, repeats = get_arguments()
+    benchmark(log_file, workers, repeats)
@@ -0,0 +1,82 @@
+import argparse
+import time
+
+import pandas as pd
+
+from constants import LISTING_VALIDATION_POLICIES
+from data import get_listings
+from schemas import Listing
+from service.services.listings import (
+    build_listings_dataframe,
+    dataframe_to_listings,
+    validate_listings,
+    validate_ranked_listings,
+)
+
+
+def get_arguments() -> tuple[list[int], int]:
+    parser = argparse.ArgumentParser(
+        description="Compare listing validation latency per validation policy"
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50, 100],
+        help="Listings per request to benchmark (default: 1 10 50 100)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=50,
+        help="Number of timed requests per batch size (default: 50)",
+    )
+
+    arguments = parser.parse_args()
+
+    return arguments.batch_sizes, arguments.repeats
+
+
+def validate_request(listings: list[Listing], policy: str) -> pd.DataFrame:
+    """Runs the validation a rank request performs under ``policy``."""
+    dataframe_listings = validate_listings(
+        build_listings_dataframe(listings), policy=policy
+    )
+    ranked_listings = dataframe_listings.iloc[::-1].reset_index(drop=True)
+    return validate_ranked_listings(ranked_listings, policy)
+
+
+def time_requests(listings: list[Listing], policy: str, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        validate_request(listings, policy)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def benchmark(batch_sizes: list[int], repeats: int) -> None:
+    print("Loading data...")
+    all_listings = dataframe_to_listings(get_listings().head(max(batch_sizes)))
+
+    header = "".join(
+        f"{policy + ' [ms]':>20}" for policy in LISTING_VALIDATION_POLICIES
+    )
+    print(f"{'batch':>8}{header}")
+
+    for batch_size in batch_sizes:
+        listings = all_listings[:batch_size]
+
+        expected = validate_request(listings, "full")
+        for policy in LISTING_VALIDATION_POLICIES:
+            pd.testing.assert_frame_equal(validate_request(listings, policy), expected)
+
+        times = [
+            time_requests(listings, policy, repeats)
+            for policy in LISTING_VALIDATION_POLICIES
+        ]
+        row = "".join(f"{elapsed:>20.3f}" for elapsed in times)
+        print(f"{batch_size:>8}{row}")
+
+
+if __name__ == "__main__":
+    batch_sizes, repeats = get_arguments()
+    benchmark(batch_sizes, repeats)
@@ -1,8 +1,15 @@
 from .constants import (
     AMENITIES_COLUMN,
+    ANALYSIS_CHECKPOINT_VERSION,
+    ARTIFACT_FORMAT_VERSION,
+    ARTIFACT_MANIFEST_NAME,
     BOOLEAN_COLUMNS,
     CATEGORICAL_COLUMNS,
+    CHECKPOINT_FINGERPRINT_BYTES,
     COLUMNS_TO_DROP,
+    COMPILED_MODEL_MAX_BATCH_SIZE,
+    COMPILED_MODEL_NAME,
+    CV_RUN_REPORTS_PATH,
     DATASET_DIR,
     DEFAULT_DATASET_NAME,
     DEFAULT_LEARNING_RATE,
@@ -15,33 +22,71 @@ from .constants import (
     DEFAULT_MODEL_NAME,
     DEFAULT_N_ESTIMATORS,
     DEFAULT_RANDOM_STATE,
+    DEFAULT_RETRAIN_MIN_SAMPLES_LEAF,
+    DEFAULT_RETRAIN_N_ESTIMATORS,
     DEFAULT_SERVICE_URL,
     DEFAULT_SUBSAMPLE,
+    DEFAULT_TRAINING_ENGINE,
     DEFAULT_TRANSFORMER_NAME,
+    FEATURE_CACHE_DIR,
+    FEATURE_CACHE_VERSION,
+    FEATURE_MATRIX_DIR,
     FINAL_RATING_COLUMN,
     HTTP_OK,
     IMPUTER_STRATEGY,
+    LISTING_VALIDATION_POLICIES,
+    LISTING_VALIDATION_POLICY,
+    LISTINGS_CACHE_DIR,
+    LISTINGS_CACHE_VERSION,
+    LISTINGS_CHUNK_SIZE,
+    LOG_PARSE_CHUNK_BYTES,
+    LOG_SKETCH_RELATIVE_ACCURACY,
     MAX_MODELS,
+    MIN_CV_FOLDS,
     MIN_PAIRS_FOR_CORRELATION,
+    MIN_RETRAIN_LISTINGS,
     MIN_REVIEWS_KEY,
     MODEL_DIR,
     NULLABLE_INT_COLUMNS,
     NUMERIC_COLUMNS,
     PERCENTAGE_COLUMNS,
     PREDICTED_RATING_COLUMN,
+    PREDICTION_CACHE_MAX_BYTES,
+    PREDICTION_CACHE_TTL,
+    PREDICTION_LOG_BATCH_SIZE,
+    PREDICTION_LOG_COMPRESSION,
     PREDICTION_LOG_DIR,
+    PREDICTION_LOG_FLUSH_INTERVAL,
+    PREDICTION_LOG_MANIFEST_NAME,
+    PREDICTION_LOG_NAME,
+    PREDICTION_LOG_QUEUE_SIZE,
+    PREDICTION_LOG_SEGMENT_DIR,
+    PREDICTION_LOG_SEGMENT_MAX_AGE,
+    PREDICTION_LOG_SEGMENT_MAX_BYTES,
     PRICE_COLUMN,
     RATING_WEIGHT_KEY,
+    RETRAIN_REPORT_NAME,
     REVIEW_SCORES_RATING_COLUMN,
     REVIEWS_AMOUNT_COLUMN,
+    RUN_REPORTS_NAME,
     SERVICE_MODEL_DIR,
+    SWEEP_RESULTS_PATH,
+    TRAINING_ENGINES,
+    VALIDATION_CURVE_NAME,
 )
 
 __all__ = [
     "AMENITIES_COLUMN",
+    "ANALYSIS_CHECKPOINT_VERSION",
+    "ARTIFACT_FORMAT_VERSION",
+    "ARTIFACT_MANIFEST_NAME",
     "BOOLEAN_COLUMNS",
     "CATEGORICAL_COLUMNS",
+    "CHECKPOINT_FINGERPRINT_BYTES",
     "COLUMNS_TO_DROP",
+    "COMPILED_MODEL_MAX_BATCH_SIZE",
+    "COMPILED_MODEL_NAME",
+    "CV_RUN_REPORTS_PATH",
     "DATASET_DIR",
     "DEFAULT_DATASET_NAME",
     "DEFAULT_LEARNING_RATE",
@@ -54,24 +99,55 @@ __all__ = [
     "DEFAULT_MODEL_NAME",
     "DEFAULT_N_ESTIMATORS",
     "DEFAULT_RANDOM_STATE",
+    "DEFAULT_RETRAIN_MIN_SAMPLES_LEAF",
+    "DEFAULT_RETRAIN_N_ESTIMATORS",
     "DEFAULT_SERVICE_URL",
     "DEFAULT_SUBSAMPLE",
+    "DEFAULT_TRAINING_ENGINE",
     "DEFAULT_TRANSFORMER_NAME",
+    "FEATURE_CACHE_DIR",
+    "FEATURE_CACHE_VERSION",
+    "FEATURE_MATRIX_DIR",
     "FINAL_RATING_COLUMN",
     "HTTP_OK",
     "IMPUTER_STRATEGY",
+    "LISTINGS_CACHE_DIR",
+    "LISTINGS_CACHE_VERSION",
+    "LISTINGS_CHUNK_SIZE",
+    "LISTING_VALIDATION_POLICIES",
+    "LISTING_VALIDATION_POLICY",
+    "LOG_PARSE_CHUNK_BYTES",
+    "LOG_SKETCH_RELATIVE_ACCURACY",
     "MAX_MODELS",
+    "MIN_CV_FOLDS",
     "MIN_PAIRS_FOR_CORRELATION",
+    "MIN_RETRAIN_LISTINGS",
     "MIN_REVIEWS_KEY",
     "MODEL_DIR",
     "NULLABLE_INT_COLUMNS",
     "NUMERIC_COLUMNS",
     "PERCENTAGE_COLUMNS",
     "PREDICTED_RATING_COLUMN",
+    "PREDICTION_CACHE_MAX_BYTES",
+    "PREDICTION_CACHE_TTL",
+    "PREDICTION_LOG_BATCH_SIZE",
+    "PREDICTION_LOG_COMPRESSION",
     "PREDICTION_LOG_DIR",
+    "PREDICTION_LOG_FLUSH_INTERVAL",
+    "PREDICTION_LOG_MANIFEST_NAME",
+    "PREDICTION_LOG_NAME",
+    "PREDICTION_LOG_QUEUE_SIZE",
+    "PREDICTION_LOG_SEGMENT_DIR",
+    "PREDICTION_LOG_SEGMENT_MAX_AGE",
+    "PREDICTION_LOG_SEGMENT_MAX_BYTES",
     "PRICE_COLUMN",
     "RATING_WEIGHT_KEY",
+    "RETRAIN_REPORT_NAME",
     "REVIEWS_AMOUNT_COLUMN",
     "REVIEW_SCORES_RATING_COLUMN",
+    "RUN_REPORTS_NAME",
     "SERVICE_MODEL_DIR",
+    "SWEEP_RESULTS_PATH",
+    "TRAINING_ENGINES",
+    "VALIDATION_CURVE_NAME",
 ]
@@ -4,12 +4,30 @@ DATASET_DIR = Path(__file__).parent.parent / "data" / "datasets"
 MODEL_DIR = Path(__file__).parent.parent / "model" / "models"
 SERVICE_MODEL_DIR = Path(__file__).parent.parent / "service" / "models"
 PREDICTION_LOG_DIR = Path(__file__).parent.parent / "service" / "logs"
+LISTINGS_CACHE_DIR = DATASET_DIR / ".cache"
+
+PREDICTION_LOG_NAME = "predictions.log"
+PREDICTION_LOG_SEGMENT_DIR = PREDICTION_LOG_DIR / "segments"
+PREDICTION_LOG_MANIFEST_NAME = "manifest.jsonl"
 
 DEFAULT_DATASET_NAME = "listings.csv"
+LISTINGS_CACHE_VERSION = 2
+LISTINGS_CHUNK_SIZE = 50_000
+FEATURE_MATRIX_DIR = DATASET_DIR / ".features"
+FEATURE_CACHE_DIR = FEATURE_MATRIX_DIR / ".cache"
+FEATURE_CACHE_VERSION = 1
+SWEEP_RESULTS_PATH = MODEL_DIR / "sweep_results.csv"
+CV_RUN_REPORTS_PATH = MODEL_DIR / "cv_run_reports.jsonl"
 
 DEFAULT_MODEL_NAME = "model.pkl"
 DEFAULT_TRANSFORMER_NAME = "transformer.pkl"
 DEFAULT_MODEL_CONFIG_NAME = "model_config.json"
+VALIDATION_CURVE_NAME = "validation_curve.csv"
+RETRAIN_REPORT_NAME = "retrain_report.json"
+RUN_REPORTS_NAME = "run_reports.jsonl"
+COMPILED_MODEL_NAME = "compiled_model.pkl"
+ARTIFACT_MANIFEST_NAME = "manifest.json"
+ARTIFACT_FORMAT_VERSION = 1
 
 DEFAULT_MIN_REVIEWS = 5
 DEFAULT_RANDOM_STATE = 42
@@ -23,6 +41,26 @@ MAX_MODELS = 2
 
 MIN_PAIRS_FOR_CORRELATION = 2
 
+COMPILED_MODEL_MAX_BATCH_SIZE = 150
+
+LISTING_VALIDATION_POLICIES = ("full", "schema-once", "compiled")
+LISTING_VALIDATION_POLICY = "full"
+
+PREDICTION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PREDICTION_CACHE_TTL = 60 * 60
+
+PREDICTION_LOG_QUEUE_SIZE = 100_000
+PREDICTION_LOG_BATCH_SIZE = 1_000
+PREDICTION_LOG_FLUSH_INTERVAL = 1.0
+PREDICTION_LOG_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+PREDICTION_LOG_SEGMENT_MAX_AGE = 60 * 60
+PREDICTION_LOG_COMPRESSION: str | None = "gzip"
+
+LOG_SKETCH_RELATIVE_ACCURACY = 0.005
+ANALYSIS_CHECKPOINT_VERSION = 1
+CHECKPOINT_FINGERPRINT_BYTES = 4096
+LOG_PARSE_CHUNK_BYTES = 16 * 1024 * 1024
+
 DEFAULT_N_ESTIMATORS = 100
 DEFAULT_MAX_DEPTH = None
 DEFAULT_MIN_SAMPLES_SPLIT = 2
@@ -31,6 +69,13 @@ DEFAULT_MAX_FEATURES = "sqrt"
 DEFAULT_LEARNING_RATE = 0.1
 DEFAULT_SUBSAMPLE = 1.0
 
+TRAINING_ENGINES = ("gbr", "hist")
+DEFAULT_TRAINING_ENGINE = "gbr"
+MIN_CV_FOLDS = 2
+DEFAULT_RETRAIN_N_ESTIMATORS = 20
+DEFAULT_RETRAIN_MIN_SAMPLES_LEAF = 50
+MIN_RETRAIN_LISTINGS = 2
+
 MIN_REVIEWS_KEY = "min_reviews"
 RATING_WEIGHT_KEY = "rating_weight"
 
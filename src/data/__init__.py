@@ -1,3 +1,33 @@
-from .data import get_listings, get_listings_without_small_amount_of_reviews
+from .data import (
+    get_listings,
+    get_listings_without_small_amount_of_reviews,
+    iter_listings,
+)
+from .listings_cache import (
+    LISTINGS_CACHE_MODES,
+    clear_listings_cache,
+    get_cached_listings,
+    get_data_set_fingerprint,
+)
+from .prediction_logs import (
+    PredictionLogSegmentWriter,
+    get_logged_listings,
+    iter_log_lines,
+    read_manifest,
+    select_segments,
+)
 
-__all__ = ["get_listings", "get_listings_without_small_amount_of_reviews"]
+__all__ = [
+    "LISTINGS_CACHE_MODES",
+    "PredictionLogSegmentWriter",
+    "clear_listings_cache",
+    "get_cached_listings",
+    "get_data_set_fingerprint",
+    "get_listings",
+    "get_listings_without_small_amount_of_reviews",
+    "get_logged_listings",
+    "iter_listings",
+    "iter_log_lines",
+    "read_manifest",
+    "select_segments",
+]
@@ -1,3 +1,6 @@
+from collections.abc import Iterator
+
+import numpy as np
 import pandas as pd
 from pandera.typing import DataFrame
 
@@ -7,37 +10,100 @@ from constants import (
     DATASET_DIR,
     DEFAULT_DATASET_NAME,
     DEFAULT_MIN_REVIEWS,
+    LISTINGS_CHUNK_SIZE,
     PERCENTAGE_COLUMNS,
     PRICE_COLUMN,
     REVIEW_SCORES_RATING_COLUMN,
     REVIEWS_AMOUNT_COLUMN,
 )
+from instrumentation import record_stage
 from schemas import ListingSchema
 
 from .helpers import (
-    format_boolean,
-    format_percentage,
-    format_price,
+    format_boolean_column,
+    format_percentage_column,
+    format_price_column,
+    format_unique_values,
 )
 
 
+def get_csv_dtypes() -> dict[str, str]:
+    """Maps schema columns to the dtypes they are parsed with.
+
+    Columns cleaned after loading are read as strings. Other boolean columns,
+    such as ``has_availability``, get no dtype, so ``read_csv`` keeps
+    ``t``/``f`` values as strings in an object column, and the coercion of
+    ``ListingSchema`` in ``clean_listings`` converts them to booleans later.
+    """
+    cleaned_columns = {PRICE_COLUMN, *BOOLEAN_COLUMNS, *PERCENTAGE_COLUMNS}
+    dtypes = {}
+
+    for name, column in ListingSchema.to_schema().columns.items():
+        dtype = str(column.dtype)
+        if name in cleaned_columns:
+            dtypes[name] = "string"
+        elif dtype != "boolean":
+            dtypes[name] = dtype
+
+    return dtypes
+
+
+def clean_listings(data: pd.DataFrame) -> DataFrame[ListingSchema]:
+    with record_stage("clean_listings"):
+        data[PRICE_COLUMN] = format_unique_values(
+            data[PRICE_COLUMN], format_price_column
+        )
+
+        for column in BOOLEAN_COLUMNS:
+            data[column] = format_unique_values(data[column], format_boolean_column)
+
+        for column in PERCENTAGE_COLUMNS:
+            data[column] = format_unique_values(data[column], format_percentage_column)
+
+    with record_stage("validate_schema"):
+        return ListingSchema.validate(data)
+
+
 def get_listings(
     data_set_name: str = DEFAULT_DATASET_NAME,
 ) -> DataFrame[ListingSchema]:
-    data_set_path = DATASET_DIR / data_set_name
+    with record_stage("read_csv"):
+        data = pd.read_csv(
+            DATASET_DIR / data_set_name,
+            usecols=lambda column: column not in COLUMNS_TO_DROP,
+            dtype=get_csv_dtypes(),
+        )
+
+    return clean_listings(data)
+
 
-    data = pd.read_csv(data_set_path)
-    data = data.drop(columns=COLUMNS_TO_DROP)
+def iter_listings(
+    data_set_name: str = DEFAULT_DATASET_NAME, chunk_size: int = LISTINGS_CHUNK_SIZE
+) -> Iterator[DataFrame[ListingSchema]]:
+    """Streams the cleaned listings in validated blocks of ``chunk_size`` rows.
 
-    data[PRICE_COLUMN] = data[PRICE_COLUMN].apply(format_price)
+    Ids are checked for uniqueness across blocks as well, against a sorted
+    array of the ids seen so far, so the blocks together pass the same checks
+    as ``get_listings``.
+    """
+    seen_ids = np.empty(0, dtype=np.int64)
 
-    for column in BOOLEAN_COLUMNS:
-        data[column] = data[column].apply(format_boolean)
+    with pd.read_csv(
+        DATASET_DIR / data_set_name,
+        usecols=lambda column: column not in COLUMNS_TO_DROP,
+        dtype=get_csv_dtypes(),
+        chunksize=chunk_size,
+    ) as reader:
+        for data in reader:
+            listings = clean_listings(data)
 
-    for column in PERCENTAGE_COLUMNS:
-        data[column] = data[column].apply(format_percentage)
+            ids = listings["id"].to_numpy(dtype=np.int64)
+            positions = np.searchsorted(seen_ids, ids).clip(max=len(seen_ids) - 1)
+            if len(seen_ids) and (seen_ids[positions] == ids).any():
+                raise ValueError(f"Listing ids in {data_set_name} are not unique.")
+            seen_ids = np.union1d(seen_ids, ids)
 
-    return ListingSchema.validate(data)
+            yield listings
 
 
 def save_listings(listings: DataFrame[ListingSchema], output_path: str) -> None:
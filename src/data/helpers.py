@@ -1,5 +1,6 @@
 import json
 import re
+from collections.abc import Callable
 from typing import Any
 
 import pandas as pd
@@ -15,17 +16,24 @@ def format_price(price_str: str) -> float | None:
         return None
 
 
+BOOLEAN_STRINGS = {
+    "t": True,
+    "true": True,
+    "1": True,
+    "yes": True,
+    "f": False,
+    "false": False,
+    "0": False,
+    "no": False,
+}
+
+
 def format_boolean(value: object) -> bool | None:
     if isinstance(value, bool):
         return value
     if value is None:
         return None
-    formatted = str(value).lower().strip()
-    if formatted in ("t", "true", "1", "yes"):
-        return True
-    if formatted in ("f", "false", "0", "no"):
-        return False
-    return None
+    return BOOLEAN_STRINGS.get(str(value).lower().strip())
 
 
 def format_percentage(percentage_str: Any) -> float | None:
@@ -38,9 +46,69 @@ def format_percentage(percentage_str: Any) -> float | None:
         return None
 
 
+def split_flat_string_list(value: str) -> list[str] | None:
+    """Splits a JSON list of plain strings without decoding it.
+
+    Returns None unless ``value`` is exactly ``["...", "..."]`` with ``", "``
+    separators, no escapes and only printable characters; anything else needs
+    a full JSON decode.
+    """
+    if (
+        not (value.startswith('["') and value.endswith('"]'))
+        or "\\" in value
+        or not value.isprintable()
+    ):
+        return None
+
+    body = value[2:-2]
+    items = body.split('", "')
+    if body.count('"') != 2 * (len(items) - 1):
+        return None
+
+    return items
+
+
+def format_unique_values(
+    values: pd.Series, formatter: Callable[[pd.Series], pd.Series]
+) -> pd.Series:
+    """Applies ``formatter`` to the distinct values of ``values`` only.
+
+    Prices, flags and rates repeat a lot, so cleaning the uniques and taking
+    the results back by code is much cheaper than cleaning every row.
+    """
+    codes, uniques = pd.factorize(values)
+    formatted = formatter(pd.Series(uniques, dtype=values.dtype))
+    return pd.Series(
+        formatted.array.take(codes, allow_fill=True),
+        index=values.index,
+        name=values.name,
+    )
+
+
+def format_price_column(prices: pd.Series) -> pd.Series:
+    digits = prices.astype("string").str.replace(r"[^\d.]", "", regex=True)
+    return pd.to_numeric(digits, errors="coerce").astype("float64")
+
+
+def format_boolean_column(values: pd.Series) -> pd.Series:
+    formatted = values.astype("string").str.lower().str.strip()
+    return formatted.map(BOOLEAN_STRINGS).astype("boolean")
+
+
+def format_percentage_column(percentages: pd.Series) -> pd.Series:
+    formatted = (
+        percentages.astype("string").str.replace("%", "", regex=False).str.strip()
+    )
+    return pd.to_numeric(formatted, errors="coerce").astype("float64")
+
+
 def parse_amenities(amenities_str: str) -> list[str]:
     if pd.isna(amenities_str) or amenities_str == "":
         return []
+    if isinstance(amenities_str, str):
+        items = split_flat_string_list(amenities_str)
+        if items is not None:
+            return [item.strip() for item in items if item]
     try:
         amenities_list = json.loads(amenities_str)
         return [str(item).strip() for item in amenities_list if item]
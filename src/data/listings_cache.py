@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+
+from constants import (
+    DATASET_DIR,
+    DEFAULT_DATASET_NAME,
+    LISTINGS_CACHE_DIR,
+    LISTINGS_CACHE_VERSION,
+)
+from instrumentation import record_stage
+from schemas import ListingSchema
+
+from .data import get_listings
+
+LISTINGS_CACHE_MODES = ("use", "rebuild", "clear", "off")
+
+BOOLEAN_NA = -1
+
+
+def get_file_hash(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def get_check_description(checks: list[Any]) -> list[tuple[str, dict[str, Any]]]:
+    return [(check.name, check.statistics) for check in checks]
+
+
+def get_schema_hash() -> str:
+    """Fingerprints the schema the cached frames were validated against.
+
+    Besides the column names and dtypes it covers everything validation acts
+    on: nullability, uniqueness, coercion and checks of every column, and the
+    schema-level checks and options.
+    """
+    schema = ListingSchema.to_schema()
+    description = {
+        "columns": [
+            {
+                "name": name,
+                "dtype": str(column.dtype),
+                "nullable": column.nullable,
+                "unique": column.unique,
+                "coerce": column.coerce,
+                "required": column.required,
+                "checks": get_check_description(column.checks),
+            }
+            for name, column in schema.columns.items()
+        ],
+        "checks": get_check_description(schema.checks),
+        "coerce": schema.coerce,
+        "strict": schema.strict,
+        "unique": schema.unique,
+    }
+    return hashlib.sha256(json.dumps(description, default=str).encode()).hexdigest()
+
+
+def get_metadata_path(data_set_name: str, cache_dir: Path) -> Path:
+    return cache_dir / f"{data_set_name}.json"
+
+
+def read_metadata(metadata_path: Path) -> dict[str, Any] | None:
+    if not metadata_path.exists():
+        return None
+
+    with metadata_path.open(encoding="utf-8") as f:
+        metadata: dict[str, Any] = json.load(f)
+
+    if (
+        metadata.get("version") != LISTINGS_CACHE_VERSION
+        or metadata.get("schema") != get_schema_hash()
+    ):
+        return None
+
+    return metadata
+
+
+def write_metadata(metadata_path: Path, metadata: dict[str, Any]) -> None:
+    temporary_path = metadata_path.with_name(f".{metadata_path.name}.tmp")
+
+    with temporary_path.open("w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+
+    temporary_path.replace(metadata_path)
+
+
+def write_columns(entry_dir: Path, listings: pd.DataFrame) -> None:
+    """Stores every column of ``listings`` as ``.npy`` arrays in ``entry_dir``.
+
+    Numeric columns are saved as they are, nullable booleans as int8 with
+    ``BOOLEAN_NA`` for missing values and strings as int32 codes with the
+    distinct values in a JSON file next to them.
+    """
+    entry_dir.mkdir(parents=True)
+    columns = []
+
+    for position, (name, values) in enumerate(listings.items()):
+        dtype = values.dtype
+        file_name = f"{position:03d}"
+
+        if isinstance(dtype, pd.StringDtype):
+            kind = "string"
+            codes, uniques = pd.factorize(values)
+            np.save(entry_dir / f"{file_name}.npy", codes.astype(np.int32))
+            with (entry_dir / f"{file_name}.json").open("w", encoding="utf-8") as f:
+                json.dump(uniques.tolist(), f)
+        elif isinstance(dtype, pd.BooleanDtype):
+            kind = "boolean"
+            flags = values.astype("Int8").fillna(BOOLEAN_NA).to_numpy(np.int8)
+            np.save(entry_dir / f"{file_name}.npy", flags)
+        else:
+            kind = "numpy"
+            np.save(entry_dir / f"{file_name}.npy", values.to_numpy())
+
+        columns.append(
+            {"name": name, "file": file_name, "kind": kind, "dtype": str(dtype)}
+        )
+
+    with (entry_dir / "columns.json").open("w", encoding="utf-8") as f:
+        json.dump(columns, f)
+
+
+def read_columns(entry_dir: Path) -> pd.DataFrame:
+    """Loads a frame written by ``write_columns``.
+
+    Numeric columns are memory-mapped copy-on-write, so pages are read lazily
+    and writes never reach the cache files.
+    """
+    with (entry_dir / "columns.json").open(encoding="utf-8") as f:
+        columns = json.load(f)
+
+    data: dict[str, Any] = {}
+    for column in columns:
+        path = entry_dir / f"{column['file']}.npy"
+
+        if column["kind"] == "string":
+            with (entry_dir / f"{column['file']}.json").open(encoding="utf-8") as f:
+                uniques = pd.array(json.load(f), dtype=column["dtype"])
+            data[column["name"]] = uniques.take(np.load(path), allow_fill=True)
+        elif column["kind"] == "boolean":
+            flags = np.load(path)
+            data[column["name"]] = pd.arrays.BooleanArray(
+                flags == 1, flags == BOOLEAN_NA
+            )
+        else:
+            data[column["name"]] = np.load(path, mmap_mode="c").view(np.ndarray)
+
+    return pd.DataFrame(data, copy=False)
+
+
+def clear_listings_cache(
+    data_set_name: str = DEFAULT_DATASET_NAME, cache_dir: Path = LISTINGS_CACHE_DIR
+) -> None:
+    get_metadata_path(data_set_name, cache_dir).unlink(missing_ok=True)
+    for entry_dir in cache_dir.glob(f"{data_set_name}-*"):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+def build_listings_cache(
+    data_set_name: str = DEFAULT_DATASET_NAME, cache_dir: Path = LISTINGS_CACHE_DIR
+) -> DataFrame[ListingSchema]:
+    data_set_path = DATASET_DIR / data_set_name
+    file_stat = data_set_path.stat()
+    file_hash = get_file_hash(data_set_path)
+
+    listings = get_listings(data_set_name)
+
+    clear_listings_cache(data_set_name, cache_dir)
+    entry_name = f"{data_set_name}-{file_hash[:16]}"
+    temporary_dir = cache_dir / f".{entry_name}.{os.getpid()}.tmp"
+    with record_stage("write_listings_cache"):
+        write_columns(temporary_dir, listings)
+    try:
+        temporary_dir.replace(cache_dir / entry_name)
+    except OSError:
+        shutil.rmtree(temporary_dir, ignore_errors=True)
+    write_metadata(
+        get_metadata_path(data_set_name, cache_dir),
+        {
+            "version": LISTINGS_CACHE_VERSION,
+            "schema": get_schema_hash(),
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "sha256": file_hash,
+            "entry": entry_name,
+        },
+    )
+
+    return listings
+
+
+def get_valid_entry_dir(data_set_name: str, cache_dir: Path) -> Path | None:
+    """Returns the cache entry of ``data_set_name`` if it is still current.
+
+    The entry is current while the CSV keeps its size and modification time,
+    or its SHA-256 when only the modification time changed, and it was written
+    by the same ``LISTINGS_CACHE_VERSION`` against the same schema.
+    """
+    metadata_path = get_metadata_path(data_set_name, cache_dir)
+    metadata = read_metadata(metadata_path)
+    if metadata is None:
+        return None
+
+    entry_dir: Path = cache_dir / metadata["entry"]
+    file_stat = (DATASET_DIR / data_set_name).stat()
+    if not entry_dir.exists() or file_stat.st_size != metadata["size"]:
+        return None
+
+    if file_stat.st_mtime_ns != metadata["mtime_ns"]:
+        if get_file_hash(DATASET_DIR / data_set_name) != metadata["sha256"]:
+            return None
+        write_metadata(metadata_path, {**metadata, "mtime_ns": file_stat.st_mtime_ns})
+
+    return entry_dir
+
+
+def get_data_set_fingerprint(
+    data_set_name: str = DEFAULT_DATASET_NAME, cache_dir: Path = LISTINGS_CACHE_DIR
+) -> dict[str, Any]:
+    """Identifies the contents of the ``data_set_name`` CSV.
+
+    The SHA-256 recorded by the listings cache is reused while the CSV keeps
+    its size and modification time, so the file is only hashed after a change.
+    """
+    data_set_path = DATASET_DIR / data_set_name
+    file_stat = data_set_path.stat()
+
+    metadata = read_metadata(get_metadata_path(data_set_name, cache_dir))
+    if (
+        metadata is not None
+        and metadata["size"] == file_stat.st_size
+        and metadata["mtime_ns"] == file_stat.st_mtime_ns
+    ):
+        file_hash = metadata["sha256"]
+    else:
+        file_hash = get_file_hash(data_set_path)
+
+    return {
+        "data_set": data_set_name,
+        "data_set_bytes": file_stat.st_size,
+        "data_set_sha256": file_hash,
+    }
+
+
+def get_cached_listings(
+    data_set_name: str = DEFAULT_DATASET_NAME,
+    mode: str = "use",
+    cache_dir: Path = LISTINGS_CACHE_DIR,
+) -> DataFrame[ListingSchema]:
+    """Returns the cleaned and validated listings, reusing the on-disk cache.
+
+    ``mode`` is one of ``LISTINGS_CACHE_MODES``: ``use`` loads the cache and
+    builds it when it is missing or stale, ``rebuild`` reparses the CSV and
+    rewrites it, ``clear`` deletes it and ``off`` bypasses it.
+    """
+    if mode not in LISTINGS_CACHE_MODES:
+        raise ValueError(f"Unsupported listings cache mode: {mode}.")
+
+    if mode in ("clear", "off"):
+        if mode == "clear":
+            clear_listings_cache(data_set_name, cache_dir)
+        return get_listings(data_set_name)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    entry_dir = get_valid_entry_dir(data_set_name, cache_dir) if mode == "use" else None
+    if entry_dir is None:
+        return build_listings_cache(data_set_name, cache_dir)
+
+    with record_stage("read_listings_cache"):
+        listings = read_columns(entry_dir)
+    return cast("DataFrame[ListingSchema]", listings)
@@ -0,0 +1,270 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import shutil
+import socket
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+import pandas as pd
+from pandera.typing import DataFrame
+
+from constants import (
+    NULLABLE_INT_COLUMNS,
+    PREDICTION_LOG_COMPRESSION,
+    PREDICTION_LOG_MANIFEST_NAME,
+    PREDICTION_LOG_SEGMENT_DIR,
+    PREDICTION_LOG_SEGMENT_MAX_AGE,
+    PREDICTION_LOG_SEGMENT_MAX_BYTES,
+)
+from schemas import ListingSchema
+
+SEGMENT_PREFIX = "predictions-"
+SEGMENT_SUFFIX = ".log"
+
+COMPRESSION_CODECS: dict[str, tuple[Any, str]] = {
+    "gzip": (gzip, ".gz"),
+    "bz2": (bz2, ".bz2"),
+    "lzma": (lzma, ".xz"),
+}
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class PredictionLogSegmentWriter:
+    def __init__(
+        self,
+        log_dir: Path = PREDICTION_LOG_SEGMENT_DIR,
+        worker_id: str | None = None,
+        max_bytes: int = PREDICTION_LOG_SEGMENT_MAX_BYTES,
+        max_age: float = PREDICTION_LOG_SEGMENT_MAX_AGE,
+        compression: str | None = PREDICTION_LOG_COMPRESSION,
+    ) -> None:
+        if compression is not None and compression not in COMPRESSION_CODECS:
+            raise ValueError(f"Unsupported compression: {compression}.")
+
+        self.log_dir = log_dir
+        self.worker_id = worker_id or get_worker_id()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+
+        self._file: IO[str] | None = None
+        self._path: Path | None = None
+        self._compression: str | None = None
+        self._opened_at = 0.0
+        self._bytes = 0
+        self._records = 0
+        self._start: str | None = None
+        self._end: str | None = None
+        self._models: set[str] = set()
+
+    def write(self, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+
+        lines = "".join(
+            json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries
+        )
+
+        segment = self._get_segment()
+        segment.write(lines)
+        segment.flush()
+
+        self._bytes += len(lines.encode("utf-8"))
+        self._records += len(entries)
+        for entry in entries:
+            timestamp = entry["timestamp"]
+            if self._start is None or timestamp < self._start:
+                self._start = timestamp
+            if self._end is None or timestamp > self._end:
+                self._end = timestamp
+            self._models.add(entry["model_name"])
+
+    def rotate_if_needed(self) -> None:
+        if self._file is None:
+            return
+
+        if (
+            self._bytes >= self.max_bytes
+            or time.monotonic() - self._opened_at >= self.max_age
+        ):
+            self.seal()
+
+    def seal(self) -> None:
+        """Closes the open segment, compresses it and adds it to the manifest.
+
+        The segment is only forgotten once its manifest entry is written, so a
+        failed seal is retried by the next ``seal`` or ``write`` instead of
+        leaving an unlisted segment. A segment that cannot be compressed is
+        listed uncompressed.
+        """
+        if self._path is None:
+            return
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self.compression is not None:
+                self._compress_segment(self._path, self.compression)
+
+        append_manifest_entry(
+            self.log_dir,
+            {
+                "segment": self._path.name,
+                "worker_id": self.worker_id,
+                "records": self._records,
+                "bytes": self._bytes,
+                "start": self._start,
+                "end": self._end,
+                "models": sorted(self._models),
+                "compression": self._compression,
+            },
+        )
+        self._path = None
+
+    def _compress_segment(self, path: Path, compression: str) -> None:
+        codec, extension = COMPRESSION_CODECS[compression]
+        compressed_path = path.with_name(path.name + extension)
+        temporary_path = path.with_name(f".{compressed_path.name}.tmp")
+        try:
+            with path.open("rb") as source, codec.open(temporary_path, "wb") as target:
+                shutil.copyfileobj(source, target)
+            temporary_path.replace(compressed_path)
+        except (OSError, lzma.LZMAError):
+            temporary_path.unlink(missing_ok=True)
+            return
+
+        self._path = compressed_path
+        self._compression = compression
+        path.unlink()
+
+    def _get_segment(self) -> IO[str]:
+        if self._file is not None:
+            return self._file
+
+        self.seal()
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        created_at = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        path = (
+            self.log_dir
+            / f"{SEGMENT_PREFIX}{self.worker_id}-{created_at}{SEGMENT_SUFFIX}"
+        )
+        self._file = path.open("a", encoding="utf-8")
+        self._path = path
+        self._compression = None
+        self._opened_at = time.monotonic()
+        self._bytes = 0
+        self._records = 0
+        self._start = None
+        self._end = None
+        self._models = set()
+
+        return self._file
+
+
+def append_manifest_entry(log_dir: Path, entry: dict[str, Any]) -> None:
+    line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+    descriptor = os.open(
+        log_dir / PREDICTION_LOG_MANIFEST_NAME,
+        os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+        0o644,
+    )
+    try:
+        os.write(descriptor, line)
+    finally:
+        os.close(descriptor)
+
+
+def read_manifest(log_dir: Path = PREDICTION_LOG_SEGMENT_DIR) -> list[dict[str, Any]]:
+    manifest_path = log_dir / PREDICTION_LOG_MANIFEST_NAME
+    if not manifest_path.exists():
+        return []
+
+    with manifest_path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def select_segments(
+    log_dir: Path = PREDICTION_LOG_SEGMENT_DIR,
+    model_names: list[str] | None = None,
+    start: str | None = None,
+    end: str | None = None,
+) -> list[Path]:
+    if not log_dir.exists():
+        return []
+
+    sealed = {entry["segment"]: entry for entry in read_manifest(log_dir)}
+    selected = []
+
+    paths = sorted(log_dir.glob(f"{SEGMENT_PREFIX}*"))
+    names = {path.name for path in paths}
+
+    for path in paths:
+        if path.name.endswith(SEGMENT_SUFFIX) and any(
+            path.name + extension in names
+            for _, extension in COMPRESSION_CODECS.values()
+        ):
+            continue
+
+        entry = sealed.get(path.name)
+        if entry is not None and (
+            (model_names is not None and not set(model_names) & set(entry["models"]))
+            or (start is not None and entry["end"] is not None and entry["end"] < start)
+            or (end is not None and entry["start"] is not None and entry["start"] > end)
+        ):
+            continue
+        selected.append(path)
+
+    return selected
+
+
+def open_segment(path: Path) -> IO[str]:
+    for codec, extension in COMPRESSION_CODECS.values():
+        if path.name.endswith(extension):
+            segment: IO[str] = codec.open(path, "rt", encoding="utf-8")
+            return segment
+    return path.open("r", encoding="utf-8")
+
+
+def iter_log_lines(paths: list[Path]) -> Iterator[str]:
+    for path in paths:
+        with open_segment(path) as f:
+            yield from f
+
+
+def get_logged_listings(paths: list[Path]) -> DataFrame[ListingSchema]:
+    """Returns the latest logged input of every listing in the log files.
+
+    Requests carry the listings as clients currently see them, so listings
+    whose reviews grew since the dataset was exported show up with their new
+    review count and rating. Lines that are not valid JSON, such as a partly
+    written last line of an open segment, are skipped.
+    """
+    latest: dict[Any, dict[str, Any]] = {}
+    for line in iter_log_lines(paths):
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+        current = latest.get(entry["listing_id"])
+        if current is None or entry["timestamp"] >= current["timestamp"]:
+            latest[entry["listing_id"]] = entry
+
+    listings = pd.DataFrame(
+        [entry["input_data"] for entry in latest.values()],
+        columns=list(ListingSchema.to_schema().columns),
+    )
+    for column in NULLABLE_INT_COLUMNS:
+        listings[column] = listings[column].astype("Float64")
+
+    return ListingSchema.validate(listings)
@@ -0,0 +1,17 @@
+from .stages import (
+    StageRecorder,
+    StageStatistics,
+    append_run_report,
+    get_run_report,
+    record_stage,
+    recording,
+)
+
+__all__ = [
+    "StageRecorder",
+    "StageStatistics",
+    "append_run_report",
+    "get_run_report",
+    "record_stage",
+    "recording",
+]
@@ -0,0 +1,161 @@
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+
+@dataclass
+class StageStatistics:
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_memory_bytes: int | None = None
+
+
+class StageRecorder:
+    """Accumulates the wall time, CPU time and memory peak of nested stages.
+
+    Stages are aggregated by their path, the names of the enclosing stages
+    joined with ``/``, in the order they were first entered, so repeated calls
+    such as one ``prepare_data`` per split add up under one entry. CPU time is
+    the process time of all threads. With ``trace_memory`` the peak is the
+    highest tracemalloc traced size while the stage ran, minus the traced size
+    at its start.
+    """
+
+    def __init__(self, *, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.statistics: dict[str, StageStatistics] = {}
+        self._path: list[str] = []
+        self._peaks: list[int] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start_memory = 0
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            start_memory = current
+
+        self._path.append(name)
+        self._peaks.append(start_memory)
+        statistics = self.statistics.setdefault("/".join(self._path), StageStatistics())
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start_wall
+            cpu_seconds = time.process_time() - start_cpu
+            self._path.pop()
+            peak = self._peaks.pop()
+
+            statistics.calls += 1
+            statistics.wall_seconds += wall_seconds
+            statistics.cpu_seconds += cpu_seconds
+
+            if self.trace_memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                tracemalloc.reset_peak()
+                statistics.peak_memory_bytes = max(
+                    statistics.peak_memory_bytes or 0, peak - start_memory
+                )
+
+    def get_stages(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "stage": path,
+                "calls": statistics.calls,
+                "wall_seconds": statistics.wall_seconds,
+                "cpu_seconds": statistics.cpu_seconds,
+                "peak_memory_bytes": statistics.peak_memory_bytes,
+            }
+            for path, statistics in self.statistics.items()
+        ]
+
+
+_active_recorder: ContextVar[StageRecorder | None] = ContextVar(
+    "active_recorder", default=None
+)
+
+
+@contextmanager
+def record_stage(name: str) -> Iterator[None]:
+    """Records ``name`` in the active recorder, and does nothing without one."""
+    recorder = _active_recorder.get()
+    if recorder is None:
+        yield
+        return
+
+    with recorder.stage(name):
+        yield
+
+
+@contextmanager
+def recording(name: str, *, trace_memory: bool = True) -> Iterator[StageRecorder]:
+    """Activates a recorder whose root stage ``name`` spans the block.
+
+    tracemalloc is started for the block unless it is already tracing. It
+    slows down Python allocations, so ``trace_memory=False`` gives timings
+    closer to an uninstrumented run.
+    """
+    recorder = StageRecorder(trace_memory=trace_memory)
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+
+    token = _active_recorder.set(recorder)
+    try:
+        with recorder.stage(name):
+            yield recorder
+    finally:
+        _active_recorder.reset(token)
+        if start_tracing:
+            tracemalloc.stop()
+
+
+def get_run_report(
+    recorder: StageRecorder,
+    *,
+    command: str,
+    argv: list[str],
+    metrics: dict[str, float],
+) -> dict[str, Any]:
+    return {
+        "command": command,
+        "finished_at": datetime.now().isoformat(),
+        "argv": argv,
+        "metrics": {name: float(value) for name, value in metrics.items()},
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "cpus": os.cpu_count(),
+        },
+        "trace_memory": recorder.trace_memory,
+        "stages": recorder.get_stages(),
+    }
+
+
+def append_run_report(path: Path, report: dict[str, Any]) -> None:
+    """Appends ``report`` as one JSON line, so each file keeps every run."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(report, default=str) + "\n")
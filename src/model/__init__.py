@@ -1,17 +1,56 @@
+from .artifacts import ArtifactBundle, load_artifact_bundle, save_artifact_bundle
+from .cache import PredictionCache
+from .chunked import prepare_data_in_chunks, train_model_in_chunks
+from .compiled import (
+    CompiledGradientBoosting,
+    PreprocessingPlan,
+    compile_model,
+    compile_transformer,
+)
+from .cv import cross_validate_model
+from .feature_cache import (
+    FEATURE_CACHE_MODES,
+    clear_feature_cache,
+    get_cached_feature_matrices,
+)
+from .incremental import get_next_model_version, retrain_model
 from .predict import (
     calculate_bayesian_rating,
+    calculate_final_ratings,
     load_model,
     predict,
     predict_ratings,
+    sort_by_ratings,
 )
 from .preprocessing import prepare_data
+from .sweep import get_sweep_configs, run_sweep
 from .train import train_model
 
 __all__ = [
+    "FEATURE_CACHE_MODES",
+    "ArtifactBundle",
+    "CompiledGradientBoosting",
+    "PredictionCache",
+    "PreprocessingPlan",
     "calculate_bayesian_rating",
+    "calculate_final_ratings",
+    "clear_feature_cache",
+    "compile_model",
+    "compile_transformer",
+    "cross_validate_model",
+    "get_cached_feature_matrices",
+    "get_next_model_version",
+    "get_sweep_configs",
+    "load_artifact_bundle",
     "load_model",
     "predict",
     "predict_ratings",
     "prepare_data",
+    "prepare_data_in_chunks",
+    "retrain_model",
+    "run_sweep",
+    "save_artifact_bundle",
+    "sort_by_ratings",
     "train_model",
+    "train_model_in_chunks",
 ]
@@ -0,0 +1,238 @@
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import joblib
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
+
+from constants import (
+    ARTIFACT_FORMAT_VERSION,
+    ARTIFACT_MANIFEST_NAME,
+    COMPILED_MODEL_NAME,
+    DEFAULT_MODEL_CONFIG_NAME,
+    DEFAULT_MODEL_NAME,
+    DEFAULT_TRANSFORMER_NAME,
+)
+from data.listings_cache import get_file_hash
+
+from .compiled import CompiledGradientBoosting, compile_model
+
+ARTIFACT_FILE_NAMES = (
+    DEFAULT_MODEL_NAME,
+    DEFAULT_TRANSFORMER_NAME,
+    DEFAULT_MODEL_CONFIG_NAME,
+    COMPILED_MODEL_NAME,
+)
+
+
+class LazyModel:
+    """Stands in for the pickled model at ``path`` until it is first used.
+
+    A compiled model only needs its fallback for large batches, so service
+    workers that never get one skip unpickling the sklearn trees.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        with self._lock:
+            if self._model is None:
+                self._model = joblib.load(self.path, mmap_mode="r")
+            return self._model
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+@dataclass
+class ArtifactBundle:
+    model: Any
+    transformer: ColumnTransformer
+    config: dict[str, Any]
+    compiled_model: CompiledGradientBoosting | None = None
+
+
+def get_compiled_model(model: Any) -> CompiledGradientBoosting | None:
+    if not isinstance(model, GradientBoostingRegressor):
+        return None
+
+    try:
+        compiled_model = compile_model(model)
+    except (TypeError, ValueError):
+        return None
+
+    compiled_model.fallback_model = None
+    return compiled_model
+
+
+def write_artifact_manifest(model_folder: Path) -> dict[str, Any]:
+    files = {}
+    for file_name in ARTIFACT_FILE_NAMES:
+        path = model_folder / file_name
+        if path.exists():
+            file_stat = path.stat()
+            files[file_name] = {
+                "bytes": file_stat.st_size,
+                "mtime_ns": file_stat.st_mtime_ns,
+                "sha256": get_file_hash(path),
+            }
+
+    manifest = {
+        "format": ARTIFACT_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "files": files,
+    }
+
+    temporary_path = model_folder / f".{ARTIFACT_MANIFEST_NAME}.tmp"
+    with temporary_path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    temporary_path.replace(model_folder / ARTIFACT_MANIFEST_NAME)
+
+    return manifest
+
+
+def save_artifact_bundle(
+    model_folder: Path,
+    model: Any,
+    transformer: ColumnTransformer,
+    config: dict[str, Any],
+) -> None:
+    """Writes the model artifacts and a manifest of their checksums.
+
+    ``joblib.dump`` without compression stores every numeric array as a raw
+    aligned buffer, so ``load_artifact_bundle`` can memory-map them. Trees of
+    a ``GradientBoostingRegressor`` are copied into private memory when they
+    are unpickled, so the flat node arrays of its compiled form are saved as
+    ``COMPILED_MODEL_NAME`` too. The manifest is removed first and written
+    last, so an interrupted save never leaves a manifest for partial files.
+    """
+    model_folder.mkdir(parents=True, exist_ok=True)
+    (model_folder / ARTIFACT_MANIFEST_NAME).unlink(missing_ok=True)
+
+    joblib.dump(model, model_folder / DEFAULT_MODEL_NAME)
+    joblib.dump(transformer, model_folder / DEFAULT_TRANSFORMER_NAME)
+
+    with (model_folder / DEFAULT_MODEL_CONFIG_NAME).open("w") as f:
+        json.dump(config, f)
+
+    add_compiled_model(model_folder, model)
+
+
+def add_compiled_model(model_folder: Path, model: Any) -> None:
+    """Saves the compiled form of ``model`` and rewrites the manifest.
+
+    Turns a folder holding only the pickles and config into a bundle.
+    """
+    compiled_path = model_folder / COMPILED_MODEL_NAME
+    compiled_model = get_compiled_model(model)
+    if compiled_model is None:
+        compiled_path.unlink(missing_ok=True)
+    else:
+        joblib.dump(compiled_model, compiled_path)
+
+    write_artifact_manifest(model_folder)
+
+
+def convert_to_artifact_bundle(model_folder: Path) -> None:
+    """Adds the compiled model and manifest to a folder of plain artifacts."""
+    add_compiled_model(model_folder, joblib.load(model_folder / DEFAULT_MODEL_NAME))
+
+
+def matches_manifest_entry(path: Path, entry: dict[str, Any]) -> bool:
+    """Checks ``path`` against its manifest entry.
+
+    Files whose size and mtime are unchanged since the manifest was written
+    are trusted without reading them, so only copied or rewritten files are
+    hashed.
+    """
+    if not path.exists():
+        return False
+
+    file_stat = path.stat()
+    if file_stat.st_size != entry["bytes"]:
+        return False
+    if file_stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+    return bool(get_file_hash(path) == entry["sha256"])
+
+
+def read_artifact_manifest(
+    model_folder: Path, *, verify: bool = True
+) -> dict[str, Any] | None:
+    """Returns the manifest of ``model_folder``, or ``None`` for plain folders.
+
+    With ``verify`` every listed file is checked by ``matches_manifest_entry``.
+    """
+    manifest_path = model_folder / ARTIFACT_MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+
+    with manifest_path.open(encoding="utf-8") as f:
+        manifest: dict[str, Any] = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported artifact format {manifest.get('format')} "
+            f"in {model_folder.name}."
+        )
+
+    if verify:
+        for file_name, entry in manifest["files"].items():
+            if not matches_manifest_entry(model_folder / file_name, entry):
+                raise ValueError(
+                    f"Artifact {file_name} of {model_folder.name} does not match "
+                    "its manifest."
+                )
+
+    return manifest
+
+
+def load_artifact_bundle(
+    model_folder: Path, *, verify: bool = True, lazy_model: bool = False
+) -> ArtifactBundle:
+    """Loads the artifacts of ``model_folder``.
+
+    Folders with a manifest are verified and their pickles memory-mapped
+    read-only, so processes loading the same bundle share its arrays through
+    the page cache. The compiled model, when saved, gets the sklearn model as
+    its fallback, which ``lazy_model`` defers to the first large batch as a
+    ``LazyModel``. Folders without a manifest are unpickled into memory.
+    """
+    manifest = read_artifact_manifest(model_folder, verify=verify)
+    mmap_mode = None if manifest is None else "r"
+    model_path = model_folder / DEFAULT_MODEL_NAME
+
+    compiled_model = None
+    if manifest is not None and COMPILED_MODEL_NAME in manifest["files"]:
+        compiled_model = joblib.load(model_folder / COMPILED_MODEL_NAME, mmap_mode="r")
+
+    if compiled_model is not None and lazy_model:
+        model = LazyModel(model_path)
+    else:
+        model = joblib.load(model_path, mmap_mode=mmap_mode)
+
+    if compiled_model is not None:
+        compiled_model.fallback_model = model
+
+    transformer = joblib.load(
+        model_folder / DEFAULT_TRANSFORMER_NAME, mmap_mode=mmap_mode
+    )
+
+    with (model_folder / DEFAULT_MODEL_CONFIG_NAME).open() as f:
+        config = json.load(f)
+
+    return ArtifactBundle(
+        model=model,
+        transformer=transformer,
+        config=config,
+        compiled_model=compiled_model,
+    )
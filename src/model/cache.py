@@ -0,0 +1,147 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+
+from constants import PREDICTION_CACHE_MAX_BYTES, PREDICTION_CACHE_TTL
+
+from .compiled import PreprocessingPlan
+
+LISTING_HASH_KEYS = ("listing-hash-k01", "listing-hash-k02")
+ORDERED_DICT_ENTRY_BYTES = 104
+
+ListingKey = tuple[int, int]
+
+
+def get_input_columns(transformer: ColumnTransformer | PreprocessingPlan) -> list[str]:
+    if isinstance(transformer, PreprocessingPlan):
+        return transformer.input_columns
+
+    columns: list[str] = []
+    for _, step, step_columns in transformer.transformers_:
+        if step != "drop":
+            columns.extend(step_columns)
+    return columns
+
+
+def get_listing_keys(listings: pd.DataFrame, columns: list[str]) -> list[ListingKey]:
+    """Content-addresses listings by a 128-bit hash of their feature fields."""
+    features = listings[columns]
+    first, second = (
+        pd.util.hash_pandas_object(features, index=False, hash_key=hash_key)
+        for hash_key in LISTING_HASH_KEYS
+    )
+    return list(zip(first.tolist(), second.tolist(), strict=True))
+
+
+def get_entry_size(entry_key: tuple[str, ListingKey], rating: float) -> int:
+    _, (first, second) = entry_key
+    return (
+        sys.getsizeof(entry_key)
+        + sys.getsizeof(entry_key[1])
+        + sys.getsizeof(first)
+        + sys.getsizeof(second)
+        + sys.getsizeof((rating, 0.0, 0))
+        + 2 * sys.getsizeof(rating)
+        + ORDERED_DICT_ENTRY_BYTES
+    )
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of predicted ratings with a TTL and a byte budget.
+
+    Entries are keyed by (namespace, listing key), where the namespace
+    identifies the model and the version of its artifacts. Entry sizes are
+    estimated from the Python objects stored, including the ordered dict
+    overhead.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PREDICTION_CACHE_MAX_BYTES,
+        ttl: float = PREDICTION_CACHE_TTL,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, ListingKey], tuple[float, float, int]] = (
+            OrderedDict()
+        )
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_many(self, namespace: str, keys: list[ListingKey]) -> list[float | None]:
+        now = time.monotonic()
+        ratings: list[float | None] = []
+
+        with self._lock:
+            for key in keys:
+                entry_key = (namespace, key)
+                entry = self._entries.get(entry_key)
+                if entry is not None and entry[1] <= now:
+                    self._remove(entry_key)
+                    self.expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self.misses += 1
+                    ratings.append(None)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(entry_key)
+                    ratings.append(entry[0])
+
+        return ratings
+
+    def put_many(
+        self, namespace: str, keys: list[ListingKey], ratings: list[float]
+    ) -> None:
+        expires_at = time.monotonic() + self.ttl
+
+        with self._lock:
+            for key, rating in zip(keys, ratings, strict=True):
+                entry_key = (namespace, key)
+                if entry_key in self._entries:
+                    self._remove(entry_key)
+
+                size = get_entry_size(entry_key, rating)
+                if size > self.max_bytes:
+                    continue
+
+                self._entries[entry_key] = (rating, expires_at, size)
+                self.size_bytes += size
+
+            while self.size_bytes > self.max_bytes:
+                entry_key = next(iter(self._entries))
+                self._remove(entry_key)
+                self.evictions += 1
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            for entry_key in [key for key in self._entries if key[0] == namespace]:
+                self._remove(entry_key)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, entry_key: tuple[str, ListingKey]) -> None:
+        _, _, size = self._entries.pop(entry_key)
+        self.size_bytes -= size
@@ -0,0 +1,294 @@
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+from typing import cast
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+from sklearn.compose import ColumnTransformer
+
+from constants import (
+    AMENITIES_COLUMN,
+    CATEGORICAL_COLUMNS,
+    DEFAULT_DATASET_NAME,
+    DEFAULT_LEARNING_RATE,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_MAX_FEATURES,
+    DEFAULT_MIN_REVIEWS,
+    DEFAULT_MIN_SAMPLES_LEAF,
+    DEFAULT_MIN_SAMPLES_SPLIT,
+    DEFAULT_MODEL_NAME,
+    DEFAULT_N_ESTIMATORS,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_SUBSAMPLE,
+    DEFAULT_TRAINING_ENGINE,
+    FEATURE_MATRIX_DIR,
+    LISTINGS_CHUNK_SIZE,
+    NUMERIC_COLUMNS,
+    REVIEW_SCORES_RATING_COLUMN,
+)
+from data import get_listings_without_small_amount_of_reviews, iter_listings
+from data.helpers import parse_amenities
+from schemas import ListingSchema
+
+from .features import (
+    FeatureMatrices,
+    get_training_transformer,
+    load_feature_matrices,
+    split_data,
+)
+from .preprocessing import prepare_data
+from .train import Regressor, fit_model
+
+SPLITS = ("train", "validation", "test")
+
+
+class ColumnMoments:
+    """Streaming count, mean and M2 of the non-missing values of each column."""
+
+    def __init__(self, width: int) -> None:
+        self.rows = 0
+        self.count = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def update(self, values: np.ndarray) -> None:
+        present = ~np.isnan(values)
+        count = present.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(present, values, 0.0).sum(axis=0) / count
+            mean = np.nan_to_num(mean)
+            m2 = np.where(present, (values - mean) ** 2, 0.0).sum(axis=0)
+
+            total = self.count + count
+            delta = mean - self.mean
+            self.mean = np.nan_to_num(self.mean + delta * count / total)
+            self.m2 += np.nan_to_num(m2 + delta**2 * self.count * count / total)
+
+        self.count = total
+        self.rows += len(values)
+
+    def get_summary_values(self, length: int) -> np.ndarray:
+        """Returns ``length`` rows with the mean and variance of the imputed data.
+
+        ``SimpleImputer`` fills missing values with the mean, so after
+        imputation every column keeps its mean and has the variance
+        ``m2 / rows``. The rows are the mean plus and minus ``sqrt(length / 2)``
+        standard deviations in the first two rows and the mean elsewhere.
+        Columns without values stay missing, so the imputer drops them as a
+        full fit would.
+        """
+        std = np.sqrt(self.m2 / max(self.rows, 1))
+        offsets = np.zeros(length)
+        offsets[:2] = [np.sqrt(length / 2), -np.sqrt(length / 2)]
+
+        values = self.mean + offsets[:, np.newaxis] * std
+        values[:, self.count == 0] = np.nan
+        return values
+
+
+def iter_training_listings(
+    data_set_name: str, min_reviews: int, chunk_size: int
+) -> Iterator[DataFrame[ListingSchema]]:
+    for listings in iter_listings(data_set_name, chunk_size):
+        yield get_listings_without_small_amount_of_reviews(listings, min_reviews)
+
+
+def get_split_rows(count: int, random_state: int) -> tuple[np.ndarray, np.ndarray]:
+    """Maps the positions of filtered listings to the splits of ``split_data``.
+
+    Returns the index into ``SPLITS`` of every position and its row within that
+    split, in the shuffled order ``split_data`` would produce.
+    """
+    positions = pd.DataFrame({"position": np.arange(count)})
+    splits = split_data(cast("DataFrame[ListingSchema]", positions), random_state)
+
+    labels = np.empty(count, dtype=np.int8)
+    rows = np.empty(count, dtype=np.int64)
+    for label, split in enumerate(splits):
+        split_positions = split["position"].to_numpy()
+        labels[split_positions] = label
+        rows[split_positions] = np.arange(len(split_positions))
+
+    return labels, rows
+
+
+def fit_transformer_in_chunks(
+    chunks: Iterator[pd.DataFrame], labels: np.ndarray, transformer: ColumnTransformer
+) -> ColumnTransformer:
+    """Fits the transformer on the training rows of ``chunks``.
+
+    Only a summary frame is kept in memory: one listing for every distinct
+    categorical value, the listings that introduce new amenities, and numeric
+    columns rebuilt from streaming moments. Fitting the transformer on it
+    yields the categories and amenity vocabulary of a full fit, and the same
+    imputer and scaler statistics up to floating point rounding.
+    """
+    moments = ColumnMoments(len(NUMERIC_COLUMNS))
+    representatives: list[pd.DataFrame] = []
+    seen_values: dict[str, pd.Series] = {}
+    amenities: set[str] = set()
+
+    offset = 0
+    for chunk in chunks:
+        train_rows = chunk[labels[offset : offset + len(chunk)] == 0]
+        offset += len(chunk)
+
+        moments.update(train_rows[NUMERIC_COLUMNS].to_numpy(float, na_value=np.nan))
+
+        is_new = np.zeros(len(train_rows), dtype=bool)
+        for column in CATEGORICAL_COLUMNS:
+            values = train_rows[column]
+            first = ~values.duplicated().to_numpy()
+            if column in seen_values:
+                first &= ~values.isin(seen_values[column]).to_numpy()
+            seen_values[column] = pd.concat(
+                [seen_values.get(column, values.iloc[:0]), values[first]]
+            )
+            is_new |= first
+
+        for position, amenities_str in enumerate(train_rows[AMENITIES_COLUMN]):
+            new_amenities = set(parse_amenities(amenities_str)) - amenities
+            if new_amenities:
+                amenities.update(new_amenities)
+                is_new[position] = True
+
+        representatives.append(train_rows[is_new])
+
+    summary = pd.concat(representatives, ignore_index=True)
+    if len(summary) == 1:
+        summary = pd.concat([summary, summary], ignore_index=True)
+    summary[NUMERIC_COLUMNS] = moments.get_summary_values(len(summary))
+
+    _, transformer = prepare_data(
+        cast("DataFrame[ListingSchema]", summary), transformer=transformer
+    )
+    return transformer
+
+
+def open_feature_matrix(path: Path, shape: tuple[int, int]) -> np.memmap:
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+
+
+def prepare_data_in_chunks(
+    data_set_name: str,
+    output_dir: Path,
+    *,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    chunk_size: int = LISTINGS_CHUNK_SIZE,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+) -> FeatureMatrices:
+    """Builds the train, validation and test features without loading the CSV.
+
+    The CSV is streamed three times in blocks of ``chunk_size`` rows: to count
+    the listings kept for training, to fit the transformer on the training
+    split, and to write the transformed blocks into float32 ``.npy`` matrices
+    in ``output_dir``. The matrices are returned memory-mapped, with rows in
+    the order ``split_data`` gives for the same ``random_state``.
+    """
+    count = sum(
+        len(chunk)
+        for chunk in iter_training_listings(data_set_name, min_reviews, chunk_size)
+    )
+    labels, rows = get_split_rows(count, random_state)
+
+    transformer = fit_transformer_in_chunks(
+        iter_training_listings(data_set_name, min_reviews, chunk_size),
+        labels,
+        get_training_transformer(engine),
+    )
+    feature_names = transformer.get_feature_names_out()
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True)
+
+    sizes = np.bincount(labels, minlength=len(SPLITS))
+    features = [
+        open_feature_matrix(
+            output_dir / f"{split}_features.npy", (int(size), len(feature_names))
+        )
+        for split, size in zip(SPLITS, sizes, strict=True)
+    ]
+    targets = [np.empty(int(size)) for size in sizes]
+
+    offset = 0
+    for chunk in iter_training_listings(data_set_name, min_reviews, chunk_size):
+        chunk_labels = labels[offset : offset + len(chunk)]
+        chunk_rows = rows[offset : offset + len(chunk)]
+        offset += len(chunk)
+
+        processed_chunk, _ = prepare_data(chunk, fit=False, transformer=transformer)
+        processed_values = np.asarray(processed_chunk, dtype=np.float32)
+        chunk_targets = chunk[REVIEW_SCORES_RATING_COLUMN].to_numpy(dtype=float)
+
+        for label in range(len(SPLITS)):
+            in_split = chunk_labels == label
+            features[label][chunk_rows[in_split]] = processed_values[in_split]
+            targets[label][chunk_rows[in_split]] = chunk_targets[in_split]
+
+    for label, split in enumerate(SPLITS):
+        features[label].flush()
+        np.save(output_dir / f"{split}_target.npy", targets[label])
+
+    return load_feature_matrices(output_dir, transformer)
+
+
+def train_model_in_chunks(
+    data_set_name: str = DEFAULT_DATASET_NAME,
+    *,
+    chunk_size: int = LISTINGS_CHUNK_SIZE,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    save: bool = True,
+    staged_n_estimators: list[int] | None = None,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+    model_name: str = DEFAULT_MODEL_NAME,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    n_estimators: int = DEFAULT_N_ESTIMATORS,
+    max_depth: int | None = DEFAULT_MAX_DEPTH,
+    min_samples_split: int = DEFAULT_MIN_SAMPLES_SPLIT,
+    min_samples_leaf: int = DEFAULT_MIN_SAMPLES_LEAF,
+    max_features: str = DEFAULT_MAX_FEATURES,
+    learning_rate: float = DEFAULT_LEARNING_RATE,
+    subsample: float = DEFAULT_SUBSAMPLE,
+) -> tuple[Regressor, dict[str, float], pd.DataFrame, pd.Series]:
+    """Out-of-core counterpart of ``train_model``.
+
+    The feature matrices are written to ``FEATURE_MATRIX_DIR / model_name``
+    and the model is fitted on their memory-mapped float32 data, the dtype the
+    tree fitting works in, so they are not copied into memory.
+    """
+    matrices = prepare_data_in_chunks(
+        data_set_name,
+        FEATURE_MATRIX_DIR / model_name,
+        min_reviews=min_reviews,
+        random_state=random_state,
+        chunk_size=chunk_size,
+        engine=engine,
+    )
+
+    model, metrics = fit_model(
+        matrices.train_features,
+        matrices.train_target,
+        matrices.validation_features,
+        matrices.validation_target,
+        matrices.transformer,
+        engine=engine,
+        save=save,
+        staged_n_estimators=staged_n_estimators,
+        model_name=model_name,
+        min_reviews=min_reviews,
+        rating_weight=rating_weight,
+        random_state=random_state,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_split=min_samples_split,
+        min_samples_leaf=min_samples_leaf,
+        max_features=max_features,
+        learning_rate=learning_rate,
+        subsample=subsample,
+    )
+
+    return model, metrics, matrices.test_features, matrices.test_target
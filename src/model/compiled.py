@@ -0,0 +1,295 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from constants import COMPILED_MODEL_MAX_BATCH_SIZE
+from data.helpers import parse_amenities
+from schemas import ListingSchema
+
+from .preprocessing import AmenitiesTransformer
+
+
+class CompiledGradientBoosting:
+    def __init__(
+        self,
+        *,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left_child: np.ndarray,
+        right_child: np.ndarray,
+        value: np.ndarray,
+        is_leaf: np.ndarray,
+        roots: np.ndarray,
+        baseline: float,
+        learning_rate: float,
+        n_features_in: int,
+        fallback_model: Any = None,
+        max_batch_size: int = COMPILED_MODEL_MAX_BATCH_SIZE,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.left_child = left_child
+        self.right_child = right_child
+        self.value = value
+        self.is_leaf = is_leaf
+        self.roots = roots
+        self.baseline = baseline
+        self.learning_rate = learning_rate
+        self.n_features_in = n_features_in
+        self.fallback_model = fallback_model
+        self.max_batch_size = max_batch_size
+
+    def predict(self, X: Any) -> np.ndarray:
+        if self.fallback_model is not None and X.shape[0] > self.max_batch_size:
+            if isinstance(X, pd.DataFrame) and not hasattr(
+                self.fallback_model, "feature_names_in_"
+            ):
+                X = X.to_numpy()
+            return np.asarray(self.fallback_model.predict(X))
+
+        if sparse.issparse(X):
+            X = X.toarray()
+
+        features = np.ascontiguousarray(X, dtype=np.float32)
+
+        if features.shape[1:] != (self.n_features_in,):
+            raise ValueError(
+                f"Expected {self.n_features_in} features, got {features.shape}."
+            )
+
+        n_samples, n_features = features.shape
+        n_trees = len(self.roots)
+        flat_features = features.ravel()
+        nodes = np.tile(self.roots, n_samples)
+        row_offsets = np.repeat(np.arange(n_samples) * n_features, n_trees)
+        active = np.flatnonzero(~self.is_leaf.take(nodes))
+
+        while active.size > 0:
+            active_nodes = nodes.take(active)
+            values = flat_features.take(
+                row_offsets.take(active) + self.feature.take(active_nodes)
+            )
+            next_nodes = np.where(
+                values <= self.threshold.take(active_nodes),
+                self.left_child.take(active_nodes),
+                self.right_child.take(active_nodes),
+            )
+            nodes[active] = next_nodes
+            active = active[~self.is_leaf.take(next_nodes)]
+
+        nodes = nodes.reshape(n_samples, n_trees)
+
+        stages = np.empty((n_samples, len(self.roots) + 1), dtype=np.float64)
+        stages[:, 0] = self.baseline
+        stages[:, 1:] = self.learning_rate * self.value.take(nodes)
+
+        return np.cumsum(stages, axis=1)[:, -1]
+
+
+def get_baseline(model: GradientBoostingRegressor) -> float:
+    if isinstance(model.init_, str) and model.init_ == "zero":
+        return 0.0
+
+    if not isinstance(model.init_, DummyRegressor):
+        raise TypeError("Only the default init estimator can be compiled.")
+
+    return float(np.asarray(model.init_.constant_, dtype=np.float64).ravel()[0])
+
+
+def compile_model(
+    model: GradientBoostingRegressor,
+    max_batch_size: int = COMPILED_MODEL_MAX_BATCH_SIZE,
+) -> CompiledGradientBoosting:
+    if model.estimators_.shape[1] != 1:
+        raise ValueError("Only single-output regression models can be compiled.")
+
+    trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    tree_offsets = list(zip(trees, offsets[:-1], strict=True))
+
+    feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+    threshold = np.concatenate([tree.threshold for tree in trees])
+    left_child = np.concatenate(
+        [tree.children_left + offset for tree, offset in tree_offsets]
+    ).astype(np.intp)
+    right_child = np.concatenate(
+        [tree.children_right + offset for tree, offset in tree_offsets]
+    ).astype(np.intp)
+    value = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+
+    is_leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+
+    return CompiledGradientBoosting(
+        feature=feature,
+        threshold=np.ascontiguousarray(threshold, dtype=np.float64),
+        left_child=left_child,
+        right_child=right_child,
+        value=np.ascontiguousarray(value, dtype=np.float64),
+        is_leaf=is_leaf,
+        roots=offsets[:-1].astype(np.intp),
+        baseline=get_baseline(model),
+        learning_rate=float(model.learning_rate),
+        n_features_in=int(model.n_features_in_),
+        fallback_model=model,
+        max_batch_size=max_batch_size,
+    )
+
+
+class PreprocessingPlan:
+    def __init__(
+        self,
+        *,
+        numeric_columns: list[str],
+        numeric_fill_values: np.ndarray,
+        numeric_mean: np.ndarray,
+        numeric_scale: np.ndarray,
+        categorical_columns: list[str],
+        category_maps: list[dict[Any, int]],
+        amenities_column: str,
+        amenity_map: dict[str, int],
+        feature_names: pd.Index,
+    ) -> None:
+        self.numeric_columns = numeric_columns
+        self.numeric_fill_values = numeric_fill_values
+        self.numeric_mean = numeric_mean
+        self.numeric_scale = numeric_scale
+        self.categorical_columns = categorical_columns
+        self.category_maps = category_maps
+        self.amenities_column = amenities_column
+        self.amenity_map = amenity_map
+        self.feature_names = feature_names
+
+    @property
+    def input_columns(self) -> list[str]:
+        return [*self.numeric_columns, *self.categorical_columns, self.amenities_column]
+
+    def transform(self, listings: DataFrame[ListingSchema]) -> np.ndarray:
+        n_samples = len(listings)
+        n_numeric = len(self.numeric_columns)
+        features = np.zeros((n_samples, len(self.feature_names)), dtype=np.float64)
+
+        numeric = features[:, :n_numeric]
+        numeric[:] = listings[self.numeric_columns].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        missing_rows, missing_columns = np.nonzero(np.isnan(numeric))
+        numeric[missing_rows, missing_columns] = self.numeric_fill_values[
+            missing_columns
+        ]
+        numeric -= self.numeric_mean
+        numeric /= self.numeric_scale
+
+        for column, category_map in zip(
+            self.categorical_columns, self.category_maps, strict=True
+        ):
+            for row, value in enumerate(listings[column].tolist()):
+                output_column = category_map.get(get_category_key(value))
+                if output_column is not None:
+                    features[row, output_column] = 1.0
+
+        for row, amenities in enumerate(listings[self.amenities_column].tolist()):
+            for amenity in parse_amenities(amenities):
+                output_column = self.amenity_map.get(amenity)
+                if output_column is not None:
+                    features[row, output_column] = 1.0
+
+        return features
+
+    def transform_frame(self, listings: DataFrame[ListingSchema]) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.transform(listings), columns=self.feature_names, copy=False
+        )
+
+
+def get_category_key(value: Any) -> Any:
+    return None if pd.isna(value) else value
+
+
+def compile_transformer(transformer: ColumnTransformer) -> PreprocessingPlan:
+    fitted = {
+        name: (step, columns) for name, step, columns in transformer.transformers_
+    }
+
+    if set(fitted) - {"remainder"} != {"num", "cat", "amenities"} or (
+        "remainder" in fitted and fitted["remainder"][0] != "drop"
+    ):
+        raise ValueError("Unsupported transformer layout.")
+
+    numeric_pipeline, numeric_columns = fitted["num"]
+    encoder, categorical_columns = fitted["cat"]
+    amenities_transformer, amenities_columns = fitted["amenities"]
+
+    if not isinstance(numeric_pipeline, Pipeline) or [
+        name for name, _ in numeric_pipeline.steps
+    ] != ["imputer", "scaler"]:
+        raise ValueError("Unsupported numeric pipeline.")
+
+    imputer = numeric_pipeline.named_steps["imputer"]
+    scaler = numeric_pipeline.named_steps["scaler"]
+
+    if (
+        not isinstance(imputer, SimpleImputer)
+        or imputer.add_indicator
+        or not isinstance(scaler, StandardScaler)
+        or not (scaler.with_mean and scaler.with_std)
+        or not isinstance(encoder, OneHotEncoder)
+        or encoder.handle_unknown != "ignore"
+        or getattr(encoder, "_infrequent_enabled", False)
+        or not isinstance(amenities_transformer, AmenitiesTransformer)
+    ):
+        raise ValueError("Unsupported transformer steps.")
+
+    statistics = np.asarray(imputer.statistics_, dtype=np.float64)
+    kept_numeric = ~np.isnan(statistics)
+    n_numeric = int(kept_numeric.sum())
+
+    numeric_mean = np.asarray(scaler.mean_)
+    numeric_scale = np.asarray(scaler.scale_)
+
+    category_maps: list[dict[Any, int]] = []
+    output_column = n_numeric
+    for feature_index, categories in enumerate(encoder.categories_):
+        drop_index = (
+            None if encoder.drop_idx_ is None else encoder.drop_idx_[feature_index]
+        )
+        category_map: dict[Any, int] = {}
+        for category_index, category in enumerate(categories.tolist()):
+            if category_index == drop_index:
+                continue
+            category_map[get_category_key(category)] = output_column
+            output_column += 1
+        category_maps.append(category_map)
+
+    amenity_map = {
+        amenity: output_column + index
+        for amenity, index in amenities_transformer.vocabulary_.items()
+    }
+
+    feature_names = pd.Index(transformer.get_feature_names_out())
+    if len(feature_names) != output_column + len(amenity_map):
+        raise ValueError("Unexpected number of transformer output features.")
+
+    return PreprocessingPlan(
+        numeric_columns=[
+            column
+            for column, kept in zip(numeric_columns, kept_numeric, strict=True)
+            if kept
+        ],
+        numeric_fill_values=statistics[kept_numeric],
+        numeric_mean=numeric_mean,
+        numeric_scale=numeric_scale,
+        categorical_columns=list(categorical_columns),
+        category_maps=category_maps,
+        amenities_column=amenities_columns[0],
+        amenity_map=amenity_map,
+        feature_names=feature_names,
+    )
@@ -0,0 +1,196 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+from pandera.typing import DataFrame
+from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
+
+from constants import (
+    DEFAULT_LEARNING_RATE,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_MAX_FEATURES,
+    DEFAULT_MIN_REVIEWS,
+    DEFAULT_MIN_SAMPLES_LEAF,
+    DEFAULT_MIN_SAMPLES_SPLIT,
+    DEFAULT_MODEL_NAME,
+    DEFAULT_N_ESTIMATORS,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_SUBSAMPLE,
+    DEFAULT_TRAINING_ENGINE,
+    MIN_CV_FOLDS,
+    REVIEW_SCORES_RATING_COLUMN,
+)
+from data import get_listings_without_small_amount_of_reviews
+from schemas import ListingSchema
+
+from .features import get_training_transformer
+from .preprocessing import prepare_data
+from .train import build_model, fit_model, save_model
+
+
+def fit_fold(
+    train_listings: DataFrame[ListingSchema],
+    test_listings: DataFrame[ListingSchema],
+    *,
+    engine: str,
+    sparse_output: bool,
+    threads: int,
+    params: dict[str, Any],
+) -> dict[str, float]:
+    """Fits the transformer and model on one fold and scores the held-out rows."""
+    with threadpool_limits(limits=threads):
+        train_features, transformer = prepare_data(
+            train_listings,
+            fit=True,
+            transformer=get_training_transformer(engine, sparse_output),
+        )
+        test_features, _ = prepare_data(
+            test_listings, fit=False, transformer=transformer
+        )
+
+        _, metrics = fit_model(
+            train_features,
+            train_listings[REVIEW_SCORES_RATING_COLUMN],
+            test_features,
+            test_listings[REVIEW_SCORES_RATING_COLUMN],
+            transformer,
+            engine=engine,
+            save=False,
+            **params,
+        )
+
+    return metrics
+
+
+def refit_model(
+    listings: DataFrame[ListingSchema],
+    *,
+    engine: str,
+    sparse_output: bool,
+    threads: int,
+    model_name: str,
+    min_reviews: int,
+    rating_weight: float,
+    params: dict[str, Any],
+) -> None:
+    """Fits the transformer and model on every listing and saves them."""
+    with threadpool_limits(limits=threads):
+        features, transformer = prepare_data(
+            listings,
+            fit=True,
+            transformer=get_training_transformer(engine, sparse_output),
+        )
+        model = build_model(engine, transformer, **params)
+        model.fit(features, listings[REVIEW_SCORES_RATING_COLUMN])
+
+    save_model(
+        model,
+        transformer,
+        model_name=model_name,
+        min_reviews=min_reviews,
+        rating_weight=rating_weight,
+    )
+
+
+def summarize_folds(fold_metrics: pd.DataFrame) -> dict[str, float]:
+    summary = {}
+    for metric in ("mae", "rmse"):
+        summary[f"{metric}_mean"] = float(fold_metrics[metric].mean())
+        summary[f"{metric}_std"] = float(fold_metrics[metric].std())
+    return summary
+
+
+def cross_validate_model(
+    listings: DataFrame[ListingSchema],
+    *,
+    folds: int,
+    workers: int = 1,
+    refit: bool = False,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    sparse_output: bool = False,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+    model_name: str = DEFAULT_MODEL_NAME,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    n_estimators: int = DEFAULT_N_ESTIMATORS,
+    max_depth: int | None = DEFAULT_MAX_DEPTH,
+    min_samples_split: int = DEFAULT_MIN_SAMPLES_SPLIT,
+    min_samples_leaf: int = DEFAULT_MIN_SAMPLES_LEAF,
+    max_features: str = DEFAULT_MAX_FEATURES,
+    learning_rate: float = DEFAULT_LEARNING_RATE,
+    subsample: float = DEFAULT_SUBSAMPLE,
+) -> tuple[pd.DataFrame, dict[str, float]]:
+    """Scores the model with shuffled k-fold cross-validation.
+
+    The listings kept by ``min_reviews`` are split into ``folds`` folds with
+    ``random_state``. Every fold fits its own transformer and model in a pool
+    of ``workers`` processes, whose BLAS/OpenMP threads are capped at
+    ``cpus // workers``. With ``refit`` the model is also fitted on all kept
+    listings in the same pool and saved as ``model_name``.
+
+    Returns the MAE, RMSE and fit time of every fold, and the mean and sample
+    standard deviation of the MAE and RMSE across folds.
+    """
+    if folds < MIN_CV_FOLDS:
+        raise ValueError(
+            f"Cross-validation needs at least {MIN_CV_FOLDS} folds, got {folds}."
+        )
+    get_training_transformer(engine, sparse_output)
+
+    filtered_listings = get_listings_without_small_amount_of_reviews(
+        listings, min_reviews
+    )
+    params = {
+        "random_state": random_state,
+        "n_estimators": n_estimators,
+        "max_depth": max_depth,
+        "min_samples_split": min_samples_split,
+        "min_samples_leaf": min_samples_leaf,
+        "max_features": max_features,
+        "learning_rate": learning_rate,
+        "subsample": subsample,
+    }
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    kfold = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        fold_futures = [
+            executor.submit(
+                fit_fold,
+                filtered_listings.iloc[train_rows],
+                filtered_listings.iloc[test_rows],
+                engine=engine,
+                sparse_output=sparse_output,
+                threads=threads,
+                params=params,
+            )
+            for train_rows, test_rows in kfold.split(filtered_listings)
+        ]
+        refit_future = (
+            executor.submit(
+                refit_model,
+                filtered_listings,
+                engine=engine,
+                sparse_output=sparse_output,
+                threads=threads,
+                model_name=model_name,
+                min_reviews=min_reviews,
+                rating_weight=rating_weight,
+                params=params,
+            )
+            if refit
+            else None
+        )
+
+        fold_metrics = pd.DataFrame(
+            [
+                {"fold": fold, **future.result()}
+                for fold, future in enumerate(fold_futures, start=1)
+            ]
+        )
+        if refit_future is not None:
+            refit_future.result()
+
+    return fold_metrics, summarize_folds(fold_metrics)
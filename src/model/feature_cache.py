@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import sklearn
+from pandera.typing import DataFrame
+
+from constants import (
+    DEFAULT_MIN_REVIEWS,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_TRAINING_ENGINE,
+    DEFAULT_TRANSFORMER_NAME,
+    FEATURE_CACHE_DIR,
+    FEATURE_CACHE_VERSION,
+)
+from instrumentation import record_stage
+from schemas import ListingSchema
+
+from .features import (
+    FeatureMatrices,
+    get_training_transformer,
+    load_feature_matrices,
+    prepare_feature_matrices,
+    save_feature_matrices,
+)
+
+FEATURE_CACHE_MODES = ("use", "rebuild", "clear", "off")
+
+
+def get_listings_fingerprint(listings: pd.DataFrame) -> str:
+    """Hashes the column layout and every value of ``listings``."""
+    digest = hashlib.sha256()
+    columns = [(str(name), str(dtype)) for name, dtype in listings.dtypes.items()]
+    digest.update(json.dumps(columns).encode())
+    digest.update(pd.util.hash_pandas_object(listings).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_feature_cache_key(
+    listings: pd.DataFrame,
+    *,
+    min_reviews: int,
+    random_state: int,
+    engine: str,
+    sparse_output: bool,
+) -> str:
+    """Fingerprints everything the prepared feature matrices depend on.
+
+    The unfitted transformer is described by its parameters, which include the
+    column lists, so changing the preprocessing config invalidates the entry.
+    """
+    transformer = get_training_transformer(engine, sparse_output)
+    description = {
+        "version": FEATURE_CACHE_VERSION,
+        "sklearn": sklearn.__version__,
+        "listings": get_listings_fingerprint(listings),
+        "min_reviews": min_reviews,
+        "random_state": random_state,
+        "transformer": transformer.get_params(deep=True),
+    }
+    serialized = json.dumps(description, sort_keys=True, default=repr)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def clear_feature_cache(cache_dir: Path = FEATURE_CACHE_DIR) -> None:
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def build_feature_cache_entry(
+    listings: DataFrame[ListingSchema],
+    entry_dir: Path,
+    *,
+    min_reviews: int,
+    random_state: int,
+    engine: str,
+    sparse_output: bool,
+) -> FeatureMatrices:
+    matrices = prepare_feature_matrices(
+        listings,
+        min_reviews=min_reviews,
+        random_state=random_state,
+        engine=engine,
+        sparse_output=sparse_output,
+    )
+
+    temporary_dir = entry_dir.with_name(f".{entry_dir.name}.{os.getpid()}.tmp")
+    with record_stage("write_feature_cache"):
+        save_feature_matrices(temporary_dir, matrices)
+        joblib.dump(matrices.transformer, temporary_dir / DEFAULT_TRANSFORMER_NAME)
+
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    try:
+        temporary_dir.replace(entry_dir)
+    except OSError:
+        shutil.rmtree(temporary_dir, ignore_errors=True)
+
+    return matrices
+
+
+def get_cached_feature_matrices(
+    listings: DataFrame[ListingSchema],
+    *,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    sparse_output: bool = False,
+    mode: str = "use",
+    cache_dir: Path = FEATURE_CACHE_DIR,
+) -> tuple[FeatureMatrices, Path | None]:
+    """Returns the prepared feature matrices, reusing the on-disk cache.
+
+    Entries are keyed by ``get_feature_cache_key`` and hold the fitted
+    transformer with the transformed train, validation and test splits, which
+    are loaded memory-mapped. ``mode`` is one of ``FEATURE_CACHE_MODES`` with
+    the same meaning as for the listings cache. The entry directory is
+    returned alongside the matrices, or ``None`` when the cache is bypassed.
+    """
+    if mode not in FEATURE_CACHE_MODES:
+        raise ValueError(f"Unsupported feature cache mode: {mode}.")
+
+    if mode in ("clear", "off"):
+        if mode == "clear":
+            clear_feature_cache(cache_dir)
+        matrices = prepare_feature_matrices(
+            listings,
+            min_reviews=min_reviews,
+            random_state=random_state,
+            engine=engine,
+            sparse_output=sparse_output,
+        )
+        return matrices, None
+
+    key = get_feature_cache_key(
+        listings,
+        min_reviews=min_reviews,
+        random_state=random_state,
+        engine=engine,
+        sparse_output=sparse_output,
+    )
+    entry_dir = cache_dir / key[:32]
+    transformer_path = entry_dir / DEFAULT_TRANSFORMER_NAME
+
+    if mode == "use" and transformer_path.exists():
+        with record_stage("read_feature_cache"):
+            transformer = joblib.load(transformer_path)
+            matrices = load_feature_matrices(entry_dir, transformer)
+    else:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        matrices = build_feature_cache_entry(
+            listings,
+            entry_dir,
+            min_reviews=min_reviews,
+            random_state=random_state,
+            engine=engine,
+            sparse_output=sparse_output,
+        )
+
+    return matrices, entry_dir
@@ -0,0 +1,156 @@
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import train_test_split
+
+from constants import (
+    DEFAULT_MIN_REVIEWS,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_TRAINING_ENGINE,
+    REVIEW_SCORES_RATING_COLUMN,
+    TRAINING_ENGINES,
+)
+from data import get_listings_without_small_amount_of_reviews
+from instrumentation import record_stage
+from schemas import ListingSchema
+
+from .preprocessing import get_transformer, prepare_data
+
+
+@dataclass
+class FeatureMatrices:
+    transformer: ColumnTransformer
+    train_features: pd.DataFrame | sparse.csr_matrix
+    train_target: pd.Series
+    validation_features: pd.DataFrame | sparse.csr_matrix
+    validation_target: pd.Series
+    test_features: pd.DataFrame | sparse.csr_matrix
+    test_target: pd.Series
+
+
+def split_data(
+    listings: DataFrame[ListingSchema],
+    random_state: int = DEFAULT_RANDOM_STATE,
+) -> tuple[
+    DataFrame[ListingSchema], DataFrame[ListingSchema], DataFrame[ListingSchema]
+]:
+    train_listings, validation_and_test_listings = train_test_split(
+        listings,
+        test_size=0.3,
+        random_state=random_state,
+    )
+
+    validation_listings, test_listings = train_test_split(
+        validation_and_test_listings,
+        test_size=0.5,
+        random_state=random_state,
+    )
+
+    return train_listings, validation_listings, test_listings
+
+
+def get_training_transformer(
+    engine: str = DEFAULT_TRAINING_ENGINE, sparse_output: bool = False
+) -> ColumnTransformer:
+    if engine not in TRAINING_ENGINES:
+        raise ValueError(f"Unsupported training engine: {engine}.")
+    if engine == "hist" and sparse_output:
+        raise ValueError("The hist engine does not support sparse output.")
+
+    return get_transformer(sparse_output, native_categorical=engine == "hist")
+
+
+def prepare_feature_matrices(
+    listings: DataFrame[ListingSchema],
+    *,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    sparse_output: bool = False,
+) -> FeatureMatrices:
+    filtered_listings = get_listings_without_small_amount_of_reviews(
+        listings, min_reviews
+    ).copy()
+
+    with record_stage("split_data"):
+        train_listings, validation_listings, test_listings = split_data(
+            filtered_listings, random_state
+        )
+
+    train_features, transformer = prepare_data(
+        train_listings,
+        fit=True,
+        transformer=get_training_transformer(engine, sparse_output),
+    )
+
+    validation_features, _ = prepare_data(
+        validation_listings, fit=False, transformer=transformer
+    )
+
+    test_features, _ = prepare_data(test_listings, fit=False, transformer=transformer)
+
+    return FeatureMatrices(
+        transformer=transformer,
+        train_features=train_features,
+        train_target=train_listings[REVIEW_SCORES_RATING_COLUMN],
+        validation_features=validation_features,
+        validation_target=validation_listings[REVIEW_SCORES_RATING_COLUMN],
+        test_features=test_features,
+        test_target=test_listings[REVIEW_SCORES_RATING_COLUMN],
+    )
+
+
+def load_feature_matrices(
+    output_dir: Path, transformer: ColumnTransformer
+) -> FeatureMatrices:
+    feature_names = transformer.get_feature_names_out()
+
+    def load_features(split: str) -> pd.DataFrame | sparse.csr_matrix:
+        sparse_path = output_dir / f"{split}_features.npz"
+        if sparse_path.exists():
+            return sparse.csr_matrix(sparse.load_npz(sparse_path))
+
+        features = np.load(output_dir / f"{split}_features.npy", mmap_mode="r")
+        return pd.DataFrame(features, columns=feature_names, copy=False)
+
+    def load_target(split: str) -> pd.Series:
+        target = np.load(output_dir / f"{split}_target.npy")
+        return pd.Series(target, name=REVIEW_SCORES_RATING_COLUMN)
+
+    return FeatureMatrices(
+        transformer=transformer,
+        train_features=load_features("train"),
+        train_target=load_target("train"),
+        validation_features=load_features("validation"),
+        validation_target=load_target("validation"),
+        test_features=load_features("test"),
+        test_target=load_target("test"),
+    )
+
+
+def save_feature_matrices(output_dir: Path, matrices: FeatureMatrices) -> None:
+    """Writes ``matrices`` in the layout ``load_feature_matrices`` reads.
+
+    Dense features are stored as ``.npy`` files, which are loaded memory-mapped,
+    and CSR features as ``.npz`` files.
+    """
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True)
+
+    splits = {
+        "train": (matrices.train_features, matrices.train_target),
+        "validation": (matrices.validation_features, matrices.validation_target),
+        "test": (matrices.test_features, matrices.test_target),
+    }
+    for split, (features, target) in splits.items():
+        if sparse.issparse(features):
+            sparse.save_npz(output_dir / f"{split}_features.npz", features)
+        else:
+            np.save(output_dir / f"{split}_features.npy", np.asarray(features))
+        np.save(output_dir / f"{split}_target.npy", target.to_numpy(dtype=float))
@@ -0,0 +1,280 @@
+import copy
+import itertools
+import json
+import re
+import time
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import train_test_split
+
+from constants import (
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_RETRAIN_MIN_SAMPLES_LEAF,
+    DEFAULT_RETRAIN_N_ESTIMATORS,
+    MIN_RETRAIN_LISTINGS,
+    MODEL_DIR,
+    RETRAIN_REPORT_NAME,
+    REVIEW_SCORES_RATING_COLUMN,
+    REVIEWS_AMOUNT_COLUMN,
+)
+from data import get_listings_without_small_amount_of_reviews
+from schemas import ListingSchema
+
+from .predict import load_model
+from .preprocessing import prepare_data
+from .train import Regressor, get_categorical_features, get_stage_count, save_model
+
+
+def get_next_model_version(model_name: str) -> str:
+    """Returns ``<root>_v<n>`` for the version after the last one in ``MODEL_DIR``.
+
+    The root drops an existing ``_v<n>`` suffix and counts as version 1, so
+    retraining ``m1`` and then ``m1_v2`` gives ``m1_v2`` and ``m1_v3``.
+    """
+    root = re.sub(r"_v\d+$", "", model_name)
+    versions = [
+        int(match.group(1))
+        for path in MODEL_DIR.glob(f"{root}_v*")
+        if (match := re.fullmatch(rf"{re.escape(root)}_v(\d+)", path.name))
+    ]
+    return f"{root}_v{max([1, *versions]) + 1}"
+
+
+def get_changed_listings(
+    listings: DataFrame[ListingSchema], base_listings: DataFrame[ListingSchema]
+) -> DataFrame[ListingSchema]:
+    """Keeps the listings that are new or whose reviews changed since the base."""
+    base_reviews = base_listings.set_index("id")[
+        [REVIEWS_AMOUNT_COLUMN, REVIEW_SCORES_RATING_COLUMN]
+    ]
+    known = listings[["id"]].join(base_reviews, on="id")
+    unchanged = (
+        known[REVIEWS_AMOUNT_COLUMN].eq(listings[REVIEWS_AMOUNT_COLUMN])
+        & known[REVIEW_SCORES_RATING_COLUMN].eq(listings[REVIEW_SCORES_RATING_COLUMN])
+    ).fillna(value=False)
+    return listings[~unchanged.to_numpy(dtype=bool)]
+
+
+def extend_model(
+    model: Regressor, extra_estimators: int, *, min_samples_leaf: int
+) -> Regressor:
+    """Returns a copy of ``model`` whose next ``fit`` adds ``extra_estimators``.
+
+    The added stages grow trees with ``min_samples_leaf``, the existing ones
+    are kept as they are.
+    """
+    extended = copy.deepcopy(model)
+    stage_count = get_stage_count(model) + extra_estimators
+    if isinstance(extended, HistGradientBoostingRegressor):
+        extended.set_params(max_iter=stage_count)
+    else:
+        extended.set_params(n_estimators=stage_count)
+    extended.set_params(warm_start=True, min_samples_leaf=min_samples_leaf)
+    return extended
+
+
+def get_missing_categories(
+    transformer: ColumnTransformer, features: pd.DataFrame
+) -> dict[str, list[Any]]:
+    """Maps each ``cat`` column to its fitted categories absent from ``features``.
+
+    ``features`` are the output of ``transformer``, so the ordinal codes of
+    its ``cat`` columns index the encoder categories.
+    """
+    _, encoder, columns = next(
+        entry for entry in transformer.transformers_ if entry[0] == "cat"
+    )
+    codes = features.iloc[:, transformer.output_indices_["cat"]]
+
+    missing = {}
+    for index, (column, categories) in enumerate(
+        zip(columns, encoder.categories_, strict=True)
+    ):
+        present = set(codes.iloc[:, index].dropna().astype(int))
+        absent = [
+            category
+            for code, category in enumerate(categories)
+            if not pd.isna(category) and code not in present
+        ]
+        if absent:
+            missing[column] = absent
+    return missing
+
+
+def get_base_stage_predictions(
+    model: Regressor, stage_count: int, features: Any
+) -> np.ndarray:
+    return next(itertools.islice(model.staged_predict(features), stage_count - 1, None))
+
+
+def score_predictions(target: pd.Series, predictions: np.ndarray) -> dict[str, float]:
+    return {
+        "mae": float(mean_absolute_error(target, predictions)),
+        "rmse": float(np.sqrt(mean_squared_error(target, predictions))),
+    }
+
+
+def retrain_model(
+    delta_listings: DataFrame[ListingSchema],
+    *,
+    base_model_name: str,
+    model_name: str | None = None,
+    extra_estimators: int = DEFAULT_RETRAIN_N_ESTIMATORS,
+    min_samples_leaf: int = DEFAULT_RETRAIN_MIN_SAMPLES_LEAF,
+    base_listings: DataFrame[ListingSchema] | None = None,
+    full_retrain: bool = False,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    save: bool = True,
+) -> tuple[Regressor, dict[str, Any]]:
+    """Extends the ``base_model_name`` ensemble with stages fitted on new listings.
+
+    The listings of ``delta_listings`` kept by the base ``min_reviews`` are
+    split 70/30. The base transformer is reused unchanged, since the existing
+    trees split on its output columns, and ``extra_estimators`` boosting
+    stages are warm started on the 70% part, each fitting the residuals of
+    the stages before it. The new trees use ``min_samples_leaf``, since fully
+    grown trees would fit the noise of the few new listings. The new version
+    is saved as ``model_name``, which defaults to
+    ``get_next_model_version(base_model_name)``.
+
+    A warm started ``HistGradientBoostingRegressor`` refits its category bins
+    on the new listings, so the existing trees would route any category
+    missing from them differently. Hist base models therefore need every
+    ``cat`` category of the transformer in the 70% part, and after the fit
+    their first stages must still predict as the base model did; otherwise a
+    ValueError is raised.
+
+    With ``base_listings``, delta listings whose review count and rating are
+    unchanged since then are dropped. With ``full_retrain`` a model with the
+    base model's parameters and the new stage count is also fitted from
+    scratch on the base listings updated with the delta training part, as
+    ``train_model`` would.
+
+    The report holds the MAE and RMSE of the base, incremental and full
+    retrain models on the held-out 30%, and the seconds each retrain took.
+    It is saved as ``RETRAIN_REPORT_NAME`` next to the new model.
+    """
+    if full_retrain and base_listings is None:
+        raise ValueError("A full retrain needs the base listings.")
+
+    base_model, transformer, min_reviews, rating_weight = load_model(base_model_name)
+    model_name = model_name or get_next_model_version(base_model_name)
+
+    if base_listings is not None:
+        delta_listings = get_changed_listings(delta_listings, base_listings)
+    delta_listings = get_listings_without_small_amount_of_reviews(
+        delta_listings, min_reviews
+    )
+    if len(delta_listings) < MIN_RETRAIN_LISTINGS:
+        raise ValueError(
+            f"Need at least {MIN_RETRAIN_LISTINGS} new listings with {min_reviews} "
+            f"reviews, got {len(delta_listings)}."
+        )
+
+    train_listings, evaluation_listings = train_test_split(
+        delta_listings, test_size=0.3, random_state=random_state
+    )
+    evaluation_target = evaluation_listings[REVIEW_SCORES_RATING_COLUMN]
+    evaluation_features, _ = prepare_data(
+        evaluation_listings, fit=False, transformer=transformer
+    )
+
+    start = time.perf_counter()
+    train_features, _ = prepare_data(train_listings, fit=False, transformer=transformer)
+
+    is_hist = isinstance(base_model, HistGradientBoostingRegressor)
+    if is_hist and (missing := get_missing_categories(transformer, train_features)):
+        raise ValueError(
+            "A hist model refits its category bins on the new listings, which "
+            f"lack the categories {missing} of {base_model_name}."
+        )
+
+    model = extend_model(
+        base_model, extra_estimators, min_samples_leaf=min_samples_leaf
+    )
+    model.fit(train_features, train_listings[REVIEW_SCORES_RATING_COLUMN])
+    model.set_params(warm_start=False)
+    incremental_seconds = time.perf_counter() - start
+
+    base_stage_count = get_stage_count(base_model)
+    if is_hist and not np.allclose(
+        get_base_stage_predictions(model, base_stage_count, train_features),
+        base_model.predict(train_features),
+    ):
+        raise ValueError(
+            f"Retraining changed the predictions of the {base_stage_count} stages "
+            f"of {base_model_name}."
+        )
+
+    report: dict[str, Any] = {
+        "base_model": base_model_name,
+        "model": model_name,
+        "delta_listings": len(train_listings),
+        "evaluation_listings": len(evaluation_listings),
+        "added_estimators": extra_estimators,
+        "min_samples_leaf": min_samples_leaf,
+        "n_estimators": get_stage_count(model),
+        "base": score_predictions(
+            evaluation_target, base_model.predict(evaluation_features)
+        ),
+        "incremental": {
+            **score_predictions(evaluation_target, model.predict(evaluation_features)),
+            "seconds": incremental_seconds,
+        },
+    }
+
+    if full_retrain and base_listings is not None:
+        full_listings = pd.concat(
+            [
+                base_listings[~base_listings["id"].isin(delta_listings["id"])],
+                train_listings,
+            ]
+        )
+        full_listings = get_listings_without_small_amount_of_reviews(
+            full_listings, min_reviews
+        )
+
+        start = time.perf_counter()
+        full_features, full_transformer = prepare_data(
+            full_listings, fit=True, transformer=clone(transformer)
+        )
+        full_model = clone(base_model)
+        if isinstance(full_model, HistGradientBoostingRegressor):
+            full_model.set_params(
+                max_iter=get_stage_count(model),
+                categorical_features=get_categorical_features(full_transformer),
+            )
+        else:
+            full_model.set_params(n_estimators=get_stage_count(model))
+        full_model.fit(full_features, full_listings[REVIEW_SCORES_RATING_COLUMN])
+        full_seconds = time.perf_counter() - start
+
+        full_evaluation_features, _ = prepare_data(
+            evaluation_listings, fit=False, transformer=full_transformer
+        )
+        report["full_retrain"] = {
+            **score_predictions(
+                evaluation_target, full_model.predict(full_evaluation_features)
+            ),
+            "seconds": full_seconds,
+        }
+
+    if save:
+        save_model(
+            model,
+            transformer,
+            model_name=model_name,
+            min_reviews=min_reviews,
+            rating_weight=rating_weight,
+        )
+        with (MODEL_DIR / model_name / RETRAIN_REPORT_NAME).open("w") as f:
+            json.dump(report, f, indent=2)
+
+    return model, report
@@ -1,16 +1,14 @@
-import json
-from typing import Any
+from typing import Any, cast
 
-import joblib
+import numpy as np
 import pandas as pd
 from pandera.typing import DataFrame
 from sklearn.compose import ColumnTransformer
 
 from constants import (
     DEFAULT_MIN_REVIEWS,
-    DEFAULT_MODEL_CONFIG_NAME,
     DEFAULT_MODEL_NAME,
-    DEFAULT_TRANSFORMER_NAME,
+    LISTING_VALIDATION_POLICY,
     MIN_REVIEWS_KEY,
     MODEL_DIR,
     PREDICTED_RATING_COLUMN,
@@ -18,38 +16,47 @@ from constants import (
     REVIEW_SCORES_RATING_COLUMN,
     REVIEWS_AMOUNT_COLUMN,
 )
+from instrumentation import record_stage
 from schemas import ListingSchema
 
+from .artifacts import load_artifact_bundle
+from .cache import PredictionCache, get_input_columns, get_listing_keys
+from .compiled import PreprocessingPlan
 from .preprocessing import prepare_data
 
 
 def load_model(
     model_name: str = DEFAULT_MODEL_NAME,
 ) -> tuple[Any, ColumnTransformer, int, float]:
-    model_folder = MODEL_DIR / model_name
-
-    model_path = model_folder / DEFAULT_MODEL_NAME
-    transformer_path = model_folder / DEFAULT_TRANSFORMER_NAME
-    config_path = model_folder / DEFAULT_MODEL_CONFIG_NAME
-
-    model = joblib.load(model_path)
-    transformer = joblib.load(transformer_path)
-
-    with config_path.open() as f:
-        config = json.load(f)
+    with record_stage("load_model"):
+        bundle = load_artifact_bundle(MODEL_DIR / model_name)
 
+    config = bundle.config
     min_reviews = config[MIN_REVIEWS_KEY]
     rating_weight = config[RATING_WEIGHT_KEY]
 
-    return model, transformer, min_reviews, rating_weight
+    return bundle.model, bundle.transformer, min_reviews, rating_weight
 
 
 def predict_ratings(
     listings: DataFrame[ListingSchema],
     model: Any,
-    transformer: ColumnTransformer,
+    transformer: ColumnTransformer | PreprocessingPlan,
+    *,
+    cache: PredictionCache | None = None,
+    cache_namespace: str = "",
 ) -> pd.Series:
-    processed_listings, _ = prepare_data(listings, fit=False, transformer=transformer)
+    if cache is not None:
+        return predict_ratings_cached(
+            listings, model, transformer, cache, cache_namespace
+        )
+
+    if isinstance(transformer, PreprocessingPlan):
+        processed_listings = transformer.transform_frame(listings)
+    else:
+        processed_listings, _ = prepare_data(
+            listings, fit=False, transformer=transformer
+        )
     predictions = model.predict(processed_listings)
     predictions_rounded = pd.Series(
         [round(float(p), 3) for p in predictions], index=listings.index
@@ -57,69 +64,125 @@ def predict_ratings(
     return predictions_rounded
 
 
+def predict_ratings_cached(
+    listings: DataFrame[ListingSchema],
+    model: Any,
+    transformer: ColumnTransformer | PreprocessingPlan,
+    cache: PredictionCache,
+    cache_namespace: str,
+) -> pd.Series:
+    """Scores only the listings missing from ``cache`` and splices them back."""
+    keys = get_listing_keys(listings, get_input_columns(transformer))
+    ratings = cache.get_many(cache_namespace, keys)
+    missing = [position for position, rating in enumerate(ratings) if rating is None]
+
+    if missing:
+        missing_ratings = predict_ratings(
+            listings.iloc[missing], model, transformer
+        ).tolist()
+        cache.put_many(
+            cache_namespace, [keys[position] for position in missing], missing_ratings
+        )
+        for position, rating in zip(missing, missing_ratings, strict=True):
+            ratings[position] = rating
+
+    return pd.Series(ratings, index=listings.index, dtype=float)
+
+
 def calculate_bayesian_rating(
-    actual_rating: float,
-    predicted_rating: float,
-    num_reviews: int,
+    actual_rating: float | np.ndarray,
+    predicted_rating: float | np.ndarray,
+    num_reviews: int | np.ndarray,
     rating_weight: float,
-) -> float:
+) -> float | np.ndarray:
     weight_sum = num_reviews + rating_weight
     return (num_reviews / weight_sum * actual_rating) + (
         rating_weight / weight_sum * predicted_rating
     )
 
 
-def predict(
+def calculate_final_ratings(
     listings: DataFrame[ListingSchema],
     model: Any,
-    transformer: ColumnTransformer,
+    transformer: ColumnTransformer | PreprocessingPlan,
     min_reviews: int = DEFAULT_MIN_REVIEWS,
     rating_weight: float = DEFAULT_MIN_REVIEWS,
-) -> tuple[DataFrame[ListingSchema], list[float]]:
-    listings_copy = listings.copy()
-    listings_to_predict = listings_copy[
-        listings_copy[REVIEWS_AMOUNT_COLUMN] < min_reviews
-    ]
+    *,
+    cache: PredictionCache | None = None,
+    cache_namespace: str = "",
+) -> np.ndarray:
+    listings_to_predict = listings[listings[REVIEWS_AMOUNT_COLUMN] < min_reviews]
 
     predicted_ratings_series = pd.Series(
-        dtype=float, index=listings_copy.index, name=PREDICTED_RATING_COLUMN
+        dtype=float, index=listings.index, name=PREDICTED_RATING_COLUMN
     )
 
     if len(listings_to_predict) > 0:
-        predicted_ratings = predict_ratings(listings_to_predict, model, transformer)
+        predicted_ratings = predict_ratings(
+            listings_to_predict,
+            model,
+            transformer,
+            cache=cache,
+            cache_namespace=cache_namespace,
+        )
         predicted_ratings_series.loc[listings_to_predict.index] = (
             predicted_ratings.to_numpy()
         )
 
-    final_ratings = []
-
-    for index in listings_copy.index:
-        row = listings_copy.loc[index]
-        num_reviews = int(row[REVIEWS_AMOUNT_COLUMN] or 0)
-        actual_rating = row[REVIEW_SCORES_RATING_COLUMN]
-        actual_rating = None if pd.isna(actual_rating) else float(actual_rating)
-        predicted = (
-            float(predicted_ratings_series.loc[index])
-            if not pd.isna(predicted_ratings_series.loc[index])
-            else None
+    num_reviews = np.trunc(
+        listings[REVIEWS_AMOUNT_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+    )
+    num_reviews = np.nan_to_num(num_reviews, nan=0.0)
+    actual_ratings = listings[REVIEW_SCORES_RATING_COLUMN].to_numpy(
+        dtype=float, na_value=np.nan
+    )
+    predictions = predicted_ratings_series.to_numpy(dtype=float, na_value=np.nan)
+
+    has_no_actual = (num_reviews == 0) | np.isnan(actual_ratings)
+    has_no_predicted = np.isnan(predictions)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bayesian_ratings = calculate_bayesian_rating(
+            actual_ratings, predictions, num_reviews, rating_weight
         )
 
-        if num_reviews == 0 or actual_rating is None:
-            final_rating = predicted if predicted is not None else 0.0
-        elif num_reviews >= min_reviews or predicted is None:
-            final_rating = actual_rating
-        else:
-            final_rating = calculate_bayesian_rating(
-                actual_rating, predicted, num_reviews, rating_weight
-            )
+    return np.where(
+        has_no_actual,
+        np.where(has_no_predicted, 0.0, predictions),
+        np.where(
+            (num_reviews >= min_reviews) | has_no_predicted,
+            actual_ratings,
+            bayesian_ratings,
+        ),
+    )
+
+
+def sort_by_ratings(
+    listings: pd.DataFrame, final_ratings: np.ndarray
+) -> tuple[DataFrame[ListingSchema], list[float]]:
+    sorted_indices = np.argsort(-final_ratings, kind="stable")
+
+    sorted_listings = listings.iloc[sorted_indices].reset_index(drop=True)
+    sorted_ratings = final_ratings[sorted_indices].tolist()
+
+    return cast("DataFrame[ListingSchema]", sorted_listings), sorted_ratings
 
-        final_ratings.append(final_rating)
 
-    sorted_indices = sorted(
-        range(len(final_ratings)), key=lambda i: final_ratings[i], reverse=True
+def predict(
+    listings: DataFrame[ListingSchema],
+    model: Any,
+    transformer: ColumnTransformer | PreprocessingPlan,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+    *,
+    validation_policy: str = LISTING_VALIDATION_POLICY,
+) -> tuple[DataFrame[ListingSchema], list[float]]:
+    final_ratings = calculate_final_ratings(
+        listings, model, transformer, min_reviews, rating_weight
     )
+    sorted_listings, sorted_ratings = sort_by_ratings(listings, final_ratings)
 
-    sorted_listings = listings_copy.iloc[sorted_indices].reset_index(drop=True)
-    sorted_ratings = [final_ratings[i] for i in sorted_indices]
+    if validation_policy == "full":
+        sorted_listings = ListingSchema.validate(sorted_listings)
 
-    return ListingSchema.validate(sorted_listings), sorted_ratings
+    return sorted_listings, sorted_ratings
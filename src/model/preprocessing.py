@@ -1,13 +1,15 @@
 import warnings
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from pandera.typing import DataFrame
+from scipy import sparse
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import MultiLabelBinarizer, OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
 
 from constants import (
     AMENITIES_COLUMN,
@@ -16,32 +18,76 @@ from constants import (
     NUMERIC_COLUMNS,
 )
 from data.helpers import parse_amenities
+from instrumentation import record_stage
 from schemas import ListingSchema
 
 
 class AmenitiesTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self) -> None:
-        self.mlb = MultiLabelBinarizer()
+    """Multi-hot encodes the amenities column into a sparse CSR matrix.
+
+    Output columns follow the sorted amenity vocabulary seen during fit, the
+    same layout as ``MultiLabelBinarizer``; unknown amenities are ignored.
+    """
 
     def fit(self, X: pd.DataFrame, _y: Any = None) -> "AmenitiesTransformer":
-        amenities_list = X[AMENITIES_COLUMN].apply(parse_amenities).tolist()
-        self.mlb.fit(amenities_list)
+        amenities = set()
+        for amenities_str in X[AMENITIES_COLUMN].tolist():
+            amenities.update(parse_amenities(amenities_str))
+
+        self.classes_ = np.array(sorted(amenities), dtype=object)
+        self.vocabulary_ = {
+            amenity: index for index, amenity in enumerate(self.classes_.tolist())
+        }
         return self
 
-    def transform(self, X: pd.DataFrame) -> Any:
-        amenities_list = X[AMENITIES_COLUMN].apply(parse_amenities).tolist()
-        known_classes = set(self.mlb.classes_)
-        filtered_amenities = [
-            [amenity for amenity in amenities if amenity in known_classes]
-            for amenities in amenities_list
-        ]
-        return self.mlb.transform(filtered_amenities)
+    def transform(self, X: pd.DataFrame) -> sparse.csr_matrix:
+        vocabulary = self.vocabulary_
+        indices: list[int] = []
+        indptr = [0]
+
+        for amenities_str in X[AMENITIES_COLUMN].tolist():
+            indices.extend(
+                vocabulary[amenity]
+                for amenity in parse_amenities(amenities_str)
+                if amenity in vocabulary
+            )
+            indptr.append(len(indices))
+
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.float64),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(indptr) - 1, len(vocabulary)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0
+        return matrix
 
     def get_feature_names_out(self, _input_features: Any = None) -> list[str]:
-        return [f"amenity_{amenity}" for amenity in self.mlb.classes_]
-
-
-def get_transformer() -> ColumnTransformer:
+        return [f"amenity_{amenity}" for amenity in self.classes_]
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        mlb = state.pop("mlb", None)
+        if mlb is not None and "vocabulary_" not in state:
+            classes = mlb.classes_.tolist() if hasattr(mlb, "classes_") else []
+            state["classes_"] = np.array(classes, dtype=object)
+            state["vocabulary_"] = {
+                amenity: index for index, amenity in enumerate(classes)
+            }
+        super().__setstate__(state)
+
+
+def get_transformer(
+    sparse_output: bool = False, native_categorical: bool = False
+) -> ColumnTransformer:
+    """Builds the unfitted feature transformer.
+
+    With ``native_categorical`` the categorical columns are ordinal encoded
+    into one column each, with missing and unknown values as NaN, for models
+    that split on categories natively instead of on one-hot columns.
+    """
     numeric_pipeline = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy=IMPUTER_STRATEGY)),
@@ -49,9 +95,15 @@ def get_transformer() -> ColumnTransformer:
         ]
     )
 
-    categorical_transformer = OneHotEncoder(
-        handle_unknown="ignore", sparse_output=False, drop="first"
-    )
+    categorical_transformer: OneHotEncoder | OrdinalEncoder
+    if native_categorical:
+        categorical_transformer = OrdinalEncoder(
+            handle_unknown="use_encoded_value", unknown_value=np.nan
+        )
+    else:
+        categorical_transformer = OneHotEncoder(
+            handle_unknown="ignore", sparse_output=sparse_output, drop="first"
+        )
 
     amenities_transformer = AmenitiesTransformer()
 
@@ -62,6 +114,7 @@ def get_transformer() -> ColumnTransformer:
             ("amenities", amenities_transformer, [AMENITIES_COLUMN]),
         ],
         remainder="drop",
+        sparse_threshold=1.0 if sparse_output else 0,
     )
 
 
@@ -69,11 +122,18 @@ def prepare_data(
     listings: DataFrame[ListingSchema],
     fit: bool = True,
     transformer: ColumnTransformer | None = None,
-) -> tuple[pd.DataFrame, ColumnTransformer]:
+    sparse_output: bool = False,
+) -> tuple[pd.DataFrame | sparse.csr_matrix, ColumnTransformer]:
+    """Transforms listings into model features.
+
+    Transformers fitted with ``sparse_output=True`` return a CSR matrix whose
+    column names are ``transformer.get_feature_names_out()``; otherwise the
+    features come as a labelled dense DataFrame.
+    """
     if transformer is None:
-        transformer = get_transformer()
+        transformer = get_transformer(sparse_output)
 
-    with warnings.catch_warnings():
+    with record_stage("prepare_data"), warnings.catch_warnings():
         warnings.filterwarnings(
             "ignore",
             message="Found unknown categories.*",
@@ -85,6 +145,9 @@ def prepare_data(
         else:
             processed_listings = transformer.transform(listings)
 
+    if sparse.issparse(processed_listings):
+        return sparse.csr_matrix(processed_listings), transformer
+
     return (
         pd.DataFrame(processed_listings, columns=transformer.get_feature_names_out()),
         transformer,
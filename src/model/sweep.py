@@ -0,0 +1,236 @@
+import functools
+import hashlib
+import json
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, cast
+
+import joblib
+import pandas as pd
+from pandera.typing import DataFrame
+from sklearn.model_selection import ParameterGrid
+from threadpoolctl import threadpool_limits
+
+from constants import (
+    DEFAULT_DATASET_NAME,
+    DEFAULT_LEARNING_RATE,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_MAX_FEATURES,
+    DEFAULT_MIN_REVIEWS,
+    DEFAULT_MIN_SAMPLES_LEAF,
+    DEFAULT_MIN_SAMPLES_SPLIT,
+    DEFAULT_N_ESTIMATORS,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_SUBSAMPLE,
+    DEFAULT_TRAINING_ENGINE,
+    DEFAULT_TRANSFORMER_NAME,
+    FEATURE_CACHE_DIR,
+    MODEL_DIR,
+)
+from data import get_data_set_fingerprint
+from schemas import ListingSchema
+
+from .feature_cache import get_cached_feature_matrices
+from .features import FeatureMatrices, load_feature_matrices
+from .train import fit_model
+
+SWEEP_DEFAULTS: dict[str, Any] = {
+    "engine": DEFAULT_TRAINING_ENGINE,
+    "min_reviews": DEFAULT_MIN_REVIEWS,
+    "rating_weight": DEFAULT_MIN_REVIEWS,
+    "random_state": DEFAULT_RANDOM_STATE,
+    "n_estimators": DEFAULT_N_ESTIMATORS,
+    "max_depth": DEFAULT_MAX_DEPTH,
+    "min_samples_split": DEFAULT_MIN_SAMPLES_SPLIT,
+    "min_samples_leaf": DEFAULT_MIN_SAMPLES_LEAF,
+    "max_features": DEFAULT_MAX_FEATURES,
+    "learning_rate": DEFAULT_LEARNING_RATE,
+    "subsample": DEFAULT_SUBSAMPLE,
+}
+
+DATA_PARAMETERS = ("engine", "min_reviews", "random_state")
+
+
+def get_sweep_configs(
+    grid: dict[str, list[Any]] | list[dict[str, list[Any]]],
+) -> list[dict[str, Any]]:
+    """Expands ``grid`` like ``ParameterGrid`` into full training configs.
+
+    Parameters missing from the grid take the ``train_model.py`` defaults.
+    """
+    configs = []
+    for params in ParameterGrid(grid):
+        unknown = set(params) - set(SWEEP_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unsupported sweep parameters: {sorted(unknown)}.")
+        configs.append({**SWEEP_DEFAULTS, **params})
+    return configs
+
+
+def get_config_key(config: dict[str, Any], data_set: dict[str, Any]) -> str:
+    """Identifies ``config`` trained on the CSV fingerprinted by ``data_set``."""
+    return json.dumps({**data_set, **config}, sort_keys=True)
+
+
+def get_config_model_name(
+    config: dict[str, Any], data_set: dict[str, Any], model_prefix: str
+) -> str:
+    digest = hashlib.sha256(get_config_key(config, data_set).encode()).hexdigest()
+    return f"{model_prefix}-{digest[:12]}"
+
+
+def get_data_key(config: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(config[name] for name in DATA_PARAMETERS)
+
+
+def read_completed_configs(results_path: Path) -> set[str]:
+    if not results_path.exists():
+        return set()
+
+    columns = pd.read_csv(results_path, nrows=0).columns
+    if "data_set_sha256" not in columns:
+        raise ValueError(
+            f"{results_path} has no data set fingerprints, so its results cannot "
+            "be matched to the current CSV. Use a new results file."
+        )
+    return set(pd.read_csv(results_path, usecols=["config"])["config"])
+
+
+def append_result(results_path: Path, result: dict[str, Any]) -> None:
+    pd.DataFrame([result]).to_csv(
+        results_path, mode="a", header=not results_path.exists(), index=False
+    )
+
+
+@functools.cache
+def load_sweep_data(data_dir: Path) -> FeatureMatrices:
+    transformer = joblib.load(data_dir / DEFAULT_TRANSFORMER_NAME)
+    return load_feature_matrices(data_dir, transformer)
+
+
+def fit_sweep_config(
+    data_dir: Path,
+    config: dict[str, Any],
+    data_set: dict[str, Any],
+    model_name: str,
+    threads: int,
+) -> dict[str, Any]:
+    """Fits one config in a worker on the memory-mapped features of its split."""
+    matrices = load_sweep_data(data_dir)
+
+    with threadpool_limits(limits=threads):
+        _, metrics = fit_model(
+            matrices.train_features,
+            matrices.train_target,
+            matrices.validation_features,
+            matrices.validation_target,
+            matrices.transformer,
+            model_name=model_name,
+            **config,
+        )
+
+    return {
+        "config": get_config_key(config, data_set),
+        **data_set,
+        **config,
+        **metrics,
+        "model_path": str(MODEL_DIR / model_name),
+    }
+
+
+def prepare_sweep_data(
+    listings: DataFrame[ListingSchema],
+    configs: list[dict[str, Any]],
+    *,
+    mode: str = "use",
+    cache_dir: Path = FEATURE_CACHE_DIR,
+) -> dict[tuple[Any, ...], Path]:
+    """Returns the feature cache entry of every engine, filter and split.
+
+    Entries missing from the cache are prepared once each, so the workers only
+    memory-map ready matrices.
+    """
+    if mode not in ("use", "rebuild"):
+        raise ValueError(f"Sweeps need the feature cache, got mode: {mode}.")
+
+    entry_dirs: dict[tuple[Any, ...], Path] = {}
+    for config in configs:
+        data_key = get_data_key(config)
+        if data_key in entry_dirs:
+            continue
+
+        _, entry_dir = get_cached_feature_matrices(
+            listings,
+            min_reviews=config["min_reviews"],
+            random_state=config["random_state"],
+            engine=config["engine"],
+            mode=mode,
+            cache_dir=cache_dir,
+        )
+        entry_dirs[data_key] = cast("Path", entry_dir)
+
+    return entry_dirs
+
+
+def run_sweep(
+    load_listings: Callable[[], DataFrame[ListingSchema]],
+    configs: list[dict[str, Any]],
+    results_path: Path,
+    *,
+    workers: int = 1,
+    model_prefix: str = "sweep",
+    data_set_name: str = DEFAULT_DATASET_NAME,
+    feature_cache: str = "use",
+    cache_dir: Path = FEATURE_CACHE_DIR,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+) -> pd.DataFrame:
+    """Trains every config missing from ``results_path`` in a process pool.
+
+    ``load_listings`` is only called when a config is pending. The features
+    come from the feature cache, prepared at most once per engine,
+    ``min_reviews`` and ``random_state``, and are memory-mapped by the
+    ``workers`` processes, so the CSV is never reloaded and the transformer is
+    never refitted per config. ``feature_cache`` is ``use`` or ``rebuild``.
+    Each result row is appended to ``results_path`` as soon as its model is
+    saved, so an interrupted sweep resumes where it stopped. Rows are keyed by
+    the fingerprint of the ``data_set_name`` CSV that ``load_listings`` reads
+    too, so configs are trained again once the data set changes.
+    """
+    data_set = get_data_set_fingerprint(data_set_name)
+    completed = read_completed_configs(results_path)
+    pending = [
+        config
+        for config in configs
+        if get_config_key(config, data_set) not in completed
+    ]
+
+    if pending:
+        entry_dirs = prepare_sweep_data(
+            load_listings(), pending, mode=feature_cache, cache_dir=cache_dir
+        )
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    fit_sweep_config,
+                    entry_dirs[get_data_key(config)],
+                    config,
+                    data_set,
+                    get_config_model_name(config, data_set, model_prefix),
+                    threads,
+                )
+                for config in pending
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                append_result(results_path, result)
+                if on_result is not None:
+                    on_result(result)
+
+    if not results_path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(results_path)
@@ -1,15 +1,16 @@
-import json
+import copy
+import time
 
-import joblib
 import numpy as np
 import pandas as pd
 from pandera.typing import DataFrame
-from sklearn.ensemble import GradientBoostingRegressor
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import (
     mean_absolute_error,
     mean_squared_error,
 )
-from sklearn.model_selection import train_test_split
 
 from constants import (
     DEFAULT_LEARNING_RATE,
@@ -18,47 +19,34 @@ from constants import (
     DEFAULT_MIN_REVIEWS,
     DEFAULT_MIN_SAMPLES_LEAF,
     DEFAULT_MIN_SAMPLES_SPLIT,
-    DEFAULT_MODEL_CONFIG_NAME,
     DEFAULT_MODEL_NAME,
     DEFAULT_N_ESTIMATORS,
     DEFAULT_RANDOM_STATE,
     DEFAULT_SUBSAMPLE,
-    DEFAULT_TRANSFORMER_NAME,
+    DEFAULT_TRAINING_ENGINE,
     MODEL_DIR,
-    REVIEW_SCORES_RATING_COLUMN,
+    TRAINING_ENGINES,
+    VALIDATION_CURVE_NAME,
 )
-from data import get_listings_without_small_amount_of_reviews
+from instrumentation import record_stage
 from schemas import ListingSchema
 
-from .preprocessing import prepare_data
+from .artifacts import save_artifact_bundle
+from .feature_cache import get_cached_feature_matrices
 
+type Regressor = GradientBoostingRegressor | HistGradientBoostingRegressor
 
-def split_data(
-    listings: DataFrame[ListingSchema],
-    random_state: int = DEFAULT_RANDOM_STATE,
-) -> tuple[
-    DataFrame[ListingSchema], DataFrame[ListingSchema], DataFrame[ListingSchema]
-]:
-    train_listings, validation_and_test_listings = train_test_split(
-        listings,
-        test_size=0.3,
-        random_state=random_state,
-    )
-
-    validation_listings, test_listings = train_test_split(
-        validation_and_test_listings,
-        test_size=0.5,
-        random_state=random_state,
-    )
 
-    return train_listings, validation_listings, test_listings
+def get_categorical_features(transformer: ColumnTransformer) -> np.ndarray:
+    categorical_features = np.zeros(len(transformer.get_feature_names_out()), bool)
+    categorical_features[transformer.output_indices_["cat"]] = True
+    return categorical_features
 
 
-def train_model(
-    listings: DataFrame[ListingSchema],
-    min_reviews: int = DEFAULT_MIN_REVIEWS,
-    rating_weight: float = DEFAULT_MIN_REVIEWS,
-    model_name: str = DEFAULT_MODEL_NAME,
+def build_model(
+    engine: str,
+    transformer: ColumnTransformer,
+    *,
     random_state: int = DEFAULT_RANDOM_STATE,
     n_estimators: int = DEFAULT_N_ESTIMATORS,
     max_depth: int | None = DEFAULT_MAX_DEPTH,
@@ -67,32 +55,155 @@ def train_model(
     max_features: str = DEFAULT_MAX_FEATURES,
     learning_rate: float = DEFAULT_LEARNING_RATE,
     subsample: float = DEFAULT_SUBSAMPLE,
-) -> tuple[GradientBoostingRegressor, dict[str, float], pd.DataFrame, pd.Series]:
-    filtered_listings = get_listings_without_small_amount_of_reviews(
-        listings, min_reviews
-    ).copy()
+) -> Regressor:
+    """Creates the unfitted regressor of ``engine``.
 
-    train_listings, validation_listings, test_listings = split_data(
-        filtered_listings, random_state
+    The ``hist`` engine bins features into histograms, runs on all cores and
+    splits natively on the ordinal encoded ``cat`` columns of ``transformer``.
+    It takes ``n_estimators`` as its number of boosting iterations and has no
+    counterpart for ``min_samples_split``, ``max_features`` and ``subsample``.
+    """
+    if engine == "hist":
+        return HistGradientBoostingRegressor(
+            max_iter=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            learning_rate=learning_rate,
+            categorical_features=get_categorical_features(transformer),
+            early_stopping=False,
+            random_state=random_state,
+        )
+
+    if engine not in TRAINING_ENGINES:
+        raise ValueError(f"Unsupported training engine: {engine}.")
+
+    return GradientBoostingRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_split=min_samples_split,
+        min_samples_leaf=min_samples_leaf,
+        max_features=max_features,
+        learning_rate=learning_rate,
+        subsample=subsample,
+        random_state=random_state,
     )
 
-    train_features, transformer = prepare_data(train_listings, fit=True)
 
-    train_target = train_listings[REVIEW_SCORES_RATING_COLUMN]
+def save_model(
+    model: Regressor,
+    transformer: ColumnTransformer,
+    *,
+    model_name: str = DEFAULT_MODEL_NAME,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+) -> None:
+    config = {
+        "min_reviews": min_reviews,
+        "rating_weight": rating_weight,
+    }
+
+    with record_stage("save_model"):
+        save_artifact_bundle(MODEL_DIR / model_name, model, transformer, config)
 
-    validation_processed_listings, _ = prepare_data(
-        validation_listings, fit=False, transformer=transformer
-    )
 
-    validation_target = validation_listings[REVIEW_SCORES_RATING_COLUMN]
+def get_stage_count(model: Regressor) -> int:
+    if isinstance(model, HistGradientBoostingRegressor):
+        return len(model._predictors)
+    return len(model.estimators_)
 
-    test_processed_listings, _ = prepare_data(
-        test_listings, fit=False, transformer=transformer
-    )
 
-    test_target = test_listings[REVIEW_SCORES_RATING_COLUMN]
+def truncate_model(model: Regressor, n_estimators: int) -> Regressor:
+    """Returns a copy of ``model`` that keeps its first ``n_estimators`` stages.
+
+    Boosting stages only depend on the earlier ones, so the copy predicts the
+    same as a model fitted with ``n_estimators`` and the same random state.
+    """
+    stage_count = get_stage_count(model)
+    if not 1 <= n_estimators <= stage_count:
+        raise ValueError(
+            f"Cannot truncate a model with {stage_count} stages to {n_estimators}."
+        )
+
+    truncated = copy.copy(model)
+    if isinstance(truncated, HistGradientBoostingRegressor):
+        truncated._predictors = truncated._predictors[:n_estimators]
+        truncated.train_score_ = truncated.train_score_[: n_estimators + 1]
+        truncated.validation_score_ = truncated.validation_score_[: n_estimators + 1]
+        truncated.max_iter = n_estimators
+        return truncated
+
+    truncated.estimators_ = truncated.estimators_[:n_estimators]
+    truncated.train_score_ = truncated.train_score_[:n_estimators]
+    if hasattr(truncated, "oob_scores_"):
+        truncated.oob_improvement_ = truncated.oob_improvement_[:n_estimators]
+        truncated.oob_scores_ = truncated.oob_scores_[:n_estimators]
+        truncated.oob_score_ = truncated.oob_scores_[-1]
+    truncated.n_estimators_ = n_estimators
+    truncated.n_estimators = n_estimators
+    return truncated
+
+
+def get_validation_curve(
+    model: Regressor,
+    validation_features: pd.DataFrame | sparse.csr_matrix,
+    validation_target: pd.Series,
+) -> pd.DataFrame:
+    """Scores every stage count of ``model`` from one pass of staged prediction."""
+    rows = [
+        {
+            "n_estimators": n_estimators,
+            "mae": mean_absolute_error(validation_target, predictions),
+            "rmse": np.sqrt(mean_squared_error(validation_target, predictions)),
+        }
+        for n_estimators, predictions in enumerate(
+            model.staged_predict(validation_features), start=1
+        )
+    ]
+    return pd.DataFrame(rows)
+
+
+def fit_model(
+    train_features: pd.DataFrame | sparse.csr_matrix,
+    train_target: pd.Series,
+    validation_features: pd.DataFrame | sparse.csr_matrix,
+    validation_target: pd.Series,
+    transformer: ColumnTransformer,
+    *,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    save: bool = True,
+    staged_n_estimators: list[int] | None = None,
+    model_name: str = DEFAULT_MODEL_NAME,
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    n_estimators: int = DEFAULT_N_ESTIMATORS,
+    max_depth: int | None = DEFAULT_MAX_DEPTH,
+    min_samples_split: int = DEFAULT_MIN_SAMPLES_SPLIT,
+    min_samples_leaf: int = DEFAULT_MIN_SAMPLES_LEAF,
+    max_features: str = DEFAULT_MAX_FEATURES,
+    learning_rate: float = DEFAULT_LEARNING_RATE,
+    subsample: float = DEFAULT_SUBSAMPLE,
+) -> tuple[Regressor, dict[str, float]]:
+    """Fits the model on prepared features and saves it with its transformer.
+
+    The metrics hold the validation MAE and RMSE and the fit time in seconds.
+    With ``save=False`` nothing is written, which is how engines are compared.
+
+    When ``staged_n_estimators`` is given, the validation curve of every stage
+    count is saved as ``VALIDATION_CURVE_NAME`` next to the model, the best
+    count is added to the metrics and a truncated copy of the model is saved
+    as ``<model_name>_n<count>`` for each listed count.
+    """
+    for count in staged_n_estimators or []:
+        if not 1 <= count <= n_estimators:
+            raise ValueError(
+                f"Staged estimator counts must be between 1 and {n_estimators}."
+            )
 
-    model = GradientBoostingRegressor(
+    model = build_model(
+        engine,
+        transformer,
+        random_state=random_state,
         n_estimators=n_estimators,
         max_depth=max_depth,
         min_samples_split=min_samples_split,
@@ -100,33 +211,116 @@ def train_model(
         max_features=max_features,
         learning_rate=learning_rate,
         subsample=subsample,
-        random_state=random_state,
     )
-    model.fit(train_features, train_target)
 
-    validation_predictions = model.predict(validation_processed_listings)
+    with record_stage("fit"):
+        start = time.perf_counter()
+        model.fit(train_features, train_target)
+        fit_seconds = time.perf_counter() - start
+
+    with record_stage("predict"):
+        validation_predictions = model.predict(validation_features)
 
     metrics = {
         "mae": mean_absolute_error(validation_target, validation_predictions),
         "rmse": np.sqrt(mean_squared_error(validation_target, validation_predictions)),
+        "fit_seconds": fit_seconds,
     }
 
-    model_folder = MODEL_DIR / model_name
-    model_folder.mkdir(parents=True, exist_ok=True)
+    if staged_n_estimators is not None:
+        with record_stage("validation_curve"):
+            validation_curve = get_validation_curve(
+                model, validation_features, validation_target
+            )
+        best = validation_curve.iloc[validation_curve["mae"].argmin()]
+        metrics["best_n_estimators"] = float(best["n_estimators"])
+        metrics["best_mae"] = float(best["mae"])
+        metrics["best_rmse"] = float(best["rmse"])
 
-    model_path = model_folder / DEFAULT_MODEL_NAME
-    transformer_path = model_folder / DEFAULT_TRANSFORMER_NAME
-    config_path = model_folder / DEFAULT_MODEL_CONFIG_NAME
+    if save:
+        save_model(
+            model,
+            transformer,
+            model_name=model_name,
+            min_reviews=min_reviews,
+            rating_weight=rating_weight,
+        )
 
-    joblib.dump(model, model_path)
-    joblib.dump(transformer, transformer_path)
+        if staged_n_estimators is not None:
+            validation_curve.to_csv(
+                MODEL_DIR / model_name / VALIDATION_CURVE_NAME, index=False
+            )
+            for count in staged_n_estimators:
+                save_model(
+                    truncate_model(model, count),
+                    transformer,
+                    model_name=f"{model_name}_n{count}",
+                    min_reviews=min_reviews,
+                    rating_weight=rating_weight,
+                )
 
-    config = {
-        "min_reviews": min_reviews,
-        "rating_weight": rating_weight,
-    }
+    return model, metrics
+
+
+def train_model(
+    listings: DataFrame[ListingSchema],
+    min_reviews: int = DEFAULT_MIN_REVIEWS,
+    rating_weight: float = DEFAULT_MIN_REVIEWS,
+    model_name: str = DEFAULT_MODEL_NAME,
+    random_state: int = DEFAULT_RANDOM_STATE,
+    n_estimators: int = DEFAULT_N_ESTIMATORS,
+    max_depth: int | None = DEFAULT_MAX_DEPTH,
+    min_samples_split: int = DEFAULT_MIN_SAMPLES_SPLIT,
+    min_samples_leaf: int = DEFAULT_MIN_SAMPLES_LEAF,
+    max_features: str = DEFAULT_MAX_FEATURES,
+    learning_rate: float = DEFAULT_LEARNING_RATE,
+    subsample: float = DEFAULT_SUBSAMPLE,
+    sparse_output: bool = False,
+    engine: str = DEFAULT_TRAINING_ENGINE,
+    save: bool = True,
+    staged_n_estimators: list[int] | None = None,
+    feature_cache: str = "off",
+) -> tuple[
+    Regressor,
+    dict[str, float],
+    pd.DataFrame | sparse.csr_matrix,
+    pd.Series,
+]:
+    """Splits, transforms and fits ``listings``.
 
-    with config_path.open("w") as f:
-        json.dump(config, f)
+    With ``feature_cache`` set to a mode of ``FEATURE_CACHE_MODES`` other than
+    ``off``, the fitted transformer and the transformed splits are reused from
+    the feature cache when the listings and preprocessing settings match.
+    """
+    matrices, _ = get_cached_feature_matrices(
+        listings,
+        min_reviews=min_reviews,
+        random_state=random_state,
+        engine=engine,
+        sparse_output=sparse_output,
+        mode=feature_cache,
+    )
+
+    model, metrics = fit_model(
+        matrices.train_features,
+        matrices.train_target,
+        matrices.validation_features,
+        matrices.validation_target,
+        matrices.transformer,
+        engine=engine,
+        save=save,
+        staged_n_estimators=staged_n_estimators,
+        model_name=model_name,
+        min_reviews=min_reviews,
+        rating_weight=rating_weight,
+        random_state=random_state,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_split=min_samples_split,
+        min_samples_leaf=min_samples_leaf,
+        max_features=max_features,
+        learning_rate=learning_rate,
+        subsample=subsample,
+    )
 
-    return model, metrics, test_processed_listings, test_target
+    return model, metrics, matrices.test_features, matrices.test_target
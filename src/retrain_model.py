@@ -0,0 +1,212 @@
+import argparse
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from pandera.typing import DataFrame
+
+from constants import (
+    DEFAULT_DATASET_NAME,
+    DEFAULT_RANDOM_STATE,
+    DEFAULT_RETRAIN_MIN_SAMPLES_LEAF,
+    DEFAULT_RETRAIN_N_ESTIMATORS,
+    PREDICTION_LOG_DIR,
+    PREDICTION_LOG_NAME,
+    PREDICTION_LOG_SEGMENT_DIR,
+)
+from data import (
+    LISTINGS_CACHE_MODES,
+    get_cached_listings,
+    get_listings,
+    get_logged_listings,
+    select_segments,
+)
+from model import retrain_model
+from schemas import ListingSchema
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("true", "1", "yes", "on")
+
+
+def get_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Add boosting stages fitted on new listings to an existing model and "
+            "save them as a new model version"
+        )
+    )
+
+    parser.add_argument(
+        "--base-model",
+        type=str,
+        required=True,
+        help="Model folder under MODEL_DIR to extend",
+    )
+
+    parser.add_argument(
+        "--model-name",
+        type=str,
+        default=None,
+        help="Name of the new version (default: <base-model>_v<next version>)",
+    )
+
+    parser.add_argument(
+        "--delta-dataset",
+        type=str,
+        default=None,
+        help="CSV in the datasets folder with new or updated listings",
+    )
+
+    parser.add_argument(
+        "--from-logs",
+        type=parse_bool,
+        default=False,
+        help=(
+            "Also take the latest logged input of every listing in the prediction "
+            "logs, including predictions.log"
+        ),
+    )
+
+    parser.add_argument(
+        "--log-dir",
+        type=Path,
+        default=PREDICTION_LOG_SEGMENT_DIR,
+        help=f"Prediction log segment folder (default: {PREDICTION_LOG_SEGMENT_DIR})",
+    )
+
+    parser.add_argument(
+        "--since",
+        type=str,
+        default=None,
+        help="Only read log segments with predictions from this ISO timestamp on",
+    )
+
+    parser.add_argument(
+        "--extra-estimators",
+        type=int,
+        default=DEFAULT_RETRAIN_N_ESTIMATORS,
+        help=(
+            "Boosting stages to add to the base model "
+            f"(default: {DEFAULT_RETRAIN_N_ESTIMATORS})"
+        ),
+    )
+
+    parser.add_argument(
+        "--min-samples-leaf",
+        type=int,
+        default=DEFAULT_RETRAIN_MIN_SAMPLES_LEAF,
+        help=(
+            "Minimum listings per leaf of the added trees "
+            f"(default: {DEFAULT_RETRAIN_MIN_SAMPLES_LEAF})"
+        ),
+    )
+
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default=DEFAULT_DATASET_NAME,
+        help=(
+            "Dataset the base model was trained on, used to skip unchanged "
+            f"listings and for the full retrain (default: {DEFAULT_DATASET_NAME})"
+        ),
+    )
+
+    parser.add_argument(
+        "--listings-cache",
+        choices=LISTINGS_CACHE_MODES,
+        default="use",
+        help=(
+            "Cleaned listings cache: use it, rebuild it from the CSV, clear it "
+            "or bypass it with off (default: use)"
+        ),
+    )
+
+    parser.add_argument(
+        "--full-retrain",
+        type=parse_bool,
+        default=True,
+        help=(
+            "Also retrain from scratch on the updated dataset, without saving, to "
+            "compare time and metrics (default: true)"
+        ),
+    )
+
+    parser.add_argument(
+        "--random-state",
+        type=int,
+        default=DEFAULT_RANDOM_STATE,
+    )
+
+    arguments = parser.parse_args()
+
+    if arguments.delta_dataset is None and not arguments.from_logs:
+        parser.error("give --delta-dataset, --from-logs true or both")
+
+    if arguments.extra_estimators < 1:
+        parser.error("--extra-estimators must be at least 1")
+
+    return arguments
+
+
+def load_delta_listings(
+    delta_dataset: str | None, from_logs: bool, log_dir: Path, since: str | None
+) -> DataFrame[ListingSchema]:
+    sources = []
+    if delta_dataset is not None:
+        sources.append(get_listings(delta_dataset))
+
+    if from_logs:
+        log_paths = select_segments(log_dir, start=since)
+        legacy_log_path = PREDICTION_LOG_DIR / PREDICTION_LOG_NAME
+        if legacy_log_path.exists():
+            log_paths.append(legacy_log_path)
+        sources.append(get_logged_listings(log_paths))
+
+    return pd.concat(sources).drop_duplicates("id", keep="last")
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(
+        f"\n{report['delta_listings']} new listings, "
+        f"{report['evaluation_listings']} held out for evaluation"
+    )
+    print(f"\n{'model':<14}{'time [s]':>10}{'MAE':>10}{'RMSE':>10}")
+    for name in ("base", "incremental", "full_retrain"):
+        if name in report:
+            metrics = report[name]
+            seconds = f"{metrics['seconds']:.2f}" if "seconds" in metrics else "-"
+            print(
+                f"{name:<14}{seconds:>10}{metrics['mae']:>10.4f}{metrics['rmse']:>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    arguments = get_arguments()
+
+    print("Loading new listings...")
+    delta_listings = load_delta_listings(
+        arguments.delta_dataset, arguments.from_logs, arguments.log_dir, arguments.since
+    )
+
+    print("Loading base listings...")
+    base_listings = get_cached_listings(
+        arguments.dataset, mode=arguments.listings_cache
+    )
+
+    print(
+        f"Adding {arguments.extra_estimators} estimators to {arguments.base_model}..."
+    )
+    _, report = retrain_model(
+        delta_listings,
+        base_model_name=arguments.base_model,
+        model_name=arguments.model_name,
+        extra_estimators=arguments.extra_estimators,
+        min_samples_leaf=arguments.min_samples_leaf,
+        base_listings=base_listings,
+        full_retrain=arguments.full_retrain,
+        random_state=arguments.random_state,
+    )
+
+    print(f"\nModel {report['model']} saved.")
+    print_report(report)
@@ -1,8 +1,11 @@
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from service import router
+from service.services.logging import prediction_log_writer
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,6 +13,14 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    prediction_log_writer.start()
+    yield
+    prediction_log_writer.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router)
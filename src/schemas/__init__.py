@@ -1,4 +1,5 @@
+from .compiled_schema import CompiledSchema, compile_schema
 from .listing_api_schema import Listing
 from .listing_schema import ListingSchema
 
-__all__ = ["Listing", "ListingSchema"]
+__all__ = ["CompiledSchema", "Listing", "ListingSchema", "compile_schema"]
@@ -0,0 +1,116 @@
+import operator
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pandera.pandas as pa
+
+BOUND_CHECKS: dict[str, tuple[str, Callable[[Any, Any], Any]]] = {
+    "greater_than": ("min_value", operator.le),
+    "greater_than_or_equal_to": ("min_value", operator.lt),
+    "less_than": ("max_value", operator.ge),
+    "less_than_or_equal_to": ("max_value", operator.gt),
+}
+
+
+class CompiledColumn:
+    def __init__(
+        self,
+        *,
+        name: str,
+        dtype: Any,
+        nullable: bool,
+        unique: bool,
+        bounds: list[tuple[str, float, Callable[[Any, Any], Any]]],
+    ) -> None:
+        self.name = name
+        self.dtype = dtype
+        self.nullable = nullable
+        self.unique = unique
+        self.bounds = bounds
+
+    def validate(self, values: pd.Series) -> pd.Series:
+        if values.dtype != self.dtype:
+            try:
+                values = values.astype(self.dtype)
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Column '{self.name}' cannot be coerced to {self.dtype}: {e}"
+                ) from e
+
+        if not self.nullable and values.isna().any():
+            raise ValueError(f"Column '{self.name}' contains null values.")
+
+        if self.unique and values.duplicated().any():
+            raise ValueError(f"Column '{self.name}' contains duplicate values.")
+
+        if self.bounds:
+            numbers = values.to_numpy(dtype=float, na_value=np.nan)
+            for check_name, bound, is_violated in self.bounds:
+                if is_violated(numbers, bound).any():
+                    raise ValueError(
+                        f"Column '{self.name}' failed {check_name}({bound})."
+                    )
+
+        return values
+
+
+class CompiledSchema:
+    """Validates dataframes against a pandera schema without pandera.
+
+    Columns are coerced with ``astype`` and checked with NumPy comparisons,
+    which gives the same result as ``schema.validate`` for the supported
+    checks at a fraction of its fixed per-call overhead.
+    """
+
+    def __init__(self, columns: list[CompiledColumn]) -> None:
+        self.columns = columns
+
+    def validate(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        missing = [
+            column.name for column in self.columns if column.name not in dataframe
+        ]
+        if missing:
+            raise ValueError(f"Columns {missing} are missing from the dataframe.")
+
+        validated = dict(dataframe.items())
+        for column in self.columns:
+            validated[column.name] = column.validate(dataframe[column.name])
+
+        return pd.DataFrame(validated, index=dataframe.index, copy=False)
+
+
+def compile_column(name: str, column: pa.Column) -> CompiledColumn:
+    bounds = []
+    for check in column.checks:
+        if check.name not in BOUND_CHECKS:
+            raise ValueError(f"Check {check.name} of column '{name}' is not supported.")
+        statistic, is_violated = BOUND_CHECKS[check.name]
+        bounds.append((check.name, check.statistics[statistic], is_violated))
+
+    return CompiledColumn(
+        name=name,
+        dtype=column.dtype.type,
+        nullable=column.nullable,
+        unique=column.unique,
+        bounds=bounds,
+    )
+
+
+def compile_schema(schema: pa.DataFrameSchema) -> CompiledSchema:
+    """Compiles the column rules of ``schema`` into a ``CompiledSchema``.
+
+    Only coerced, non-strict schemas with bound checks are supported, which is
+    what ``ListingSchema`` uses.
+    """
+    if schema.strict or schema.unique or schema.index is not None:
+        raise ValueError("Only non-strict schemas without index rules are supported.")
+
+    columns = []
+    for name, column in schema.columns.items():
+        if not column.coerce or not column.required:
+            raise ValueError(f"Column '{name}' must be coerced and required.")
+        columns.append(compile_column(name, column))
+
+    return CompiledSchema(columns)
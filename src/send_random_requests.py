@@ -5,7 +5,7 @@ import string
 import requests
 
 from constants import DEFAULT_SERVICE_URL, HTTP_OK
-from data import get_listings
+from data import LISTINGS_CACHE_MODES, get_cached_listings
 from schemas import Listing
 from service.services.listings import dataframe_to_listings
 
@@ -14,8 +14,8 @@ def generate_random_user_id() -> str:
     return "".join(random.choices(string.ascii_lowercase + string.digits, k=10))
 
 
-def load_listings_from_csv() -> list[Listing]:
-    listings_dataframe = get_listings()
+def load_listings_from_csv(listings_cache: str = "use") -> list[Listing]:
+    listings_dataframe = get_cached_listings(mode=listings_cache)
     return dataframe_to_listings(listings_dataframe)
 
 
@@ -57,7 +57,7 @@ def send_request(
         return False
 
 
-def get_arguments() -> tuple[int, str]:
+def get_arguments() -> tuple[int, str, str]:
     parser = argparse.ArgumentParser(
         description="Send random requests to the ranking service"
     )
@@ -73,17 +73,26 @@ def get_arguments() -> tuple[int, str]:
         default=DEFAULT_SERVICE_URL,
         help=f"Service URL (default: {DEFAULT_SERVICE_URL})",
     )
+    parser.add_argument(
+        "--listings-cache",
+        choices=LISTINGS_CACHE_MODES,
+        default="use",
+        help=(
+            "Cleaned listings cache: use it, rebuild it from the CSV, clear it "
+            "or bypass it with off (default: use)"
+        ),
+    )
 
     arguments = parser.parse_args()
 
-    return arguments.num_requests, arguments.service_url
+    return arguments.num_requests, arguments.service_url, arguments.listings_cache
 
 
 if __name__ == "__main__":
-    num_requests, service_url = get_arguments()
+    num_requests, service_url, listings_cache = get_arguments()
 
     print("Loading listings from CSV...")
-    all_listings = load_listings_from_csv()
+    all_listings = load_listings_from_csv(listings_cache)
     print(f"Loaded {len(all_listings)} listings from CSV")
 
     print(f"Sending {num_requests} requests to {service_url}")
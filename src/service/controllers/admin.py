@@ -1,6 +1,7 @@
 import shutil
 
 from fastapi import APIRouter, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
 from constants import (
     DEFAULT_MODEL_CONFIG_NAME,
@@ -9,12 +10,22 @@ from constants import (
     MAX_MODELS,
     SERVICE_MODEL_DIR,
 )
+from model.artifacts import convert_to_artifact_bundle
 from service.schemas.schema import (
     AvailableModelsResponse,
     DeleteModelResponse,
+    ModelCacheStatsResponse,
+    PredictionCacheStatsResponse,
+    PredictionLogStatsResponse,
     UploadModelResponse,
 )
-from service.services.model import get_models, validate_model_config
+from service.services.logging import prediction_log_writer
+from service.services.model import (
+    get_models,
+    model_registry,
+    prediction_cache,
+    validate_model_config,
+)
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
@@ -24,6 +35,21 @@ async def get_available_models() -> AvailableModelsResponse:
     return AvailableModelsResponse(models=[model.name for model in get_models()])
 
 
+@router.get("/models/cache", response_model=ModelCacheStatsResponse)
+async def get_model_cache_stats() -> ModelCacheStatsResponse:
+    return ModelCacheStatsResponse(**model_registry.get_stats())
+
+
+@router.get("/prediction-cache", response_model=PredictionCacheStatsResponse)
+async def get_prediction_cache_stats() -> PredictionCacheStatsResponse:
+    return PredictionCacheStatsResponse(**prediction_cache.get_stats())
+
+
+@router.get("/prediction-log", response_model=PredictionLogStatsResponse)
+async def get_prediction_log_stats() -> PredictionLogStatsResponse:
+    return PredictionLogStatsResponse(**prediction_log_writer.get_stats())
+
+
 @router.post("/models", response_model=UploadModelResponse)
 async def upload_model(
     model_name: str,
@@ -79,14 +105,22 @@ async def upload_model(
         transformer_path = model_folder / DEFAULT_TRANSFORMER_NAME
         config_path = model_folder / DEFAULT_MODEL_CONFIG_NAME
 
-        with model_path.open("wb") as f:
-            shutil.copyfileobj(model_file.file, f)
+        try:
+            with model_path.open("wb") as f:
+                shutil.copyfileobj(model_file.file, f)
+
+            with transformer_path.open("wb") as f:
+                shutil.copyfileobj(transformer_file.file, f)
 
-        with transformer_path.open("wb") as f:
-            shutil.copyfileobj(transformer_file.file, f)
+            with config_path.open("wb") as f:
+                f.write(config_content)
 
-        with config_path.open("wb") as f:
-            f.write(config_content)
+            await run_in_threadpool(convert_to_artifact_bundle, model_folder)
+        except Exception:
+            shutil.rmtree(model_folder, ignore_errors=True)
+            raise
+
+        model_registry.refresh()
 
         return UploadModelResponse(
             message=f"Model {model_name} uploaded successfully.",
@@ -113,6 +147,8 @@ async def delete_model(model_name: str) -> DeleteModelResponse:
 
         shutil.rmtree(model_folder)
 
+        model_registry.refresh()
+
         return DeleteModelResponse(
             message=f"Model {model_name} deleted successfully.",
         )
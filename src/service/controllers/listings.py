@@ -1,5 +1,7 @@
 import logging
+from typing import Any
 
+import numpy as np
 import pandas as pd
 from fastapi import APIRouter, HTTPException
 from scipy.stats import spearmanr
@@ -8,78 +10,171 @@ from constants import (
     MIN_PAIRS_FOR_CORRELATION,
     REVIEW_SCORES_RATING_COLUMN,
 )
-from model.predict import predict
+from model.predict import calculate_final_ratings, sort_by_ratings
+from schemas import Listing
 from service.schemas.schema import (
+    BatchRankListingsRequest,
+    BatchRankListingsResponse,
     RankListingsRequest,
     RankListingsResponse,
 )
-from service.services.listings import dataframe_to_listings, listings_to_dataframe
+from service.services.listings import (
+    dataframe_to_listings,
+    listing_batches_to_dataframe,
+    listings_to_dataframe,
+    validate_ranked_listings,
+)
 from service.services.logging import log_prediction
-from service.services.model import load_model
+from service.services.model import (
+    group_users_by_model,
+    load_model,
+    load_model_from_folder,
+    prediction_cache,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["listings"])
 
 
+def get_spearman_correlation(
+    original_ratings: list[Any], final_ratings: list[float]
+) -> float | None:
+    valid_pairs = [
+        (original, final)
+        for original, final in zip(original_ratings, final_ratings, strict=True)
+        if original is not None
+        and not pd.isna(original)
+        and final is not None
+        and not pd.isna(final)
+    ]
+
+    if len(valid_pairs) < MIN_PAIRS_FOR_CORRELATION:
+        return None
+
+    valid_original, valid_final = zip(*valid_pairs, strict=True)
+    spearman_correlation, _ = spearmanr(valid_original, valid_final)
+    return float(spearman_correlation)
+
+
+def build_rank_response(
+    user_id: str,
+    model_name: str,
+    input_listings: list[Listing],
+    listings_dataframe: pd.DataFrame,
+    final_ratings: np.ndarray,
+) -> RankListingsResponse:
+    ranked_listings_dataframe, sorted_ratings = sort_by_ratings(
+        listings_dataframe, final_ratings
+    )
+    final_ratings_original_order = final_ratings.tolist()
+
+    spearman_correlation = get_spearman_correlation(
+        listings_dataframe[REVIEW_SCORES_RATING_COLUMN].tolist(),
+        final_ratings_original_order,
+    )
+
+    ranked_listings = dataframe_to_listings(
+        validate_ranked_listings(ranked_listings_dataframe)
+    )
+
+    log_prediction(
+        user_id=user_id,
+        model_name=model_name,
+        input_listings=input_listings,
+        predictions=final_ratings_original_order,
+    )
+
+    return RankListingsResponse(
+        ratings=sorted_ratings,
+        listings=ranked_listings,
+        spearman_correlation=spearman_correlation,
+    )
+
+
 @router.post("/rank-listings")
 def rank_listings(request: RankListingsRequest) -> RankListingsResponse:
     try:
         listings_dataframe = listings_to_dataframe(request.listings)
-        model, transformer, min_reviews, rating_weight, model_name = load_model(
-            request.user_id
+        model, transformer, min_reviews, rating_weight, model_name, cache_namespace = (
+            load_model(request.user_id)
         )
         logger.info(f"Model chosen for {request.user_id}: {model_name}")
 
-        original_ratings = listings_dataframe[REVIEW_SCORES_RATING_COLUMN].tolist()
-        original_ids = listings_dataframe["id"].tolist()
-
-        ranked_listings_dataframe, sorted_ratings = predict(
+        final_ratings = calculate_final_ratings(
             listings_dataframe,
             model,
             transformer,
             min_reviews=min_reviews,
             rating_weight=rating_weight,
+            cache=prediction_cache,
+            cache_namespace=cache_namespace,
         )
 
-        ranked_ids = ranked_listings_dataframe["id"].tolist()
+        return build_rank_response(
+            request.user_id,
+            model_name,
+            request.listings,
+            listings_dataframe,
+            final_ratings,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
-        id_to_final_rating = dict(zip(ranked_ids, sorted_ratings, strict=True))
 
-        final_ratings_original_order = [
-            id_to_final_rating[listing_id] for listing_id in original_ids
-        ]
+@router.post("/rank-listings/batch")
+def rank_listings_batch(request: BatchRankListingsRequest) -> BatchRankListingsResponse:
+    """Ranks listings for many users with one prediction per assigned model."""
+    try:
+        if not request.requests:
+            return BatchRankListingsResponse(results=[])
 
-        valid_pairs = [
-            (original, final)
-            for original, final in zip(
-                original_ratings, final_ratings_original_order, strict=True
-            )
-            if original is not None
-            and not pd.isna(original)
-            and final is not None
-            and not pd.isna(final)
-        ]
-
-        if len(valid_pairs) < MIN_PAIRS_FOR_CORRELATION:
-            spearman_correlation = None
-        else:
-            valid_original, valid_final = zip(*valid_pairs, strict=True)
-            spearman_correlation, _ = spearmanr(valid_original, valid_final)
-
-        ranked_listings = dataframe_to_listings(ranked_listings_dataframe)
-
-        log_prediction(
-            user_id=request.user_id,
-            model_name=model_name,
-            input_listings=request.listings,
-            predictions=final_ratings_original_order,
+        listings_dataframe, offsets = listing_batches_to_dataframe(
+            [user_request.listings for user_request in request.requests]
         )
+        final_ratings = np.zeros(len(listings_dataframe))
+        model_names = [""] * len(request.requests)
 
-        return RankListingsResponse(
-            ratings=sorted_ratings,
-            listings=ranked_listings,
-            spearman_correlation=spearman_correlation,
+        model_groups = group_users_by_model(
+            [user_request.user_id for user_request in request.requests]
+        )
+        for model_folder, indices in model_groups.items():
+            (
+                model,
+                transformer,
+                min_reviews,
+                rating_weight,
+                model_name,
+                cache_namespace,
+            ) = load_model_from_folder(model_folder)
+            logger.info(f"Model chosen for {len(indices)} users: {model_name}")
+
+            positions = np.concatenate(
+                [np.arange(offsets[index], offsets[index + 1]) for index in indices]
+            )
+            final_ratings[positions] = calculate_final_ratings(
+                listings_dataframe.iloc[positions],
+                model,
+                transformer,
+                min_reviews=min_reviews,
+                rating_weight=rating_weight,
+                cache=prediction_cache,
+                cache_namespace=cache_namespace,
+            )
+            for index in indices:
+                model_names[index] = model_name
+
+        return BatchRankListingsResponse(
+            results=[
+                build_rank_response(
+                    user_request.user_id,
+                    model_names[index],
+                    user_request.listings,
+                    listings_dataframe.iloc[offsets[index] : offsets[index + 1]],
+                    final_ratings[offsets[index] : offsets[index + 1]],
+                )
+                for index, user_request in enumerate(request.requests)
+            ]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
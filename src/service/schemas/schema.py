@@ -14,10 +14,42 @@ class RankListingsResponse(BaseModel):
     spearman_correlation: float | None
 
 
+class BatchRankListingsRequest(BaseModel):
+    requests: list[RankListingsRequest]
+
+
+class BatchRankListingsResponse(BaseModel):
+    results: list[RankListingsResponse]
+
+
 class AvailableModelsResponse(BaseModel):
     models: list[str]
 
 
+class ModelCacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    cached_models: list[str]
+
+
+class PredictionCacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    expirations: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class PredictionLogStatsResponse(BaseModel):
+    queue_depth: int
+    written_records: int
+    dropped_records: int
+    failed_seals: int
+
+
 class UploadModelResponse(BaseModel):
     message: str
 
@@ -1,11 +1,24 @@
+import itertools
+from typing import cast
+
 import pandas as pd
 from pandera.typing import DataFrame
 
-from constants import NULLABLE_INT_COLUMNS
-from schemas import Listing, ListingSchema
+from constants import (
+    LISTING_VALIDATION_POLICIES,
+    LISTING_VALIDATION_POLICY,
+    NULLABLE_INT_COLUMNS,
+)
+from schemas import Listing, ListingSchema, compile_schema
+
+LISTING_SCHEMA = ListingSchema.to_schema()
+BATCH_LISTING_SCHEMA = LISTING_SCHEMA.update_column("id", unique=False)
+
+COMPILED_LISTING_SCHEMA = compile_schema(LISTING_SCHEMA)
+COMPILED_BATCH_LISTING_SCHEMA = compile_schema(BATCH_LISTING_SCHEMA)
 
 
-def listings_to_dataframe(listings: list[Listing]) -> DataFrame[ListingSchema]:
+def build_listings_dataframe(listings: list[Listing]) -> pd.DataFrame:
     dataframe_listings_list = []
     for listing in listings:
         listing_dict = listing.model_dump()
@@ -20,7 +33,82 @@ def listings_to_dataframe(listings: list[Listing]) -> DataFrame[ListingSchema]:
         if col in dataframe_listings.columns:
             dataframe_listings[col] = dataframe_listings[col].astype("Float64")
 
-    return ListingSchema.validate(dataframe_listings)
+    return dataframe_listings
+
+
+def validate_listings(
+    dataframe_listings: pd.DataFrame,
+    *,
+    batch: bool = False,
+    policy: str = LISTING_VALIDATION_POLICY,
+) -> DataFrame[ListingSchema]:
+    """Validates incoming listings according to ``policy``.
+
+    ``full`` and ``schema-once`` run the pandera schema, ``compiled`` runs the
+    equivalent NumPy checks compiled from it.
+    """
+    if policy not in LISTING_VALIDATION_POLICIES:
+        raise ValueError(f"Unsupported listing validation policy: {policy}.")
+
+    if policy == "compiled":
+        compiled_schema = (
+            COMPILED_BATCH_LISTING_SCHEMA if batch else COMPILED_LISTING_SCHEMA
+        )
+        validated = compiled_schema.validate(dataframe_listings)
+    else:
+        schema = BATCH_LISTING_SCHEMA if batch else LISTING_SCHEMA
+        validated = schema.validate(dataframe_listings)
+
+    return cast("DataFrame[ListingSchema]", validated)
+
+
+def validate_ranked_listings(
+    ranked_listings: DataFrame[ListingSchema],
+    policy: str = LISTING_VALIDATION_POLICY,
+) -> DataFrame[ListingSchema]:
+    """Revalidates ranked listings, which only the ``full`` policy does.
+
+    Ranking reorders validated rows without changing them, so the other
+    policies return them as they are.
+    """
+    if policy == "full":
+        return ListingSchema.validate(ranked_listings)
+    return ranked_listings
+
+
+def listings_to_dataframe(
+    listings: list[Listing], policy: str = LISTING_VALIDATION_POLICY
+) -> DataFrame[ListingSchema]:
+    return validate_listings(build_listings_dataframe(listings), policy=policy)
+
+
+def listing_batches_to_dataframe(
+    listing_batches: list[list[Listing]], policy: str = LISTING_VALIDATION_POLICY
+) -> tuple[DataFrame[ListingSchema], list[int]]:
+    """Validates all batches as one dataframe.
+
+    Listing ids only have to be unique within a batch, so they are checked per
+    batch instead of by the schema. Returns the dataframe and the offsets of
+    the batches within it.
+    """
+    offsets = [0]
+    for listings in listing_batches:
+        offsets.append(offsets[-1] + len(listings))
+
+    dataframe_listings = validate_listings(
+        build_listings_dataframe(
+            [listing for listings in listing_batches for listing in listings]
+        ),
+        batch=True,
+        policy=policy,
+    )
+
+    ids = dataframe_listings["id"]
+    for index, (start, end) in enumerate(itertools.pairwise(offsets)):
+        if ids.iloc[start:end].duplicated().any():
+            raise ValueError(f"Listing ids in request {index} are not unique.")
+
+    return dataframe_listings, offsets
 
 
 def dataframe_to_listings(
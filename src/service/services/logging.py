@@ -1,13 +1,162 @@
-import json
+import atexit
 import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
 from datetime import datetime
-from pathlib import Path
+from typing import Any
 
-from constants import PREDICTION_LOG_DIR
+from constants import (
+    PREDICTION_LOG_BATCH_SIZE,
+    PREDICTION_LOG_FLUSH_INTERVAL,
+    PREDICTION_LOG_QUEUE_SIZE,
+)
+from data import PredictionLogSegmentWriter
 from schemas import Listing
 
 logger = logging.getLogger(__name__)
 
+_STOP = object()
+
+
+class PredictionLogWriter:
+    def __init__(
+        self,
+        queue_size: int = PREDICTION_LOG_QUEUE_SIZE,
+        batch_size: int = PREDICTION_LOG_BATCH_SIZE,
+        flush_interval: float = PREDICTION_LOG_FLUSH_INTERVAL,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._segment_writer = PredictionLogSegmentWriter()
+        self.written_records = 0
+        self.dropped_records = 0
+        self.failed_seals = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="prediction-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+
+        if thread is None or not thread.is_alive():
+            return
+
+        self._queue.put(_STOP)
+        thread.join()
+
+    def submit(self, records: list[tuple[Any, ...]]) -> None:
+        self.start()
+
+        dropped = 0
+        for record in records:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                dropped += 1
+
+        if dropped:
+            with self._lock:
+                self.dropped_records += dropped
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written_records": self.written_records,
+                "dropped_records": self.dropped_records,
+                "failed_seals": self.failed_seals,
+            }
+
+    def _run(self) -> None:
+        batch: list[tuple[Any, ...]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = (
+                max(deadline - time.monotonic(), 0.0) if batch else self.flush_interval
+            )
+            try:
+                record = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._write(batch)
+                self._seal(self._segment_writer.seal)
+                return
+
+            if record is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(record)
+
+            if batch and (
+                len(batch) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                self._write(batch)
+                batch = []
+
+            if not batch:
+                self._seal(self._segment_writer.rotate_if_needed)
+
+    def _write(self, batch: list[tuple[Any, ...]]) -> None:
+        if not batch:
+            return
+
+        try:
+            self._segment_writer.write(
+                [
+                    {
+                        "timestamp": timestamp,
+                        "user_id": user_id,
+                        "model_name": model_name,
+                        "listing_id": listing.id,
+                        "input_data": listing.model_dump(),
+                        "prediction": rating,
+                    }
+                    for timestamp, user_id, model_name, listing, rating in batch
+                ]
+            )
+
+            with self._lock:
+                self.written_records += len(batch)
+        except Exception as e:
+            logger.error(
+                f"Failed to write {len(batch)} predictions: {e}", exc_info=True
+            )
+            with self._lock:
+                self.dropped_records += len(batch)
+
+    def _seal(self, seal: Callable[[], None]) -> None:
+        """Runs ``seal`` without letting a failure stop the writer thread.
+
+        A segment that fails to seal keeps its records for a retry, so the
+        failure is counted in ``failed_seals`` rather than as dropped records.
+        """
+        try:
+            seal()
+        except Exception as e:
+            logger.error(f"Failed to seal prediction log segment: {e}", exc_info=True)
+            with self._lock:
+                self.failed_seals += 1
+
+
+prediction_log_writer = PredictionLogWriter()
+atexit.register(prediction_log_writer.stop)
+
 
 def log_prediction(
     user_id: str,
@@ -16,26 +165,13 @@ def log_prediction(
     predictions: list[float],
 ) -> None:
     try:
-        logger.info(f"Logging prediction for user {user_id}, model {model_name}, {len(input_listings)} listings")
-        PREDICTION_LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-        log_file = PREDICTION_LOG_DIR / "predictions.log"
-
         timestamp = datetime.now().isoformat()
 
-        for listing, rating in zip(input_listings, predictions, strict=True):
-            log_entry = {
-                "timestamp": timestamp,
-                "user_id": user_id,
-                "model_name": model_name,
-                "listing_id": listing.id,
-                "input_data": listing.model_dump(),
-                "prediction": rating,
-            }
-
-            with log_file.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-
-        logger.info(f"Successfully logged {len(input_listings)} predictions for user {user_id}")
+        prediction_log_writer.submit(
+            [
+                (timestamp, user_id, model_name, listing, rating)
+                for listing, rating in zip(input_listings, predictions, strict=True)
+            ]
+        )
     except Exception as e:
         logger.error(f"Failed to log prediction for user {user_id}: {e}", exc_info=True)
@@ -1,13 +1,17 @@
 import hashlib
 import json
+import logging
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-import joblib
 from fastapi import HTTPException
 from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
 
 from constants import (
+    ARTIFACT_MANIFEST_NAME,
     DEFAULT_MODEL_CONFIG_NAME,
     DEFAULT_MODEL_NAME,
     DEFAULT_TRANSFORMER_NAME,
@@ -15,6 +19,11 @@ from constants import (
     RATING_WEIGHT_KEY,
     SERVICE_MODEL_DIR,
 )
+from model.artifacts import load_artifact_bundle
+from model.cache import PredictionCache
+from model.compiled import PreprocessingPlan, compile_model, compile_transformer
+
+logger = logging.getLogger(__name__)
 
 
 def validate_model_config(config_content: bytes) -> dict:
@@ -89,8 +98,154 @@ def get_model_for_user(user_id: str, available_models: list[Path]) -> Path:
     return available_models[model_index]
 
 
-def load_model(user_id: str) -> tuple[Any, ColumnTransformer, int, float, str]:
-    available_models = get_models()
+@dataclass
+class LoadedModel:
+    model: Any
+    transformer: ColumnTransformer | PreprocessingPlan
+    config: dict[str, Any]
+    signature: tuple[int, ...]
+    cache_namespace: str
+
+
+def get_model_signature(model_folder: Path) -> tuple[int, ...]:
+    signature: list[int] = []
+    for file_name in (
+        DEFAULT_MODEL_NAME,
+        DEFAULT_TRANSFORMER_NAME,
+        DEFAULT_MODEL_CONFIG_NAME,
+    ):
+        file_stat = (model_folder / file_name).stat()
+        signature.extend((file_stat.st_mtime_ns, file_stat.st_size))
+
+    manifest_path = model_folder / ARTIFACT_MANIFEST_NAME
+    if manifest_path.exists():
+        signature.append(manifest_path.stat().st_mtime_ns)
+    return tuple(signature)
+
+
+def get_cache_namespace(model_name: str, signature: tuple[int, ...]) -> str:
+    """Names the prediction cache entries of one version of a model.
+
+    Predictions of a request that loaded the model before its artifacts were
+    replaced land in the old namespace, so they are never served for the new
+    artifacts.
+    """
+    digest = hashlib.sha256(json.dumps(signature).encode()).hexdigest()
+    return f"{model_name}:{digest[:16]}"
+
+
+def get_models_directory_signature() -> tuple[int, ...]:
+    SERVICE_MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    signature = [SERVICE_MODEL_DIR.stat().st_mtime_ns]
+    for model_folder in sorted(SERVICE_MODEL_DIR.iterdir()):
+        signature.append(model_folder.stat().st_mtime_ns)
+    return tuple(signature)
+
+
+def load_model_artifacts(model_folder: Path) -> LoadedModel:
+    signature = get_model_signature(model_folder)
+
+    bundle = load_artifact_bundle(model_folder, lazy_model=True)
+
+    model = bundle.model
+    if bundle.compiled_model is not None:
+        model = bundle.compiled_model
+    elif isinstance(model, GradientBoostingRegressor):
+        model = compile_model(model)
+
+    transformer = bundle.transformer
+    try:
+        transformer = compile_transformer(transformer)
+    except ValueError as e:
+        logger.warning(f"Using sklearn transformer for {model_folder.name}: {e}")
+
+    config = bundle.config
+
+    return LoadedModel(
+        model=model,
+        transformer=transformer,
+        config=config,
+        signature=signature,
+        cache_namespace=get_cache_namespace(model_folder.name, signature),
+    )
+
+
+class ModelRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._models: dict[str, LoadedModel] = {}
+        self._available_models: list[Path] | None = None
+        self._directory_signature: tuple[int, ...] | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def get_available_models(self) -> list[Path]:
+        directory_signature = get_models_directory_signature()
+        with self._lock:
+            if (
+                self._available_models is not None
+                and directory_signature == self._directory_signature
+            ):
+                return self._available_models
+
+        available_models = get_models()
+
+        with self._lock:
+            self._available_models = available_models
+            self._directory_signature = directory_signature
+            available_names = {model_folder.name for model_folder in available_models}
+            for model_name in list(self._models):
+                if model_name not in available_names:
+                    loaded_model = self._models.pop(model_name)
+                    prediction_cache.invalidate(loaded_model.cache_namespace)
+
+        return available_models
+
+    def get(self, model_folder: Path) -> LoadedModel:
+        signature = get_model_signature(model_folder)
+
+        with self._lock:
+            loaded_model = self._models.get(model_folder.name)
+            if loaded_model is not None and loaded_model.signature == signature:
+                self.hits += 1
+                return loaded_model
+            self.misses += 1
+
+        loaded_model = load_model_artifacts(model_folder)
+
+        with self._lock:
+            previous_model = self._models.get(model_folder.name)
+            self._models[model_folder.name] = loaded_model
+
+        if (
+            previous_model is not None
+            and previous_model.cache_namespace != loaded_model.cache_namespace
+        ):
+            prediction_cache.invalidate(previous_model.cache_namespace)
+
+        return loaded_model
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._available_models = None
+            self._directory_signature = None
+        self.get_available_models()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached_models": sorted(self._models),
+            }
+
+
+prediction_cache = PredictionCache()
+model_registry = ModelRegistry()
+
+
+def get_available_models_or_raise() -> list[Path]:
+    available_models = model_registry.get_available_models()
 
     if len(available_models) == 0:
         raise HTTPException(
@@ -98,22 +253,39 @@ def load_model(user_id: str) -> tuple[Any, ColumnTransformer, int, float, str]:
             detail="Models not found. Please upload at least one model first.",
         )
 
-    model_folder = get_model_for_user(user_id, available_models)
+    return available_models
 
-    model_path = model_folder / DEFAULT_MODEL_NAME
-    transformer_path = model_folder / DEFAULT_TRANSFORMER_NAME
-    config_path = model_folder / DEFAULT_MODEL_CONFIG_NAME
 
-    model = joblib.load(model_path)
-    transformer = joblib.load(transformer_path)
+def load_model(
+    user_id: str,
+) -> tuple[Any, ColumnTransformer | PreprocessingPlan, int, float, str, str]:
+    available_models = get_available_models_or_raise()
+    model_folder = get_model_for_user(user_id, available_models)
+    return load_model_from_folder(model_folder)
 
-    with config_path.open() as f:
-        config = json.load(f)
+
+def load_model_from_folder(
+    model_folder: Path,
+) -> tuple[Any, ColumnTransformer | PreprocessingPlan, int, float, str, str]:
+    loaded_model = model_registry.get(model_folder)
 
     return (
-        model,
-        transformer,
-        config[MIN_REVIEWS_KEY],
-        config[RATING_WEIGHT_KEY],
+        loaded_model.model,
+        loaded_model.transformer,
+        loaded_model.config[MIN_REVIEWS_KEY],
+        loaded_model.config[RATING_WEIGHT_KEY],
         model_folder.name,
+        loaded_model.cache_namespace,
     )
+
+
+def group_users_by_model(user_ids: list[str]) -> dict[Path, list[int]]:
+    """Maps each assigned model folder to the positions of its users."""
+    available_models = get_available_models_or_raise()
+
+    groups: dict[Path, list[int]] = {}
+    for index, user_id in enumerate(user_ids):
+        model_folder = get_model_for_user(user_id, available_models)
+        groups.setdefault(model_folder, []).append(index)
+
+    return groups
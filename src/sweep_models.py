@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from constants import SWEEP_RESULTS_PATH
+from data import LISTINGS_CACHE_MODES, get_cached_listings
+from model import get_sweep_configs, run_sweep
+
+
+def get_arguments() -> tuple[Path, Path, int, str, str, str]:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Train every configuration of a parameter grid in parallel, "
+            "skipping the ones already in the results table"
+        )
+    )
+
+    parser.add_argument(
+        "--grid",
+        type=Path,
+        required=True,
+        help=(
+            "JSON file mapping train_model.py parameters (snake_case) to lists of "
+            "values, or a list of such mappings"
+        ),
+    )
+
+    parser.add_argument(
+        "--results",
+        type=Path,
+        default=SWEEP_RESULTS_PATH,
+        help=f"Results CSV to append to (default: {SWEEP_RESULTS_PATH})",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of training processes (default: number of CPUs)",
+    )
+
+    parser.add_argument(
+        "--model-prefix",
+        type=str,
+        default="sweep",
+        help="Prefix of the saved model names (default: sweep)",
+    )
+
+    parser.add_argument(
+        "--listings-cache",
+        choices=LISTINGS_CACHE_MODES,
+        default="use",
+        help=(
+            "Cleaned listings cache: use it, rebuild it from the CSV, clear it "
+            "or bypass it with off (default: use)"
+        ),
+    )
+
+    parser.add_argument(
+        "--feature-cache",
+        choices=("use", "rebuild"),
+        default="use",
+        help=(
+            "Reuse the cached transformer and feature matrices or rebuild them "
+            "(default: use)"
+        ),
+    )
+
+    arguments = parser.parse_args()
+
+    if arguments.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    return (
+        arguments.grid,
+        arguments.results,
+        arguments.workers,
+        arguments.model_prefix,
+        arguments.listings_cache,
+        arguments.feature_cache,
+    )
+
+
+def print_result(result: dict[str, Any]) -> None:
+    print(
+        f"{Path(result['model_path']).name}: MAE {result['mae']:.4f}, "
+        f"RMSE {result['rmse']:.4f}, fit {result['fit_seconds']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    (
+        grid_path,
+        results_path,
+        workers,
+        model_prefix,
+        listings_cache,
+        feature_cache,
+    ) = get_arguments()
+
+    with grid_path.open(encoding="utf-8") as f:
+        configs = get_sweep_configs(json.load(f))
+
+    print(f"Sweeping {len(configs)} configurations with {workers} workers...")
+    results = run_sweep(
+        lambda: get_cached_listings(mode=listings_cache),
+        configs,
+        results_path,
+        workers=workers,
+        model_prefix=model_prefix,
+        feature_cache=feature_cache,
+        on_result=print_result,
+    )
+
+    print(f"\nSweep completed! Results: {results_path}")
+    if not results.empty:
+        best = results.iloc[results["mae"].argmin()]
+        print(f"Best validation MAE: {best['mae']:.4f} ({best['model_path']})")
@@ -1,4 +1,5 @@
 import argparse
+import sys
 
 import numpy as np
 from sklearn.metrics import mean_absolute_error, mean_squared_error
@@ -7,15 +8,31 @@ from constants import (
     DEFAULT_DATASET_NAME,
     DEFAULT_MODEL_NAME,
     DEFAULT_RANDOM_STATE,
+    MODEL_DIR,
     REVIEW_SCORES_RATING_COLUMN,
+    RUN_REPORTS_NAME,
+)
+from data import (
+    LISTINGS_CACHE_MODES,
+    get_cached_listings,
+    get_listings_without_small_amount_of_reviews,
+)
+from instrumentation import (
+    append_run_report,
+    get_run_report,
+    record_stage,
+    recording,
 )
-from data import get_listings, get_listings_without_small_amount_of_reviews
 from model import load_model
+from model.features import split_data
 from model.preprocessing import prepare_data
-from model.train import split_data
 
 
-def get_arguments() -> tuple[str, str, int]:
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("true", "1", "yes", "on")
+
+
+def get_arguments() -> tuple[str, str, int, str, bool, bool]:
     parser = argparse.ArgumentParser(description="Test trained model on test dataset")
     parser.add_argument(
         "--model-name",
@@ -35,23 +52,62 @@ def get_arguments() -> tuple[str, str, int]:
         default=DEFAULT_RANDOM_STATE,
         help=f"Random state for data splitting (default: {DEFAULT_RANDOM_STATE})",
     )
+    parser.add_argument(
+        "--listings-cache",
+        choices=LISTINGS_CACHE_MODES,
+        default="use",
+        help=(
+            "Cleaned listings cache: use it, rebuild it from the CSV, clear it "
+            "or bypass it with off (default: use)"
+        ),
+    )
+
+    parser.add_argument(
+        "--run-report",
+        type=parse_bool,
+        default=True,
+        help=(
+            "Append the wall time, CPU time and memory peak of every stage to "
+            f"{RUN_REPORTS_NAME} in the model folder (default: true)"
+        ),
+    )
+    parser.add_argument(
+        "--trace-memory",
+        type=parse_bool,
+        default=True,
+        help=(
+            "Record memory peaks with tracemalloc, which slows down Python "
+            "allocations (default: true)"
+        ),
+    )
 
     arguments = parser.parse_args()
 
-    return arguments.model_name, arguments.dataset, arguments.random_state
+    return (
+        arguments.model_name,
+        arguments.dataset,
+        arguments.random_state,
+        arguments.listings_cache,
+        arguments.run_report,
+        arguments.trace_memory,
+    )
 
 
-def test_model(model_name: str, dataset_name: str, random_state: int) -> None:
+def test_model(
+    model_name: str, dataset_name: str, random_state: int, listings_cache: str
+) -> dict[str, float]:
     print(f"Loading model '{model_name}'...")
     model, transformer, min_reviews, _ = load_model(model_name)
 
     print(f"Loading data '{dataset_name}'...")
-    listings = get_listings(dataset_name)
+    with record_stage("load_listings"):
+        listings = get_cached_listings(dataset_name, mode=listings_cache)
 
-    filtered_listings = get_listings_without_small_amount_of_reviews(
-        listings, min_reviews
-    ).copy()
-    _, _, test_listings = split_data(filtered_listings, random_state)
+    with record_stage("split_data"):
+        filtered_listings = get_listings_without_small_amount_of_reviews(
+            listings, min_reviews
+        ).copy()
+        _, _, test_listings = split_data(filtered_listings, random_state)
 
     test_processed_listings, _ = prepare_data(
         test_listings, fit=False, transformer=transformer
@@ -61,7 +117,8 @@ def test_model(model_name: str, dataset_name: str, random_state: int) -> None:
 
     print("Making predictions...")
 
-    test_predictions = model.predict(test_processed_listings)
+    with record_stage("predict"):
+        test_predictions = model.predict(test_processed_listings)
 
     print("Calculating metrics...")
     mae = mean_absolute_error(test_target, test_predictions)
@@ -71,7 +128,28 @@ def test_model(model_name: str, dataset_name: str, random_state: int) -> None:
     print(f"Test MAE:  {mae:.4f}")
     print(f"Test RMSE: {rmse:.4f}")
 
+    return {"mae": mae, "rmse": rmse}
+
 
 if __name__ == "__main__":
-    model_name, dataset_name, random_state = get_arguments()
-    test_model(model_name, dataset_name, random_state)
+    (
+        model_name,
+        dataset_name,
+        random_state,
+        listings_cache,
+        run_report,
+        trace_memory,
+    ) = get_arguments()
+
+    with recording("test_model", trace_memory=run_report and trace_memory) as recorder:
+        metrics = test_model(model_name, dataset_name, random_state, listings_cache)
+
+    if run_report:
+        report_path = MODEL_DIR / model_name / RUN_REPORTS_NAME
+        append_run_report(
+            report_path,
+            get_run_report(
+                recorder, command="test_model", argv=sys.argv[1:], metrics=metrics
+            ),
+        )
+        print(f"Run report: {report_path}")
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from pandera.typing import DataFrame
+
+from constants import REVIEW_SCORES_RATING_COLUMN
+from schemas import ListingSchema
+
+NEIGHBOURHOODS = ["D1", "D2", "D3", "D4", "D5"]
+NEIGHBOURHOOD_RATINGS = [4.9, 2.0, 4.0, 3.0, 4.5]
+
+
+def make_listings(
+    listing_count: int, *, seed: int, first_id: int = 0
+) -> DataFrame[ListingSchema]:
+    """Builds valid listings whose rating is set by their neighbourhood."""
+    rng = np.random.default_rng(seed)
+    neighbourhood_codes = np.arange(listing_count) % len(NEIGHBOURHOODS)
+
+    def numbers(low: float, high: float) -> np.ndarray:
+        return rng.uniform(low, high, listing_count).round()
+
+    listings = pd.DataFrame(
+        {
+            "id": np.arange(first_id, first_id + listing_count),
+            "host_response_time": rng.choice(
+                ["within an hour", "within a day"], listing_count
+            ),
+            "host_is_superhost": rng.choice([True, False], listing_count),
+            "host_listings_count": numbers(0, 10),
+            "host_total_listings_count": numbers(0, 10),
+            "host_identity_verified": rng.choice([True, False], listing_count),
+            "neighbourhood_group_cleansed": np.array(NEIGHBOURHOODS)[
+                neighbourhood_codes
+            ],
+            "latitude": rng.uniform(52.1, 52.3, listing_count),
+            "longitude": rng.uniform(20.9, 21.1, listing_count),
+            "room_type": rng.choice(["Entire home/apt", "Private room"], listing_count),
+            "accommodates": numbers(1, 6),
+            "bathrooms": numbers(0, 3),
+            "bedrooms": numbers(0, 4),
+            "beds": numbers(0, 4),
+            "price": rng.uniform(50, 500, listing_count),
+            "minimum_nights": numbers(1, 5),
+            "maximum_nights": numbers(5, 30),
+            "minimum_minimum_nights": numbers(1, 5),
+            "maximum_minimum_nights": numbers(1, 5),
+            "minimum_maximum_nights": numbers(5, 30),
+            "maximum_maximum_nights": numbers(5, 30),
+            "minimum_nights_avg_ntm": numbers(1, 5),
+            "maximum_nights_avg_ntm": numbers(5, 30),
+            "number_of_reviews": numbers(10, 100),
+            REVIEW_SCORES_RATING_COLUMN: np.clip(
+                np.array(NEIGHBOURHOOD_RATINGS)[neighbourhood_codes]
+                + rng.normal(0, 0.05, listing_count),
+                0,
+                5,
+            ),
+            "has_availability": rng.choice([True, False], listing_count),
+            "availability_30": numbers(0, 30),
+            "availability_60": numbers(0, 60),
+            "availability_90": numbers(0, 90),
+            "availability_365": numbers(0, 365),
+            "host_acceptance_rate": numbers(0, 100),
+            "host_response_rate": numbers(0, 100),
+            "amenities": '["Wifi", "Kitchen"]',
+        }
+    )
+    return ListingSchema.validate(listings)
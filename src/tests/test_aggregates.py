@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from analysis import QuantileSketch
+from constants import LOG_SKETCH_RELATIVE_ACCURACY
+
+QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+
+class QuantileSketchTest(unittest.TestCase):
+    def assert_matches_percentile(
+        self, sketch: QuantileSketch, values: np.ndarray
+    ) -> None:
+        for q in QUANTILES:
+            with self.subTest(count=len(values), q=q):
+                expected = np.percentile(values, q * 100)
+                self.assertLessEqual(
+                    abs(sketch.quantile(q) - expected),
+                    LOG_SKETCH_RELATIVE_ACCURACY * abs(expected),
+                )
+
+    def test_interpolates_like_percentile(self) -> None:
+        rng = np.random.default_rng(0)
+        for count in (1, 2, 4, 7, 1000):
+            values = rng.uniform(1.0, 5.0, count)
+            sketch = QuantileSketch()
+            for value in values:
+                sketch.add(value)
+
+            self.assert_matches_percentile(sketch, values)
+
+    def test_interpolates_between_distant_order_statistics(self) -> None:
+        values = np.array([1.0, 2.0, 4.0, 5.0])
+        sketch = QuantileSketch()
+        for value in values:
+            sketch.add(value)
+
+        self.assert_matches_percentile(sketch, values)
+
+    def test_merged_sketches_match_percentile_of_all_values(self) -> None:
+        rng = np.random.default_rng(1)
+        parts = [rng.uniform(1.0, 5.0, count) for count in (10, 301, 55)]
+        sketch = QuantileSketch()
+        for part in parts:
+            part_sketch = QuantileSketch()
+            for value in part:
+                part_sketch.add(value)
+            sketch.merge(part_sketch)
+
+        self.assert_matches_percentile(sketch, np.concatenate(parts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import importlib
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from pandera.typing import DataFrame
+
+from constants import REVIEW_SCORES_RATING_COLUMN
+from model.incremental import retrain_model
+from model.preprocessing import get_transformer, prepare_data
+from model.train import build_model, save_model
+from schemas import ListingSchema
+from tests.listings import make_listings
+
+MODEL_DIR_MODULES = ["model.incremental", "model.predict", "model.train"]
+BASE_ESTIMATORS = 10
+
+
+class RetrainHistModelTest(unittest.TestCase):
+    def setUp(self) -> None:
+        temporary_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_dir.cleanup)
+        model_dir = Path(temporary_dir.name)
+        for module_name in MODEL_DIR_MODULES:
+            patcher = mock.patch.object(
+                importlib.import_module(module_name), "MODEL_DIR", model_dir
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        listings = make_listings(500, seed=0)
+        features, transformer = prepare_data(
+            listings, transformer=get_transformer(native_categorical=True)
+        )
+        self.base_model = build_model("hist", transformer, n_estimators=BASE_ESTIMATORS)
+        self.base_model.fit(features, listings[REVIEW_SCORES_RATING_COLUMN])
+        save_model(self.base_model, transformer, model_name="base")
+
+        self.probe_features = features
+
+    def retrain(self, delta_listings: DataFrame[ListingSchema]) -> None:
+        model, _ = retrain_model(
+            delta_listings,
+            base_model_name="base",
+            model_name="base_v2",
+            extra_estimators=5,
+            min_samples_leaf=5,
+            save=False,
+        )
+        base_predictions = next(
+            itertools.islice(
+                model.staged_predict(self.probe_features), BASE_ESTIMATORS - 1, None
+            )
+        )
+        np.testing.assert_allclose(
+            base_predictions, self.base_model.predict(self.probe_features)
+        )
+
+    def test_keeps_base_stages_when_every_category_is_present(self) -> None:
+        self.retrain(make_listings(300, seed=1, first_id=1000))
+
+    def test_rejects_delta_missing_a_category(self) -> None:
+        delta_listings = make_listings(300, seed=1, first_id=1000)
+        delta_listings = delta_listings[
+            delta_listings["neighbourhood_group_cleansed"] != "D2"
+        ]
+
+        with self.assertRaisesRegex(ValueError, "lack the categories"):
+            self.retrain(delta_listings)
+
+    def test_rejects_changed_base_stages(self) -> None:
+        delta_listings = make_listings(300, seed=1, first_id=1000)
+        delta_listings = delta_listings[
+            delta_listings["neighbourhood_group_cleansed"] != "D2"
+        ]
+
+        with (
+            mock.patch("model.incremental.get_missing_categories", return_value={}),
+            self.assertRaisesRegex(ValueError, "changed the predictions"),
+        ):
+            self.retrain(delta_listings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from typing import Any
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from constants import LISTING_VALIDATION_POLICIES, LISTING_VALIDATION_POLICY
+from service.services.listings import validate_listings
+from tests.listings import make_listings
+
+INVALID_VALUES: list[tuple[str, Any]] = [
+    ("id", None),
+    ("price", 0.0),
+    ("latitude", 120.0),
+    ("accommodates", 0.0),
+    ("review_scores_rating", 5.5),
+    ("availability_30", 31.0),
+    ("accommodates", "many"),
+]
+
+
+class ListingValidationPolicyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.listings = pd.DataFrame(make_listings(20, seed=0)).astype(object)
+
+    def get_errors(self, listings: pd.DataFrame) -> dict[str, str]:
+        errors = {}
+        for policy in LISTING_VALIDATION_POLICIES:
+            with self.assertRaises(Exception, msg=policy) as context:
+                validate_listings(listings.copy(), policy=policy)
+            errors[policy] = str(context.exception)
+        return errors
+
+    def test_default_policy_runs_the_pandera_schema(self) -> None:
+        self.assertEqual(LISTING_VALIDATION_POLICY, "full")
+
+    def test_policies_accept_valid_listings_alike(self) -> None:
+        expected = validate_listings(self.listings.copy(), policy="full")
+        for policy in LISTING_VALIDATION_POLICIES:
+            with self.subTest(policy=policy):
+                assert_frame_equal(
+                    validate_listings(self.listings.copy(), policy=policy), expected
+                )
+
+    def test_policies_reject_invalid_values_alike(self) -> None:
+        for column, value in INVALID_VALUES:
+            with self.subTest(column=column, value=value):
+                listings = self.listings.copy()
+                listings.loc[3, column] = value
+
+                for policy, error in self.get_errors(listings).items():
+                    self.assertIn(f"'{column}'", error, msg=policy)
+
+    def test_policies_reject_duplicate_ids_alike(self) -> None:
+        listings = self.listings.copy()
+        listings.loc[3, "id"] = listings.loc[4, "id"]
+
+        for policy, error in self.get_errors(listings).items():
+            self.assertIn("'id'", error, msg=policy)
+
+    def test_policies_reject_missing_columns_alike(self) -> None:
+        listings = self.listings.drop(columns="price")
+
+        for policy, error in self.get_errors(listings).items():
+            self.assertIn("price", error, msg=policy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import copy
+import unittest
+from unittest import mock
+
+import pandera.pandas as pa
+
+from data.listings_cache import get_schema_hash
+from schemas import ListingSchema
+
+
+class SchemaHashTest(unittest.TestCase):
+    def get_hash_of(self, schema: pa.DataFrameSchema) -> str:
+        with mock.patch.object(ListingSchema, "to_schema", return_value=schema):
+            return get_schema_hash()
+
+    def test_changes_with_column_rules(self) -> None:
+        schema = ListingSchema.to_schema()
+        changes = {
+            "nullable": schema.update_column("id", nullable=True),
+            "coerce": schema.update_column("price", coerce=False),
+            "checks": schema.update_column("price", checks=[pa.Check.gt(1)]),
+        }
+
+        for rule, changed_schema in changes.items():
+            with self.subTest(rule=rule):
+                self.assertNotEqual(self.get_hash_of(changed_schema), get_schema_hash())
+
+    def test_changes_with_schema_checks(self) -> None:
+        schema = copy.deepcopy(ListingSchema.to_schema())
+        schema.checks = [pa.Check(lambda listings: len(listings) > 0, name="nonempty")]
+
+        self.assertNotEqual(self.get_hash_of(schema), get_schema_hash())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 import argparse
+import os
+import sys
+
+import pandas as pd
 
 from constants import (
+    CV_RUN_REPORTS_PATH,
     DEFAULT_LEARNING_RATE,
     DEFAULT_MAX_DEPTH,
     DEFAULT_MAX_FEATURES,
@@ -11,9 +16,27 @@ from constants import (
     DEFAULT_N_ESTIMATORS,
     DEFAULT_RANDOM_STATE,
     DEFAULT_SUBSAMPLE,
+    DEFAULT_TRAINING_ENGINE,
+    FEATURE_CACHE_DIR,
+    MIN_CV_FOLDS,
+    MODEL_DIR,
+    RUN_REPORTS_NAME,
+    TRAINING_ENGINES,
+    VALIDATION_CURVE_NAME,
+)
+from data import LISTINGS_CACHE_MODES, get_cached_listings
+from instrumentation import (
+    append_run_report,
+    get_run_report,
+    record_stage,
+    recording,
+)
+from model import (
+    FEATURE_CACHE_MODES,
+    cross_validate_model,
+    train_model,
+    train_model_in_chunks,
 )
-from data import get_listings
-from model import train_model
 
 
 def parse_none_int(value: str) -> int | None:
@@ -33,7 +56,29 @@ def parse_bool(value: str) -> bool:
 
 
 def get_arguments() -> tuple[
-    str, int, float, int, int | None, int, int, str, float, float, int
+    str,
+    int,
+    float,
+    int,
+    int | None,
+    int,
+    int,
+    str,
+    float,
+    float,
+    int,
+    bool,
+    str,
+    int | None,
+    str,
+    bool,
+    list[int] | None,
+    str,
+    int | None,
+    bool,
+    int | None,
+    bool,
+    bool,
 ]:
     parser = argparse.ArgumentParser()
 
@@ -103,8 +148,156 @@ def get_arguments() -> tuple[
         default=DEFAULT_RANDOM_STATE,
     )
 
+    parser.add_argument(
+        "--sparse-output",
+        type=parse_bool,
+        default=False,
+        help="Keep one-hot and amenity features as a sparse CSR matrix",
+    )
+
+    parser.add_argument(
+        "--listings-cache",
+        choices=LISTINGS_CACHE_MODES,
+        default="use",
+        help=(
+            "Cleaned listings cache: use it, rebuild it from the CSV, clear it "
+            "or bypass it with off (default: use)"
+        ),
+    )
+
+    parser.add_argument(
+        "--feature-cache",
+        choices=FEATURE_CACHE_MODES,
+        default="off",
+        help=(
+            "Fitted transformer and feature matrix cache, keyed by the listings, "
+            "--min-reviews, --random-state and preprocessing settings: use it, "
+            "rebuild it, clear it or bypass it with off (default: off). Each key "
+            "stores a full copy of the train, validation and test matrices under "
+            f"{FEATURE_CACHE_DIR} and entries are never evicted, so use clear to "
+            "free the disk space"
+        ),
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help=(
+            "Stream the CSV in blocks of this many rows and train on memory-mapped "
+            "features instead of loading it whole"
+        ),
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=TRAINING_ENGINES,
+        default=DEFAULT_TRAINING_ENGINE,
+        help=(
+            "Boosting implementation: gbr for GradientBoostingRegressor or hist "
+            f"for multi-core HistGradientBoostingRegressor (default: "
+            f"{DEFAULT_TRAINING_ENGINE})"
+        ),
+    )
+
+    parser.add_argument(
+        "--compare-engines",
+        type=parse_bool,
+        default=False,
+        help=(
+            "Also train the other engines on the same split, without saving them, "
+            "and print their fit time, MAE and RMSE"
+        ),
+    )
+
+    parser.add_argument(
+        "--staged-n-estimators",
+        type=int,
+        nargs="*",
+        default=None,
+        help=(
+            "Score every estimator count up to --n-estimators from the single fit, "
+            "save the validation curve and save truncated models at the given "
+            "counts as <model-name>_n<count>"
+        ),
+    )
+
+    parser.add_argument(
+        "--cv",
+        type=int,
+        default=None,
+        metavar="K",
+        help=(
+            "Score the parameters with K-fold cross-validation instead of the "
+            "train/validation split and print the mean and standard deviation "
+            "of MAE and RMSE across folds"
+        ),
+    )
+
+    parser.add_argument(
+        "--cv-refit",
+        type=parse_bool,
+        default=False,
+        help="With --cv, also fit the model on all listings and save it",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes fitting the --cv folds (default: min(K, number of CPUs))",
+    )
+
+    parser.add_argument(
+        "--run-report",
+        type=parse_bool,
+        default=True,
+        help=(
+            "Append the wall time, CPU time and memory peak of every stage to "
+            f"{RUN_REPORTS_NAME} in the model folder, or to {CV_RUN_REPORTS_PATH} "
+            "when --cv saves no model (default: true)"
+        ),
+    )
+
+    parser.add_argument(
+        "--trace-memory",
+        type=parse_bool,
+        default=True,
+        help=(
+            "Record memory peaks with tracemalloc, which slows down Python "
+            "allocations (default: true)"
+        ),
+    )
+
     arguments = parser.parse_args()
 
+    if arguments.cv is not None:
+        if arguments.cv < MIN_CV_FOLDS:
+            parser.error(f"--cv needs at least {MIN_CV_FOLDS} folds")
+        if arguments.chunk_size is not None:
+            parser.error("--cv does not support --chunk-size")
+        if arguments.compare_engines or arguments.staged_n_estimators is not None:
+            parser.error(
+                "--cv does not support --compare-engines or --staged-n-estimators"
+            )
+
+    if arguments.workers is not None and arguments.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if any(
+        not 1 <= count <= arguments.n_estimators
+        for count in arguments.staged_n_estimators or []
+    ):
+        parser.error("--staged-n-estimators counts must be within --n-estimators")
+
+    if arguments.chunk_size is not None and arguments.sparse_output:
+        parser.error("--chunk-size does not support --sparse-output")
+
+    if arguments.sparse_output and (
+        arguments.engine == "hist" or arguments.compare_engines
+    ):
+        parser.error("the hist engine does not support --sparse-output")
+
     return (
         arguments.model_name,
         arguments.min_reviews,
@@ -117,12 +310,58 @@ def get_arguments() -> tuple[
         arguments.learning_rate,
         arguments.subsample,
         arguments.random_state,
+        arguments.sparse_output,
+        arguments.listings_cache,
+        arguments.chunk_size,
+        arguments.engine,
+        arguments.compare_engines,
+        arguments.staged_n_estimators,
+        arguments.feature_cache,
+        arguments.cv,
+        arguments.cv_refit,
+        arguments.workers,
+        arguments.run_report,
+        arguments.trace_memory,
     )
 
 
+def print_validation_curve(
+    validation_curve: pd.DataFrame, staged_n_estimators: list[int]
+) -> None:
+    best = validation_curve.iloc[validation_curve["mae"].argmin()]
+    shown = validation_curve[
+        validation_curve["n_estimators"].isin(
+            [*staged_n_estimators, best["n_estimators"], len(validation_curve)]
+        )
+    ]
+
+    print(f"\n{'n_estimators':>12}{'MAE':>10}{'RMSE':>10}")
+    for row in shown.itertuples():
+        marker = " (best)" if row.n_estimators == best["n_estimators"] else ""
+        print(f"{row.n_estimators:>12}{row.mae:>10.4f}{row.rmse:>10.4f}{marker}")
+
+
+def print_cross_validation(
+    fold_metrics: pd.DataFrame, summary: dict[str, float]
+) -> None:
+    print(f"\n{'fold':>4}{'fit [s]':>10}{'MAE':>10}{'RMSE':>10}")
+    for row in fold_metrics.itertuples():
+        print(f"{row.fold:>4}{row.fit_seconds:>10.2f}{row.mae:>10.4f}{row.rmse:>10.4f}")
+
+    print(f"\nMAE: {summary['mae_mean']:.4f} ± {summary['mae_std']:.4f}")
+    print(f"RMSE: {summary['rmse_mean']:.4f} ± {summary['rmse_std']:.4f}")
+
+
+def print_engine_comparison(metrics_by_engine: dict[str, dict[str, float]]) -> None:
+    print(f"\n{'engine':<8}{'fit [s]':>10}{'MAE':>10}{'RMSE':>10}")
+    for engine, metrics in metrics_by_engine.items():
+        print(
+            f"{engine:<8}{metrics['fit_seconds']:>10.2f}"
+            f"{metrics['mae']:>10.4f}{metrics['rmse']:>10.4f}"
+        )
+
+
 if __name__ == "__main__":
-    print("Loading data...")
-    listings = get_listings()
     (
         model_name,
         min_reviews,
@@ -135,24 +374,140 @@ if __name__ == "__main__":
         learning_rate,
         subsample,
         random_state,
+        sparse_output,
+        listings_cache,
+        chunk_size,
+        engine,
+        compare_engines,
+        staged_n_estimators,
+        feature_cache,
+        cv,
+        cv_refit,
+        workers,
+        run_report,
+        trace_memory,
     ) = get_arguments()
 
-    print("Training model...")
-    _, metrics, _, _ = train_model(
-        listings,
-        model_name=model_name,
-        min_reviews=min_reviews,
-        rating_weight=rating_weight,
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        min_samples_split=min_samples_split,
-        min_samples_leaf=min_samples_leaf,
-        max_features=max_features,
-        learning_rate=learning_rate,
-        subsample=subsample,
-        random_state=random_state,
-    )
-
-    print(f"\nModel training {model_name} completed!")
-    print(f"Validation MAE: {metrics['mae']:.4f}")
-    print(f"Validation RMSE: {metrics['rmse']:.4f}")
+    engines = [engine]
+    if compare_engines:
+        engines.extend(other for other in TRAINING_ENGINES if other != engine)
+
+    with recording("train_model", trace_memory=run_report and trace_memory) as recorder:
+        if chunk_size is None:
+            print("Loading data...")
+            with record_stage("load_listings"):
+                listings = get_cached_listings(mode=listings_cache)
+
+        if cv is not None:
+            workers = workers or min(cv, os.cpu_count() or 1)
+            print(
+                f"Cross-validating {engine} model on {cv} folds with {workers} "
+                "workers..."
+            )
+            with record_stage("cross_validate"):
+                fold_metrics, metrics = cross_validate_model(
+                    listings,
+                    folds=cv,
+                    workers=workers,
+                    refit=cv_refit,
+                    engine=engine,
+                    sparse_output=sparse_output,
+                    model_name=model_name,
+                    min_reviews=min_reviews,
+                    rating_weight=rating_weight,
+                    n_estimators=n_estimators,
+                    max_depth=max_depth,
+                    min_samples_split=min_samples_split,
+                    min_samples_leaf=min_samples_leaf,
+                    max_features=max_features,
+                    learning_rate=learning_rate,
+                    subsample=subsample,
+                    random_state=random_state,
+                )
+        else:
+            metrics_by_engine = {}
+            for training_engine in engines:
+                with record_stage(f"train_{training_engine}"):
+                    if chunk_size is not None:
+                        print(
+                            f"Training {training_engine} model on chunks of "
+                            f"{chunk_size} listings..."
+                        )
+                        _, engine_metrics, _, _ = train_model_in_chunks(
+                            chunk_size=chunk_size,
+                            engine=training_engine,
+                            save=training_engine == engine,
+                            staged_n_estimators=(
+                                staged_n_estimators
+                                if training_engine == engine
+                                else None
+                            ),
+                            model_name=model_name,
+                            min_reviews=min_reviews,
+                            rating_weight=rating_weight,
+                            n_estimators=n_estimators,
+                            max_depth=max_depth,
+                            min_samples_split=min_samples_split,
+                            min_samples_leaf=min_samples_leaf,
+                            max_features=max_features,
+                            learning_rate=learning_rate,
+                            subsample=subsample,
+                            random_state=random_state,
+                        )
+                    else:
+                        print(f"Training {training_engine} model...")
+                        _, engine_metrics, _, _ = train_model(
+                            listings,
+                            model_name=model_name,
+                            min_reviews=min_reviews,
+                            rating_weight=rating_weight,
+                            n_estimators=n_estimators,
+                            max_depth=max_depth,
+                            min_samples_split=min_samples_split,
+                            min_samples_leaf=min_samples_leaf,
+                            max_features=max_features,
+                            learning_rate=learning_rate,
+                            subsample=subsample,
+                            random_state=random_state,
+                            sparse_output=sparse_output,
+                            engine=training_engine,
+                            save=training_engine == engine,
+                            staged_n_estimators=(
+                                staged_n_estimators
+                                if training_engine == engine
+                                else None
+                            ),
+                            feature_cache=feature_cache,
+                        )
+                metrics_by_engine[training_engine] = engine_metrics
+
+    if cv is not None:
+        print_cross_validation(fold_metrics, metrics)
+        if cv_refit:
+            print(f"\nModel {model_name} refitted on all listings and saved.")
+    else:
+        metrics = metrics_by_engine[engine]
+        print(f"\nModel training {model_name} completed!")
+        print(f"Training time: {metrics['fit_seconds']:.2f}s")
+        print(f"Validation MAE: {metrics['mae']:.4f}")
+        print(f"Validation RMSE: {metrics['rmse']:.4f}")
+
+    if staged_n_estimators is not None:
+        curve_path = MODEL_DIR / model_name / VALIDATION_CURVE_NAME
+        print_validation_curve(pd.read_csv(curve_path), staged_n_estimators)
+        print(f"Full validation curve: {curve_path}")
+
+    if compare_engines:
+        print_engine_comparison(metrics_by_engine)
+
+    if run_report:
+        report_path = MODEL_DIR / model_name / RUN_REPORTS_NAME
+        if cv is not None and not cv_refit:
+            report_path = CV_RUN_REPORTS_PATH
+        append_run_report(
+            report_path,
+            get_run_report(
+                recorder, command="train_model", argv=sys.argv[1:], metrics=metrics
+            ),
+        )
+        print(f"Run report: {report_path}")